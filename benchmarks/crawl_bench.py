@@ -0,0 +1,242 @@
+"""Replayable end-to-end crawl benchmark against a local fake onion web
+
+Each scenario starts a SiteGraphServer (with "Show More" buttons,
+lazy-loaded pages and embedded images, fonts and videos where the scenario
+asks for them) behind a SOCKS5 stand-in that injects Tor-like latency, then
+runs DarkWebCrawler.crawl in a fresh process so CPU time and peak RSS belong
+to that crawl alone. Browser fetches go through SeleniumFetcher's real
+interaction code with benchmarks.fake_browser standing in for Firefox.
+
+CPU time and peak RSS come from the resource module, or from psutil where
+it is missing (Windows); without either only the CPU time of this process
+is reported.
+
+Results are compared with benchmarks/baselines/crawl_bench.json; the exit
+status is 1 when a scenario regressed by more than ``--tolerance``. Run from
+the project root:
+    python -m benchmarks.crawl_bench
+    python -m benchmarks.crawl_bench --scenarios tiered_mixed --pages 100
+    python -m benchmarks.crawl_bench --save-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # optional; peak RSS is not reported without resource or psutil
+    psutil = None
+
+from benchmarks.local_harness import SiteGraph, SiteGraphServer, Socks5StandIn
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "crawl_bench.json")
+
+# Harness browser timings: Firefox start-up and per-page render
+BROWSER_OPTIONS = {"startup_latency": 0.5, "render_latency": 0.05, "settle_timeout": 0.2, "poll_interval": 0.02}
+
+SCENARIOS = {
+    "http_static": {
+        "graph": {},
+        "crawl": {"fetch_mode": "http"},
+    },
+    "tiered_mixed": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2},
+        "crawl": {"fetch_mode": "tiered", "browser_options": dict(BROWSER_OPTIONS, interaction_mode="batched")},
+    },
+    "browser_batched": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2},
+        "crawl": {"fetch_mode": "browser", "browser_options": dict(BROWSER_OPTIONS, interaction_mode="batched")},
+    },
+    "browser_per_element": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2},
+        "crawl": {"fetch_mode": "browser", "browser_options": dict(BROWSER_OPTIONS, interaction_mode="per_element")},
+    },
+    "browser_full_assets": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2, "assets": 6, "third_party_assets": 2},
+        "crawl": {"fetch_mode": "browser", "browser_options": dict(BROWSER_OPTIONS, interaction_mode="batched")},
+    },
+    "browser_lean": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2, "assets": 6, "third_party_assets": 2},
+        "crawl": {"fetch_mode": "browser", "browser_options": dict(BROWSER_OPTIONS, interaction_mode="batched",
+                                                                   profile="lean", block_third_party=True)},
+    },
+    "async_http": {
+        "graph": {"show_more_rate": 0.3, "lazy_rate": 0.2},
+        "engine": "async",
+        "crawl": {},
+    },
+}
+
+# Higher is better for these, lower for every other compared metric
+_HIGHER_IS_BETTER = {"pages_per_s"}
+_COMPARED = ("pages_per_s", "p50", "p95", "kb_per_page", "cpu_seconds", "peak_rss_mb")
+
+
+def _peak_rss_mb(usage):
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _cpu_and_peak_rss():
+    """CPU seconds of this process and its children, and peak RSS in MB (None if unknown)"""
+    if resource is not None:
+        own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+        return cpu, max(_peak_rss_mb(own), _peak_rss_mb(children))
+    if psutil is not None:
+        process = psutil.Process()
+        times = process.cpu_times()
+        cpu = times.user + times.system + getattr(times, "children_user", 0.0) + getattr(times, "children_system", 0.0)
+        memory = process.memory_info()
+        # peak_wset is the peak working set on Windows
+        return cpu, getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+    return time.process_time(), None
+
+
+def run_scenario(name, spec, proxy_url, settings, results):
+    """Run one crawl in this (fresh) process and report its measurements"""
+    from benchmarks.fake_browser import HarnessSeleniumFetcher
+    from crawler.core import DarkWebCrawler
+    from crawler.tor_manager import TorManager, RotationPolicy
+
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            tor = TorManager.from_proxy_urls([proxy_url], policy=RotationPolicy(enabled=False))
+            crawl_kwargs = dict(spec["crawl"], max_pages=settings["pages"], depth=settings["depth"],
+                                per_host_limit=settings["per_host"], delay=settings["delay"],
+                                page_cache={"enabled": False}, metrics={"enabled": False})
+            if spec.get("engine") == "async":
+                from crawler.async_core import AsyncDarkWebCrawler
+                crawler = AsyncDarkWebCrawler(output_dir=output_dir, tor=tor, concurrency=settings["concurrency"])
+            else:
+                crawler = DarkWebCrawler(output_dir=output_dir, tor=tor)
+                crawler.fetcher_factory = HarnessSeleniumFetcher
+                crawl_kwargs["workers"] = settings["workers"]
+
+            graph = SiteGraph(**spec["graph"])
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                pages = crawler.crawl(graph.seeds(), **crawl_kwargs)
+            elapsed = time.perf_counter() - started
+
+        fetch = crawler.metrics.summary()["stages"].get("fetch", {})
+        tiers = crawler.tier_stats.report()["tiers"]
+        transferred = sum(stats["transfer_bytes"] for stats in tiers.values())
+        cpu, peak_rss = _cpu_and_peak_rss()
+        # Parse pool processes come from a forkserver, so they are not our children
+        if crawler.parse_report and crawler.parse_report["executor"] == "process":
+            cpu += crawler.parse_report["cpu_seconds"]
+        results.put({
+            "scenario": name,
+            "pages": pages,
+            "seconds": round(elapsed, 3),
+            "pages_per_s": round(pages / elapsed, 2),
+            "p50": fetch.get("p50", 0.0),
+            "p95": fetch.get("p95", 0.0),
+            "kb_per_page": round(transferred / 1024 / max(1, pages), 1),
+            "cpu_seconds": round(cpu, 2),
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "tiers": {tier: stats["served"] for tier, stats in tiers.items()},
+        })
+    except ImportError as e:
+        results.put({"scenario": name, "skipped": str(e)})
+
+
+def compare(result, baseline, tolerance):
+    """Return the metrics that regressed by more than ``tolerance`` against the baseline"""
+    regressions = []
+    for metric in _COMPARED:
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if metric in _HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{metric} {old} -> {new}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end crawl benchmark on a local fake onion web")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4, help="Fetch workers for the threaded engine")
+    parser.add_argument("--concurrency", type=int, default=16, help="In-flight requests for the async engine")
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--delay", type=float, default=0.0, help="Per-host politeness delay (s)")
+    parser.add_argument("--latency", type=float, default=0.15, help="Mean server latency per request (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.1, help="Mean SOCKS connect latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Log-normal latency shape (0 = fixed latency)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression vs. the baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    settings = {key: getattr(args, key) for key in
+                ("pages", "depth", "workers", "concurrency", "per_host", "delay", "latency", "connect_latency", "jitter")}
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    comparable = baseline.get("settings") == settings
+    if baseline and not comparable:
+        print("⚠️ Baseline was recorded with different settings; not comparing")
+
+    print(f"\n🧪 Local onion web: {args.latency}s server latency, {args.connect_latency}s connect latency, "
+          f"jitter {args.jitter}, {args.pages} pages per scenario")
+    results = {}
+    regressed = False
+    for name in args.scenarios:
+        spec = SCENARIOS[name]
+        server = SiteGraphServer(SiteGraph(**spec["graph"]), latency=args.latency, jitter=args.jitter).start()
+        proxy = Socks5StandIn(server.address, connect_latency=args.connect_latency, jitter=args.jitter).start()
+        try:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_scenario, args=(name, spec, proxy.url, settings, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+        finally:
+            proxy.stop()
+            server.stop()
+
+        if "skipped" in result:
+            print(f"   {name:<20} skipped: {result['skipped']}")
+            continue
+        results[name] = result
+        peak_rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/a"
+        print(f"   {name:<20} {result['pages']:>4} pages in {result['seconds']:6.2f}s "
+              f"({result['pages_per_s']:6.1f} pages/s)  p50 {result['p50']:.3f}s  p95 {result['p95']:.3f}s  "
+              f"{result['kb_per_page']:.0f} KB/page  "
+              f"CPU {result['cpu_seconds']:.2f}s  peak RSS {peak_rss}")
+        if comparable and name in baseline.get("results", {}):
+            regressions = compare(result, baseline["results"][name], args.tolerance)
+            if regressions:
+                regressed = True
+                print(f"      ❌ regressed: {', '.join(regressions)}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            saved = dict(baseline.get("results", {})) if comparable else {}
+            saved.update(results)
+            json.dump({"settings": settings, "platform": sys.platform, "results": saved}, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
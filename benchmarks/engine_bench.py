@@ -0,0 +1,86 @@
+"""Compare crawl engines against a local fake onion web
+
+Run from the project root:
+    python -m benchmarks.engine_bench --pages 200 --latency 0.2
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+
+from benchmarks.local_harness import SiteGraph, SiteGraphServer, Socks5StandIn
+from crawler.core import DarkWebCrawler
+from crawler.tor_manager import TorManager, RotationPolicy
+
+
+def run_engine(name, crawler, seeds, pages, depth, **crawl_kwargs):
+    """Run one crawl quietly and return (pages, seconds)"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        saved = crawler.crawl(seeds, max_pages=pages, depth=depth, **crawl_kwargs)
+    elapsed = time.perf_counter() - started
+    print(f"   {name:<28} {saved:>5} pages in {elapsed:6.2f}s  ({saved / elapsed:6.1f} pages/s)")
+    return saved, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl engine throughput benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected per-request server latency (s)")
+    parser.add_argument("--connect-latency", type=float, default=0.1, help="Injected SOCKS connect latency (s)")
+    parser.add_argument("--workers", type=int, default=4, help="Workers for the threaded engine")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests for the async engine")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--socks-instances", type=int, default=1, help="Number of SOCKS stand-ins (Tor instances)")
+    parser.add_argument("--slow-instance-latency", type=float, default=0.0,
+                        help="Extra connect latency on the last SOCKS stand-in, to exercise health checks")
+    args = parser.parse_args()
+
+    graph = SiteGraph()
+    server = SiteGraphServer(graph, latency=args.latency).start()
+    proxies = []
+    for index in range(max(1, args.socks_instances)):
+        latency = args.connect_latency
+        if index and index == args.socks_instances - 1:
+            latency += args.slow_instance_latency
+        proxies.append(Socks5StandIn(server.address, connect_latency=latency).start())
+    seeds = graph.seeds()
+    print(f"\n🧪 Local onion web via {len(proxies)} SOCKS stand-in(s): {args.latency}s server latency, "
+          f"{args.connect_latency}s connect latency")
+
+    def new_tor():
+        return TorManager.from_proxy_urls([proxy.url for proxy in proxies],
+                                          policy=RotationPolicy(enabled=False), min_samples=5)
+
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            crawler = DarkWebCrawler(output_dir=output_dir, tor=new_tor())
+            run_engine("threaded http (1 worker)", crawler, seeds, args.pages, args.depth,
+                       workers=1, per_host_limit=args.per_host, fetch_mode="http", delay=0)
+
+            crawler = DarkWebCrawler(output_dir=output_dir, tor=new_tor())
+            run_engine(f"threaded http ({args.workers} workers)", crawler, seeds, args.pages, args.depth,
+                       workers=args.workers, per_host_limit=args.per_host, fetch_mode="http", delay=0)
+            if len(proxies) > 1:
+                for endpoint in crawler.tor.stats():
+                    print(f"      {endpoint['endpoint']}: {endpoint['requests']} requests, "
+                          f"latency {endpoint['latency']}s, out of rotation: {endpoint['out_of_rotation']}")
+
+            try:
+                from crawler.async_core import AsyncDarkWebCrawler
+                crawler = AsyncDarkWebCrawler(output_dir=output_dir, tor=new_tor(), concurrency=args.concurrency)
+            except ImportError as e:
+                print(f"   async engine skipped: {e}")
+            else:
+                run_engine(f"async ({args.concurrency} in flight)", crawler, seeds, args.pages, args.depth,
+                           per_host_limit=args.per_host)
+    finally:
+        for proxy in proxies:
+            proxy.stop()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
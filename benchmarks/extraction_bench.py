@@ -0,0 +1,99 @@
+"""Benchmark the lxml single-pass extractor against the old BeautifulSoup path
+
+Run from the project root on saved pages (.html files or incremental
+.jsonl result files), or on generated marketplace-style pages:
+    python -m benchmarks.extraction_bench outputs/scraped_data/incremental_*.jsonl
+    python -m benchmarks.extraction_bench --synthetic 20 --rows 5000
+"""
+import argparse
+import json
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from crawler.extraction import extract_page
+
+
+def legacy_parse(html):
+    """The previous crawl path: html.parser plus one find_all pass per field"""
+    soup = BeautifulSoup(html, "html.parser")
+    fields = {"text": (soup.body or soup).get_text("\n", strip=True)}
+    fields["links"] = [a_tag["href"] for a_tag in soup.find_all("a", href=True)
+                       if a_tag["href"].startswith("http") and ".onion" in a_tag["href"]]
+    fields["headings"] = [h.text for h in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"])]
+    fields["paragraphs"] = [p.text for p in soup.find_all("p")]
+    fields["tables"] = [t.text for t in soup.find_all("table")]
+    fields["forms"] = [f.text for f in soup.find_all("form")]
+    fields["images"] = [img.get("src", "") for img in soup.find_all("img")]
+    fields["hidden_content"] = [elem.text for elem in soup.find_all(class_=lambda c: c and ("hidden" in c or "collapsed" in c))]
+    return fields
+
+
+def synthetic_listing(rows, seed):
+    """A large marketplace-style listing page"""
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Listing</title><style>.x{}</style></head><body>",
+             "<h1>Market</h1><form action='/search' method='post'><input name='q'><select name='c'></select></form>",
+             "<ul>" + "".join(f"<li><a href='/cat/{i}'>Category {i}</a></li>" for i in range(50)) + "</ul>",
+             "<table>"]
+    for i in range(rows):
+        host = f"{rng.getrandbits(80):020x}.onion"
+        parts.append(f"<tr><td><a href='http://{host}/item/{i}'>Item {i}</a></td>"
+                     f"<td><img src='/img/{i}.jpg' alt='item {i}'></td><td>{rng.random():.4f} BTC</td>"
+                     f"<td><div class='details hidden'>Seller notes {i}</div></td></tr>")
+    parts.append("</table><p>Footer text</p></body></html>")
+    return "".join(parts)
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("html"):
+                        pages.append((record.get("url", ""), record["html"]))
+        else:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(("http://local.onion/", f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction benchmark")
+    parser.add_argument("paths", nargs="*", help=".html files or incremental .jsonl result files")
+    parser.add_argument("--synthetic", type=int, default=10, help="Generated pages when no paths are given")
+    parser.add_argument("--rows", type=int, default=3000, help="Table rows per generated page")
+    args = parser.parse_args()
+
+    if args.paths:
+        pages = load_pages(args.paths)
+    else:
+        pages = [("http://market.onion/", synthetic_listing(args.rows, seed)) for seed in range(args.synthetic)]
+    if not pages:
+        print("❌ No pages with HTML found")
+        return
+
+    total_bytes = sum(len(html) for _, html in pages)
+    print(f"\n📄 {len(pages)} pages, {total_bytes / (1024 * 1024):.1f} MB of HTML")
+
+    started = time.perf_counter()
+    for _, html in pages:
+        legacy_parse(html)
+    legacy = time.perf_counter() - started
+    print(f"   BeautifulSoup (html.parser, multi-pass): {legacy:7.2f}s")
+
+    started = time.perf_counter()
+    for url, html in pages:
+        extract_page(html, url, with_text=True)
+    single = time.perf_counter() - started
+    print(f"   lxml single pass (structured schema):    {single:7.2f}s  ({legacy / single:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""WebDriver stand-in for benchmarking SeleniumFetcher without Firefox
+
+HarnessDriver loads pages from a SiteGraphServer through the SOCKS stand-in
+and models just enough of a browser for SeleniumFetcher's real code paths:
+scrolling loads the next lazy chunk, clicking a "Show More" button (per
+element or through the batched interaction script) fetches its fragment,
+and the DOM signature changes when content is added. Page loads also fetch
+the page's images, fonts and videos six at a time, as Firefox would, unless
+the browser profile blocks them. HarnessSeleniumFetcher is SeleniumFetcher
+with this driver in place of Firefox, so interaction, wait logic and profile
+changes show up in the benchmarks.
+"""
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import NoSuchElementException
+
+from benchmarks.local_harness import jittered
+from crawler import selenium_fetcher
+from crawler.selenium_fetcher import SeleniumFetcher
+
+_LAZY_RE = re.compile(r'<div class="lazy-load" data-src="([^"]+)" data-chunks="(\d+)"></div>')
+_SHOW_MORE_RE = re.compile(r'<button class="show-more" data-src="([^"]+)">([^<]*)</button>')
+_TITLE_RE = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+_XPATH_NEEDLE_RE = re.compile(r"'([^']*)'\)\]$")
+_ASSET_RE = re.compile(r'(?:src|href)="([^"]+\.(png|woff2|mp4))"')
+_ASSET_KINDS = {"png": "image", "woff2": "font", "mp4": "media"}
+
+# Resource kinds SeleniumFetcher's lean profile keeps Firefox from loading
+LEAN_BLOCKED = frozenset(("image", "font", "media"))
+
+# Firefox's default connections per server
+_CONNECTIONS_PER_HOST = 6
+
+
+class _Element:
+    def __init__(self, driver, kind):
+        self.driver = driver
+        self.kind = kind
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+    def click(self):
+        if self.kind == "show_more":
+            self.driver._click_show_more()
+
+
+class HarnessDriver:
+    """Minimal WebDriver look-alike backed by HTTP requests over SOCKS
+
+    ``blocked`` resource kinds ("image", "font", "media") are never loaded,
+    ``eager`` page loads return without waiting for subresources, and with
+    ``onion_only`` subresources on other hosts are dropped.
+    """
+
+    def __init__(self, proxy_url, render_latency=0.0, jitter=0.0, timeout=60, blocked=(), eager=False,
+                 onion_only=False):
+        self.session = requests.Session()
+        self.session.proxies = {"http": proxy_url, "https": proxy_url}
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=_CONNECTIONS_PER_HOST))
+        self.render_latency = render_latency
+        self.jitter = jitter
+        self.timeout = timeout
+        self.blocked = frozenset(blocked)
+        self.eager = eager
+        self.onion_only = onion_only
+        self.url = None
+        self.title = ""
+        self._html = ""
+        self._loads = []
+        self._document_bytes = 0
+        self._assets = ThreadPoolExecutor(max_workers=_CONNECTIONS_PER_HOST)
+        self.requests = 0
+
+    def _fetch(self, url):
+        self.requests += 1
+        # Like Firefox, error pages are rendered rather than raised
+        response = self.session.get(url, timeout=self.timeout)
+        self._document_bytes += len(response.content)
+        return response.text
+
+    def _fetch_asset(self, url):
+        self.requests += 1
+        try:
+            return len(self.session.get(url, timeout=self.timeout).content)
+        except requests.RequestException:
+            return 0
+
+    def get(self, url):
+        self.url = url
+        self._document_bytes = 0
+        self._html = self._fetch(url)
+        match = _TITLE_RE.search(self._html)
+        self.title = match.group(1) if match else ""
+        self._lazy_loaded = 0
+        self._loads = [self._assets.submit(self._fetch_asset, asset) for asset in self._subresources()]
+        if not self.eager:
+            wait(self._loads)
+        if self.render_latency:
+            time.sleep(jittered(self.render_latency, self.jitter, url))
+
+    def _subresources(self):
+        """URLs of the page's subresources this browser would load"""
+        urls = []
+        for src, extension in _ASSET_RE.findall(self._html):
+            if _ASSET_KINDS[extension] in self.blocked:
+                continue
+            absolute = urljoin(self.url, src)
+            if self.onion_only and not urlsplit(absolute).hostname.endswith(".onion"):
+                continue
+            urls.append(absolute)
+        return urls
+
+    @property
+    def page_source(self):
+        return self._html
+
+    def _scroll(self):
+        match = _LAZY_RE.search(self._html)
+        if not match:
+            return
+        src, chunks = match.group(1), int(match.group(2))
+        fragment = self._fetch(urljoin(self.url, f"{src}/{self._lazy_loaded}"))
+        self._lazy_loaded += 1
+        placeholder = match.group(0) if self._lazy_loaded < chunks else ""
+        self._html = self._html[:match.start()] + fragment + placeholder + self._html[match.end():]
+
+    def _click_show_more(self):
+        match = _SHOW_MORE_RE.search(self._html)
+        if match:
+            fragment = self._fetch(urljoin(self.url, match.group(1)))
+            self._html = self._html[:match.start()] + fragment + self._html[match.end():]
+
+    def execute_script(self, script, *args):
+        if script is selenium_fetcher._DOM_SIGNATURE_SCRIPT:
+            return [len(self._html), self._html.count("<")]
+        if script is selenium_fetcher._RESOURCE_STATS_SCRIPT:
+            loaded = [load.result() for load in self._loads if load.done()]
+            return {"transfer_bytes": self._document_bytes + sum(loaded), "resources": len(loaded)}
+        if script is selenium_fetcher._BATCH_INTERACT_SCRIPT:
+            found = 1 if _SHOW_MORE_RE.search(self._html) else 0
+            self._click_show_more()
+            return {"candidates": found, "clicked": found, "errors": 0}
+        if "scrollTo" in script:
+            self._scroll()
+        return None
+
+    def find_element(self, by, value):
+        if value == "body" and "<body" in self._html:
+            return _Element(self, "body")
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        match = _SHOW_MORE_RE.search(self._html)
+        if not match:
+            return []
+        needle = _XPATH_NEEDLE_RE.search(value)
+        # The per-element path looks buttons and links up by text with XPath
+        if needle and needle.group(1) in match.group(2).lower() and value.startswith("//button"):
+            return [_Element(self, "show_more")]
+        return []
+
+    def quit(self):
+        # Only the last page's loads can still be queued
+        for load in self._loads:
+            load.cancel()
+        self._assets.shutdown(wait=False)
+        self.session.close()
+
+
+class HarnessSeleniumFetcher(SeleniumFetcher):
+    """SeleniumFetcher driving a HarnessDriver instead of Firefox
+
+    ``startup_latency`` mimics the seconds Firefox takes to launch and
+    ``render_latency`` the time to render each page.
+    """
+
+    def __init__(self, socks_host="127.0.0.1", socks_port=9050, startup_latency=0.0, render_latency=0.0,
+                 jitter=0.0, **options):
+        super().__init__(socks_host, socks_port, **options)
+        self.startup_latency = startup_latency
+        self.render_latency = render_latency
+        self.jitter = jitter
+
+    def init_browser(self):
+        if self.startup_latency:
+            time.sleep(self.startup_latency)
+        lean = self.profile == "lean"
+        return HarnessDriver(f"socks5h://{self.socks_host}:{self.socks_port}",
+                             render_latency=self.render_latency, jitter=self.jitter,
+                             blocked=LEAN_BLOCKED if lean else (), eager=lean, onion_only=self.block_third_party)
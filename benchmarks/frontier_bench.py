@@ -0,0 +1,83 @@
+"""Benchmark the crawl frontier on synthetic link graphs
+
+Run from the project root:
+    python -m benchmarks.frontier_bench --edges 100000 1000000
+"""
+import argparse
+import random
+import time
+
+from crawler.frontier import CrawlFrontier
+
+
+def make_link_graph(edges, fanout=200, seed=1):
+    """Build a synthetic graph as {url: [outlinks]} with the given edge count
+
+    Pages link mostly to a shared pool of popular URLs (like forum navigation)
+    so dedupe hits are common, as they are on real sites.
+    """
+    rng = random.Random(seed)
+    pages = max(1, edges // fanout)
+    hosts = [f"http://{rng.getrandbits(80):020x}.onion" for _ in range(max(1, pages // 50))]
+    urls = [f"{rng.choice(hosts)}/page/{i}" for i in range(pages * 4)]
+    graph = {}
+    for i in range(pages):
+        graph[urls[i]] = [urls[rng.randrange(len(urls))] for _ in range(fanout)]
+    return urls[0], graph
+
+
+def run_frontier(start, graph):
+    """Drain the graph through CrawlFrontier"""
+    frontier = CrawlFrontier([start])
+    while frontier:
+        url, depth = frontier.pop()
+        for href in graph.get(url, ()):
+            frontier.add(href, depth + 1)
+    return frontier.stats()
+
+
+def run_legacy(start, graph):
+    """Drain the graph with the old list.pop(0) / `in to_visit` approach"""
+    visited = set()
+    to_visit = [start]
+    while to_visit:
+        url = to_visit.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        for href in graph.get(url, ()):
+            if href not in visited and href not in to_visit:
+                to_visit.append(href)
+    return len(visited)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl frontier benchmark")
+    parser.add_argument("--edges", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--fanout", type=int, default=200)
+    parser.add_argument("--legacy-max-edges", type=int, default=100000,
+                        help="Skip the quadratic legacy path above this size")
+    args = parser.parse_args()
+
+    for edges in args.edges:
+        start, graph = make_link_graph(edges, args.fanout)
+        print(f"\n📈 {edges:,} edges, {len(graph):,} pages with outlinks")
+
+        began = time.perf_counter()
+        stats = run_frontier(start, graph)
+        elapsed = time.perf_counter() - began
+        print(f"   CrawlFrontier: {elapsed:.3f}s ({edges / elapsed:,.0f} edges/s)")
+        print(f"   max queue {stats['max_queue_length']:,}, seen {stats['seen_urls']:,}, "
+              f"dedupe hit rate {stats['dedupe_hit_rate']:.1%}")
+
+        if edges <= args.legacy_max_edges:
+            began = time.perf_counter()
+            run_legacy(start, graph)
+            elapsed = time.perf_counter() - began
+            print(f"   legacy list:   {elapsed:.3f}s ({edges / elapsed:,.0f} edges/s)")
+        else:
+            print("   legacy list:   skipped (quadratic)")
+
+
+if __name__ == "__main__":
+    main()
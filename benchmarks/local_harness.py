@@ -0,0 +1,320 @@
+"""Local stand-ins for Tor and .onion sites used by the benchmarks
+
+SiteGraphServer serves a generated graph of pages for any Host header, and
+Socks5StandIn is a minimal SOCKS5 proxy that sends every CONNECT to that
+server, so crawlers can be pointed at fake ``http://siteN.onion/`` URLs
+exactly as they would be at Tor.
+
+Pages can carry "Show More" buttons and lazy-loaded sections whose content
+is only served from separate fragment URLs; benchmarks.fake_browser reveals
+them the way Firefox would, so the tiered fetch path and SeleniumFetcher's
+interaction code can be measured without a browser. Pages can also embed
+images, web fonts and videos (served under ``/a/`` for any host, including
+clearnet "CDN" hosts) so browser profiles that skip them can be compared.
+"""
+import hashlib
+import math
+import random
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_WORDS = ("market", "vendor", "escrow", "listing", "forum", "thread", "reply", "mirror", "bitcoin",
+          "monero", "shipping", "review", "rating", "account", "wallet", "order", "support", "index",
+          "archive", "service", "contact", "update", "status", "page", "post", "user", "guide", "news")
+
+
+class SiteGraph:
+    """Deterministic graph of pages spread over fake .onion hosts
+
+    Every page has its own text, so pages are not near-duplicates of each other.
+
+    A ``show_more_rate`` fraction of pages end in a "Show More" button whose
+    extra links and text are served at ``/p/N/more``; a ``lazy_rate``
+    fraction ship only a small placeholder body and load the rest in
+    ``lazy_chunks`` pieces (``/p/N/lazy/K``) as the page is scrolled.
+
+    Each page embeds ``assets`` same-host subresources of ``asset_bytes``
+    bytes (a web font, then images and videos in turn) and
+    ``third_party_assets`` images on a clearnet CDN host.
+    """
+
+    CDN_HOST = "cdn.example.com"
+
+    def __init__(self, hosts=20, pages_per_host=200, fanout=10, page_bytes=20000, seed=1,
+                 show_more_rate=0.0, lazy_rate=0.0, lazy_chunks=2, assets=0, asset_bytes=30000,
+                 third_party_assets=0):
+        self.hosts = [f"site{i:03d}.onion" for i in range(hosts)]
+        self.pages_per_host = pages_per_host
+        self.fanout = fanout
+        self.page_bytes = page_bytes
+        self.seed = seed
+        self.show_more_rate = show_more_rate
+        self.lazy_rate = lazy_rate
+        self.lazy_chunks = lazy_chunks
+        self.assets = assets
+        self.asset_bytes = asset_bytes
+        self.third_party_assets = third_party_assets
+
+    def seeds(self, count=4):
+        """Start URLs, one per host"""
+        return [f"http://{host}/p/0" for host in self.hosts[:count]]
+
+    def page_kind(self, host, page):
+        """"show_more", "lazy" or "static" for one page"""
+        roll = random.Random(f"{self.seed}:kind:{host}:{page}").random()
+        if roll < self.show_more_rate:
+            return "show_more"
+        if roll < self.show_more_rate + self.lazy_rate:
+            return "lazy"
+        return "static"
+
+    def _content(self, rng, host, links, size):
+        """Link list plus filler paragraphs up to ``size`` bytes"""
+        anchors = []
+        for _ in range(links):
+            # Mostly same-site links, some cross-site
+            target_host = host if rng.random() < 0.7 else rng.choice(self.hosts)
+            anchors.append(f'<a href="http://{target_host}/p/{rng.randrange(self.pages_per_host)}">link</a>')
+        body = ["<ul>" + "".join(f"<li>{a}</li>" for a in anchors) + "</ul>"]
+        total = len(body[0])
+        while total < size:
+            paragraph = "<p>" + " ".join(rng.choice(_WORDS) for _ in range(40)) + "</p>"
+            body.append(paragraph)
+            total += len(paragraph)
+        return "".join(body)
+
+    def render(self, host, page):
+        """Build the HTML for one page"""
+        rng = random.Random(f"{self.seed}:{host}:{page}")
+        kind = self.page_kind(host, page)
+        heading = f"<h1>{host} page {page}</h1>"
+        if kind == "lazy":
+            body = heading + self._content(rng, host, self.fanout // 2, 0) + (
+                f'<div class="lazy-load" data-src="/p/{page}/lazy" data-chunks="{self.lazy_chunks}"></div>')
+        elif kind == "show_more":
+            body = heading + self._content(rng, host, self.fanout // 2, self.page_bytes // 2) + (
+                f'<div id="more"></div><button class="show-more" data-src="/p/{page}/more">Show more</button>')
+        else:
+            body = heading + self._content(rng, host, self.fanout, self.page_bytes)
+        head, media = self._asset_tags(host, page)
+        return f"<html><head><title>{host} {page}</title>{head}</head><body>{media}{body}</body></html>"
+
+    def _asset_tags(self, host, page):
+        """(head, body) markup embedding the page's subresources"""
+        head, body = [], []
+        for index in range(self.assets):
+            if index == 0:
+                head.append(f'<link rel="preload" as="font" href="/a/{page}-{index}.woff2">')
+            elif index % 3 == 0:
+                body.append(f'<video src="/a/{page}-{index}.mp4"></video>')
+            else:
+                body.append(f'<img src="/a/{page}-{index}.png" alt="">')
+        for index in range(self.third_party_assets):
+            body.append(f'<img src="http://{self.CDN_HOST}/a/{host}-{page}-{index}.png" alt="">')
+        return "".join(head), "".join(body)
+
+    def render_asset(self, name):
+        """Deterministic bytes of one subresource"""
+        return hashlib.sha256(name.encode("utf-8")).digest() * (self.asset_bytes // 32 + 1)
+
+    def render_fragment(self, host, page, part):
+        """HTML revealed by a "Show More" click ("more") or a lazy chunk ("lazy/K")"""
+        rng = random.Random(f"{self.seed}:{host}:{page}:{part}")
+        if part == "more":
+            return self._content(rng, host, self.fanout - self.fanout // 2, self.page_bytes // 2)
+        chunk_links = -(-(self.fanout - self.fanout // 2) // self.lazy_chunks)
+        return self._content(rng, host, chunk_links, self.page_bytes // self.lazy_chunks)
+
+
+def jittered(latency, jitter, key=None):
+    """``latency`` with log-normal noise of shape ``jitter`` (0 keeps it fixed), like Tor round trips
+
+    With a ``key`` the same key always gets the same delay, so runs replay.
+    """
+    if not latency or not jitter:
+        return latency
+    rng = random.Random(key) if key is not None else random
+    return rng.lognormvariate(math.log(latency) - jitter ** 2 / 2, jitter)
+
+
+class SiteGraphServer:
+    """Threaded HTTP server for a SiteGraph with optional response latency
+
+    Pages carry an ETag and conditional GETs with a matching If-None-Match
+    get a 304. ``latency`` is the mean delay per response; ``jitter`` makes
+    it log-normally distributed around that mean.
+    """
+
+    def __init__(self, graph, latency=0.0, host="127.0.0.1", port=0, jitter=0.0):
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        handler = self._make_handler()
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self.requests = 0
+        self.not_modified = 0
+        self._thread = None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests += 1
+                host = self.headers.get("Host", "").split(":")[0]
+                if server.latency:
+                    time.sleep(jittered(server.latency, server.jitter, f"{host}{self.path}"))
+                parts = self.path.strip("/").split("/")
+                if len(parts) == 2 and parts[0] == "a":
+                    # Subresources are served for any host, clearnet CDNs included
+                    body = server.graph.render_asset(parts[1])[:server.graph.asset_bytes]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if host not in server.graph.hosts or len(parts) < 2 or parts[0] != "p" or not parts[1].isdigit():
+                    self.send_error(404)
+                    return
+                if len(parts) == 2:
+                    body = server.graph.render(host, int(parts[1])).encode("utf-8")
+                elif parts[2:] == ["more"] or (len(parts) == 4 and parts[2] == "lazy" and parts[3].isdigit()):
+                    body = server.graph.render_fragment(host, int(parts[1]), "/".join(parts[2:])).encode("utf-8")
+                else:
+                    self.send_error(404)
+                    return
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class Socks5StandIn:
+    """Minimal no-auth SOCKS5 proxy that forwards every CONNECT to one target
+
+    ``connect_latency`` delays each new connection to mimic building a Tor
+    circuit to a hidden service (log-normally around that mean with
+    ``jitter``).
+    """
+
+    def __init__(self, target, connect_latency=0.0, host="127.0.0.1", port=0, jitter=0.0):
+        self.target = target
+        self.connect_latency = connect_latency
+        self.jitter = jitter
+        self.connections = 0
+        handler = self._make_handler()
+        self.server = socketserver.ThreadingTCPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"socks5h://{self.address[0]}:{self.address[1]}"
+
+    def _make_handler(self):
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                client = self.request
+                try:
+                    # Greeting: version, methods -> choose "no auth"
+                    version, nmethods = struct.unpack("!BB", _recv_exact(client, 2))
+                    _recv_exact(client, nmethods)
+                    client.sendall(b"\x05\x00")
+
+                    # Request: version, cmd, reserved, address type
+                    version, cmd, _, atyp = struct.unpack("!BBBB", _recv_exact(client, 4))
+                    if atyp == 1:
+                        _recv_exact(client, 4)
+                    elif atyp == 3:
+                        _recv_exact(client, _recv_exact(client, 1)[0])
+                    elif atyp == 4:
+                        _recv_exact(client, 16)
+                    _recv_exact(client, 2)
+                    if cmd != 1:
+                        client.sendall(b"\x05\x07\x00\x01" + b"\x00" * 6)
+                        return
+
+                    proxy.connections += 1
+                    if proxy.connect_latency:
+                        time.sleep(jittered(proxy.connect_latency, proxy.jitter, proxy.connections))
+                    upstream = socket.create_connection(proxy.target)
+                    client.sendall(b"\x05\x00\x00\x01" + socket.inet_aton("127.0.0.1") + struct.pack("!H", 0))
+                    _pipe(client, upstream)
+                except (ConnectionError, OSError):
+                    pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _recv_exact(sock, count):
+    data = b""
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("SOCKS client closed the connection")
+        data += chunk
+    return data
+
+
+def _pipe(client, upstream):
+    """Shuttle bytes both ways until either side closes"""
+    sockets = [client, upstream]
+    try:
+        while True:
+            readable, _, _ = select.select(sockets, [], [], 60)
+            if not readable:
+                return
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                (upstream if sock is client else client).sendall(data)
+    finally:
+        upstream.close()
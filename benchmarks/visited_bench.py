@@ -0,0 +1,114 @@
+"""Benchmark the visited-set backends at multi-million URL scale
+
+Each backend and size runs in a fresh process so its memory can be measured
+on its own. Run from the project root:
+    python -m benchmarks.visited_bench
+    python -m benchmarks.visited_bench --sizes 1000000 --backends bloom sqlite
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # optional; used where /proc and resource are missing
+    psutil = None
+
+from crawler.visited import VISITED_BACKENDS, create_visited_set
+
+
+def make_url(i):
+    """A realistic v3 .onion URL, unique per i"""
+    return f"http://{i:056x}.onion/forum/thread/{i % 9973}?page={i % 17}"
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc, else psutil), falling back to the peak"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+def run_case(backend, size, lookups, error_rate, results):
+    """Fill one backend with ``size`` URLs and time inserts and lookups"""
+    workdir = tempfile.mkdtemp()
+    try:
+        options = {"error_rate": error_rate, "capacity": size} if backend == "bloom" else {}
+        if backend == "sqlite":
+            options["path"] = os.path.join(workdir, "visited.sqlite")
+        before = rss_bytes()
+        visited = create_visited_set(backend, **options)
+
+        started = time.perf_counter()
+        for i in range(size):
+            visited.add(make_url(i))
+        insert_seconds = time.perf_counter() - started
+        memory = rss_bytes() - before
+
+        # Half the lookups hit stored URLs, half miss
+        step = max(1, size // (lookups // 2))
+        started = time.perf_counter()
+        hits = sum(1 for i in range(0, size, step) if make_url(i) in visited)
+        false_positives = sum(1 for i in range(size, size + lookups // 2) if make_url(i) in visited)
+        lookup_seconds = time.perf_counter() - started
+        checked = len(range(0, size, step)) + lookups // 2
+
+        disk = 0
+        if backend == "sqlite":
+            visited.close()
+            disk = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+        results.put({
+            "backend": backend,
+            "size": size,
+            "inserts_per_s": size / insert_seconds,
+            "lookups_per_s": checked / lookup_seconds,
+            "memory_mb": memory / (1024 * 1024),
+            "disk_mb": disk / (1024 * 1024),
+            "missed": len(range(0, size, step)) - hits,
+            "false_positive_rate": false_positives / (lookups // 2),
+        })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Visited-set backend benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000, 10000000])
+    parser.add_argument("--backends", nargs="+", choices=VISITED_BACKENDS, default=list(VISITED_BACKENDS))
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--error-rate", type=float, default=0.001, help="Bloom filter false-positive target")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(f"\n📈 {size:,} URLs")
+        for backend in args.backends:
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(target=run_case,
+                                              args=(backend, size, args.lookups, args.error_rate, results))
+            process.start()
+            result = results.get()
+            process.join()
+            disk = f", {result['disk_mb']:,.0f} MB on disk" if result["disk_mb"] else ""
+            print(f"   {backend:7s} {result['inserts_per_s']:>10,.0f} inserts/s  "
+                  f"{result['lookups_per_s']:>10,.0f} lookups/s  "
+                  f"{result['memory_mb']:>8,.1f} MB RAM{disk}  "
+                  f"false positives {result['false_positive_rate']:.3%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+from .core import DarkWebCrawler
+from .options import CrawlOptions
+from .pipeline import ParseStage
+from .http_fetcher import decode_html, extract_title, is_html_type, response_validators
+
+try:
+    import aiohttp
+    from aiohttp_socks import ProxyConnector
+except ImportError:  # optional dependency, only needed for this engine
+    aiohttp = None
+    ProxyConnector = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDarkWebCrawler(DarkWebCrawler):
+    """asyncio crawl engine that keeps many requests in flight over Tor
+
+    Pages are fetched with aiohttp through the Tor SOCKS ports, one client
+    session per Tor instance, picking an instance per request. A global
+    semaphore bounds the requests in flight and a per-host semaphore keeps a
+    single .onion service from being hammered. HTML parsing runs in a
+    ParseStage thread or process pool and is awaited alongside the fetches,
+    so it never blocks the event loop or the next fetches. Records have the
+    same schema as the Selenium engine's and go to the same result sink.
+
+    Requires the optional ``aiohttp`` and ``aiohttp-socks`` packages.
+    """
+
+    def __init__(self, output_dir=None, tor=None, concurrency=16, parse_workers=None, parse_executor="thread",
+                 run_id=None, output_format="json", shard_options=None, html_store=None, search_index=None):
+        if aiohttp is None:
+            raise ImportError("The async engine needs aiohttp and aiohttp-socks: pip install aiohttp aiohttp-socks")
+        super().__init__(output_dir=output_dir, tor=tor, run_id=run_id, output_format=output_format,
+                         shard_options=shard_options, html_store=html_store, search_index=search_index)
+        self.concurrency = max(1, int(concurrency))
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+
+    def crawl(self, start_urls, options=None, **overrides):
+        """Run the async crawl to completion and return the records written
+
+        Takes the same CrawlOptions as the threaded engine; ``workers``,
+        ``fetch_mode`` and the Firefox options do not apply. The options'
+        ``parse_workers`` and ``parse_executor`` override the constructor's
+        when set.
+        """
+        options = (options or CrawlOptions()).replace(**overrides)
+        if options.parse_workers is not None:
+            self.parse_workers = options.parse_workers
+        if options.parse_executor is not None:
+            self.parse_executor = options.parse_executor
+        return asyncio.run(self.crawl_async(start_urls, options))
+
+    async def crawl_async(self, start_urls, options):
+        """Crawl with a bounded window of concurrent fetches
+
+        Hosts are scheduled by the frontier's per-host politeness delay, so
+        the window is filled from whichever hosts are ready.
+        """
+        if not start_urls:
+            return 0
+
+        start_urls, options = self._restore_settings(start_urls, options)
+        max_pages = options.max_pages
+        per_host_limit = options.per_host_limit
+        self._configure_dedup(options.dedup)
+        frontier, pages_crawled = self._init_frontier(start_urls, options)
+        self.frontier = frontier
+
+        self._open_page_cache(options.page_cache)
+        self._start_metrics(options.metrics)
+
+        global_limit = asyncio.Semaphore(self.concurrency)
+        host_limits = {}
+        parser = ParseStage(workers=self.parse_workers, executor=self.parse_executor)
+
+        # Queue at most two windows of tasks; the semaphores bound actual requests
+        window = self.concurrency * 2
+        logger.info("Async engine: %d requests in flight (max %d per host)", self.concurrency, per_host_limit)
+        logger.info("Parse workers: %d (%s pool, up to %d pages queued)", parser.workers, parser.kind,
+                    parser.max_pending)
+
+        client_timeout = aiohttp.ClientTimeout(total=options.timeout)
+        headers = dict(self.session.headers)
+        sessions = {}
+        for endpoint in self.tor.endpoints:
+            connector = ProxyConnector.from_url(f"socks5://{endpoint.socks_host}:{endpoint.socks_port}", rdns=True)
+            sessions[endpoint] = aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=headers)
+        tasks = {}
+        parses = {}  # asyncio wrapper -> ParseStage future
+        host_tasks = {}
+
+        def host_ok(url):
+            return host_tasks.get(urlparse(url).netloc.lower(), 0) < per_host_limit
+
+        self.sink.open()
+        written_before = self.sink.records_written
+        logger.info("Writing incremental results to %s", self.incremental_file)
+        try:
+            while tasks or parses or (frontier and pages_crawled < max_pages):
+                # Stop fetching ahead while the parsers are backed up
+                while (frontier and len(tasks) < window and parser.has_capacity() and
+                       pages_crawled + len(tasks) < max_pages):
+                    entry = frontier.pop(host_ok=host_ok)
+                    if entry is None:
+                        break
+                    url, url_depth = entry
+                    host = urlparse(url).netloc.lower()
+                    if host not in host_limits:
+                        host_limits[host] = asyncio.Semaphore(per_host_limit)
+                    host_tasks[host] = host_tasks.get(host, 0) + 1
+                    task = asyncio.ensure_future(
+                        self._fetch(sessions, url, global_limit, host_limits[host]))
+                    tasks[task] = (url, url_depth)
+
+                self._update_gauges(frontier, len(tasks), parser.pending, pages_crawled)
+
+                # Wake up when a fetch or parse finishes or the next host's delay is over
+                ready_in = frontier.next_ready_in() if len(tasks) < window else None
+                if not tasks and not parses:
+                    await asyncio.sleep(ready_in or 0)
+                    continue
+                done, _ = await asyncio.wait(list(tasks) + list(parses), timeout=ready_in or None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task not in tasks:
+                        continue
+                    url, url_depth = tasks.pop(task)
+                    host = urlparse(url).netloc.lower()
+                    host_tasks[host] -= 1
+                    frontier.mark_fetched(url)
+                    self.scope.record_fetch(url_depth)
+                    page_data = task.result()
+                    pages_crawled += 1
+                    logger.info("%d/%d pages fetched", pages_crawled, max_pages)
+                    if "error" in page_data:
+                        self._fetch_failed(url, page_data)
+                    else:
+                        future = parser.submit((url, url_depth), page_data)
+                        parses[asyncio.wrap_future(future)] = future
+
+                parsed = [parses.pop(task) for task in done if task in parses]
+                for entry, page_data, fields, error in parser.collect(parsed):
+                    self._process_page(entry, page_data, fields, error, frontier)
+        finally:
+            for task in list(tasks) + list(parses):
+                task.cancel()
+            for session in sessions.values():
+                await session.close()
+            parser.close()
+            self.parse_report = parser.stats()
+            self.tor.close()
+            self.sink.close()
+            if self.search_index:
+                self.search_index.commit()
+            self.state.close()
+            self.visited.close()
+            if self.page_cache:
+                self.page_cache.close()
+            self._update_gauges(frontier, 0, 0, pages_crawled)
+            self.metrics.stop()
+
+        self._log_crawl_stats(frontier)
+        return self.sink.records_written - written_before
+
+    async def _fetch(self, sessions, url, global_limit, host_limit):
+        """Fetch one page, holding the host slot before a global slot
+
+        Like the pool engine's pages, the result carries ``"fetch_tier"`` and
+        stage ``"timings"``: ``http_first_byte`` (Tor connect and time to
+        the response headers), ``http_body`` and the total ``fetch``, which
+        includes waiting for a slot.
+        """
+        loop = asyncio.get_running_loop()
+        cache = self.page_cache
+        fetch_started = time.monotonic()
+        if cache:
+            cached = await loop.run_in_executor(None, cache.fresh_page, url)
+            if cached is not None:
+                self.tier_stats.record("cache", 0.0, served=True)
+                cached["fetch_tier"] = "cache"
+                cached["timings"] = {"fetch": time.monotonic() - fetch_started}
+                return cached
+
+        async with host_limit:
+            async with global_limit:
+                headers = cache.revalidation_headers(url) if cache else {}
+                endpoint = self.tor.acquire()
+                started = time.monotonic()
+                logger.info("Crawling: %s", url)
+                tor_ok = True
+                validators = None
+                timings = {}
+                try:
+                    async with sessions[endpoint].get(url, headers=headers) as response:
+                        timings["http_first_byte"] = time.monotonic() - started
+                        content_type = response.headers.get("Content-Type", "")
+                        if response.status == 304 and headers:
+                            page_data = await loop.run_in_executor(None, cache.revalidated_page, url)
+                            if page_data is None:
+                                page_data = {"error": "Not modified, but the cached copy is missing", "url": url}
+                        elif response.status >= 400:
+                            page_data = {"error": f"HTTP status {response.status}", "url": url}
+                        elif not is_html_type(content_type):
+                            page_data = {"error": f"Unsupported content type: {content_type}", "url": url}
+                        else:
+                            body = await response.read()
+                            timings["http_body"] = time.monotonic() - started - timings["http_first_byte"]
+                            html = decode_html(body, content_type)
+                            page_data = {"url": url, "title": extract_title(html), "html": html,
+                                         "transfer_bytes": len(body)}
+                            validators = response_validators(response.headers)
+                except asyncio.TimeoutError:
+                    tor_ok = False
+                    page_data = {"error": "Timeout while loading page", "url": url}
+                except Exception as e:
+                    tor_ok = False
+                    page_data = {"error": f"HTTP error: {str(e)}", "url": url}
+                finally:
+                    self.tor.release(endpoint)
+                elapsed = time.monotonic() - started
+                self.tier_stats.record("async_http", elapsed, served="error" not in page_data,
+                                       transfer_bytes=page_data.get("transfer_bytes", 0))
+                # Health and rotation bookkeeping may touch the control port, so keep it off the loop
+                await loop.run_in_executor(
+                    None, self.tor.record_result, endpoint, url, elapsed if tor_ok else None, tor_ok)
+                if cache and validators is not None:
+                    await loop.run_in_executor(None, cache.store, url, page_data, "async_http", validators)
+                page_data["fetch_tier"] = "async_http"
+                page_data["timings"] = dict(timings, fetch=time.monotonic() - fetch_started)
+                return page_data
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import tempfile
+import zlib
+
+
+class BlobStore:
+    """Content-addressed store of zlib-compressed blobs on disk
+
+    Each blob is named by the SHA-256 of its uncompressed bytes and kept at
+    ``<root>/<first two hex digits>/<digest>``, so identical content is
+    stored once no matter how many URLs serve it. Writes go through a
+    temporary file and an atomic rename, so readers never see partial blobs.
+    """
+
+    def __init__(self, root, level=6):
+        self.root = root
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store bytes (or str, as UTF-8) and return their digest"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = self.digest(data)
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(zlib.compress(data, self.level))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def get(self, digest):
+        """Return the uncompressed bytes of a blob"""
+        with open(self.path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+
+    def get_text(self, digest):
+        return self.get(digest).decode("utf-8")
+
+    def size(self, digest):
+        """Compressed size of a blob on disk"""
+        return os.path.getsize(self.path(digest))
+
+    def delete(self, digest):
+        try:
+            os.remove(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def __iter__(self):
+        """Yield the digest of every stored blob"""
+        for prefix in os.listdir(self.root):
+            folder = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.startswith(".tmp-"):
+                    yield name
@@ -0,0 +1,193 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:  # optional; /proc is read instead on Linux
+    psutil = None
+
+
+def browser_memory_mb(driver):
+    """Resident memory of a WebDriver's browser process tree in MB
+
+    The tree is rooted at the driver service (geckodriver) so Firefox and
+    its content processes are included. Returns None when it cannot be
+    measured (no service process, or neither psutil nor /proc available).
+    """
+    process = getattr(getattr(driver, "service", None), "process", None)
+    pid = getattr(process, "pid", None)
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [root] + root.children(recursive=True)) / (1024 * 1024)
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+    return _proc_tree_rss(pid) / (1024 * 1024)
+
+
+def _proc_tree_rss(root):
+    """Sum the RSS in bytes of a process and its descendants from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                # The command name may contain spaces; fields resume after ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [root]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            pass
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+class BrowserLifecycle:
+    """When to replace a worker's browser, and a warm standby to replace it with
+
+    Site-level errors (timeouts, unreachable .onion services) leave the
+    browser alone; the pool only replaces it after a driver failure, after
+    ``max_pages`` pages, or once its process tree uses more than
+    ``max_memory_mb`` (checked every ``memory_check_every`` pages).
+
+    With ``standby`` one browser is started in the background as soon as the
+    pool first uses a browser (``first_use``), and again whenever ``replace``
+    consumes it, so a replacement swaps in an already running
+    Firefox instead of launching one on the fetch path; the retired browser
+    is closed in the background too.
+
+    ``create()`` returns a new, unstarted browser handle (whatever the pool
+    uses), ``start(handle)`` launches its browser and ``dispose(handle)``
+    closes it.
+    """
+
+    def __init__(self, create, start, dispose, max_pages=None, max_memory_mb=None, memory_check_every=10,
+                 standby=True):
+        self.create = create
+        self.start = start
+        self.dispose = dispose
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = max(1, int(memory_check_every))
+        self.standby = standby
+        self.restarts = Counter()
+        self.warm_swaps = 0
+        self.cold_swaps = 0
+        self._standby = None
+        self._used = False
+        self._closed = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="browser-lifecycle")
+
+    @classmethod
+    def from_dict(cls, settings, create, start, dispose):
+        settings = settings or {}
+        return cls(
+            create, start, dispose,
+            max_pages=settings.get("max_pages"),
+            max_memory_mb=settings.get("max_memory_mb"),
+            memory_check_every=settings.get("memory_check_every", 10),
+            standby=settings.get("standby", True),
+        )
+
+    def ensure_standby(self):
+        """Start warming a standby browser if there is none"""
+        if not self.standby:
+            return
+        with self._lock:
+            if self._standby is None and not self._closed:
+                self._standby = self._executor.submit(self._warm)
+
+    def first_use(self):
+        """Warm the first standby the first time a browser is used (later calls do nothing)"""
+        with self._lock:
+            if self._used:
+                return
+            self._used = True
+        self.ensure_standby()
+
+    def _warm(self):
+        handle = self.create()
+        self.start(handle)
+        return handle
+
+    def retire_reason(self, driver, pages):
+        """Why a healthy browser that has served ``pages`` pages should be replaced (None to keep it)"""
+        if self.max_pages and pages >= self.max_pages:
+            return "max_pages"
+        if self.max_memory_mb and pages % self.memory_check_every == 0:
+            memory = browser_memory_mb(driver)
+            if memory is not None and memory > self.max_memory_mb:
+                return "memory"
+        return None
+
+    def replace(self, handle, reason):
+        """Retire a browser handle and return its replacement
+
+        The standby is used when one was started (waiting for it if it is
+        still launching, which is never slower than a cold start); otherwise
+        a new unstarted handle is returned. A new standby is then warmed.
+        """
+        self._executor.submit(self._dispose_quietly, handle)
+        with self._lock:
+            self.restarts[reason] += 1
+            future, self._standby = self._standby, None
+        replacement = None
+        if future is not None:
+            try:
+                replacement = future.result()
+            except Exception:
+                replacement = None
+        warm = replacement is not None
+        if not warm:
+            replacement = self.create()
+        # Several fetch threads can replace browsers at once
+        with self._lock:
+            if warm:
+                self.warm_swaps += 1
+            else:
+                self.cold_swaps += 1
+        self.ensure_standby()
+        return replacement
+
+    def _dispose_quietly(self, handle):
+        try:
+            self.dispose(handle)
+        except Exception:
+            pass
+
+    def report(self):
+        with self._lock:
+            return {
+                "restarts": dict(self.restarts),
+                "warm_swaps": self.warm_swaps,
+                "cold_swaps": self.cold_swaps,
+            }
+
+    def close(self):
+        """Close the standby browser and wait for retired ones to close"""
+        with self._lock:
+            self._closed = True
+            future, self._standby = self._standby, None
+        if future is not None:
+            try:
+                self._dispose_quietly(future.result())
+            except Exception:
+                pass
+        self._executor.shutdown(wait=True)
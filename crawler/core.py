@@ -1,35 +1,92 @@
 import requests
-from bs4 import BeautifulSoup
-import time
 import random
 import json
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from .tor_manager import TorManager
-from .selenium_fetcher import fetch_full_content
+from .fetch_pool import FetcherPool
+from .selenium_fetcher import SeleniumFetcher
+from .http_fetcher import TierStats
+from .result_sink import JsonlResultSink
+from .result_shards import ShardedResultSink
+from .html_store import HtmlStore
+from .options import CrawlOptions
+from .search_index import SearchIndex
+from .frontier import CrawlFrontier, PriorityScorer
+from .scope import CrawlScope
+from .crawl_state import CrawlStateStore, DONE, ERROR
+from .pipeline import ParseStage
+from .page_cache import PageCache
+from .urls import UrlCanonicalizer, DEFAULT_STRIP_PARAMS
+from .dedup import NearDuplicateIndex
+from .visited import ExactVisitedSet, create_visited_set
+from .metrics import CrawlMetrics
+from concurrent.futures import wait, FIRST_COMPLETED
+import logging
 import os
+import time
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class DarkWebCrawler:
-    def __init__(self):
-        self.tor = TorManager()
-        self.visited = set()
+    # Builds each fetch worker's browser fetcher; the benchmarks swap in a stand-in
+    fetcher_factory = SeleniumFetcher
+
+    def __init__(self, output_dir=None, tor=None, run_id=None, output_format="json", shard_options=None,
+                 html_store=None, search_index=None):
+        self.tor = tor or TorManager.from_config()
+        self.visited = ExactVisitedSet()
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; rv:91.0) Gecko/20100101 Firefox/91.0",
             "TorBrowser/11.0.1",
             "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.93 Safari/537.36"
         ]
         self.session = self._create_session()
+        self.tier_stats = TierStats()
         # Create the output directory if it doesn't exist
-        self.output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "outputs", "scraped_data")
+        self.output_dir = output_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "outputs", "scraped_data")
         os.makedirs(self.output_dir, exist_ok=True)
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # The run id names every output file; resuming a run reuses them
+        self.timestamp = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_id = self.timestamp
         self.results_file = os.path.join(self.output_dir, f"results_{self.timestamp}.json")
-        self.incremental_file = os.path.join(self.output_dir, f"incremental_{self.timestamp}.json")
+        self.output_format = output_format
+        if output_format == "shards":
+            # The shard directory is both the incremental and the final output
+            self.incremental_file = os.path.join(self.output_dir, f"results_{self.timestamp}.shards")
+        elif output_format == "json":
+            self.incremental_file = os.path.join(self.output_dir, f"incremental_{self.timestamp}.jsonl")
+        else:
+            raise ValueError(f"output_format must be 'json' or 'shards', not {output_format!r}")
+        self.state_file = os.path.join(self.output_dir, f"state_{self.timestamp}.sqlite")
+        self.metrics_file = os.path.join(self.output_dir, f"metrics_{self.timestamp}.json")
+        self.metrics_prom_file = os.path.join(self.output_dir, f"metrics_{self.timestamp}.prom")
+        if run_id and not os.path.exists(self.state_file):
+            raise FileNotFoundError(f"No saved crawl state for run {run_id} ({self.state_file})")
+        if output_format == "shards":
+            self.sink = ShardedResultSink(self.incremental_file, **(shard_options or {}))
+        else:
+            self.sink = JsonlResultSink(self.incremental_file)
+        self.state = CrawlStateStore(self.state_file)
+        self.page_cache = None
+        # Page HTML goes to a shared deduplicated store instead of every record
+        self.html_store = HtmlStore.from_dict(html_store, self.output_dir)
+        # Cross-run full-text index, fed as pages finish
+        self.search_index = SearchIndex.from_dict(search_index, self.output_dir)
+        self.metrics = CrawlMetrics()
+        self.browser_report = None
+        self.parse_report = None
+        self.saved_before_resume = set()
+        self._configure_dedup()
         
     def _create_session(self):
-        """Create a fresh requests session with Tor proxy"""
+        """Create a fresh requests session with Tor proxy
+
+        Workers pass per-request proxies for the Tor instance they pick; the
+        session default is the first configured instance.
+        """
         session = requests.Session()
-        session.proxies = {'http': 'socks5h://127.0.0.1:9050', 'https': 'socks5h://127.0.0.1:9050'}
+        session.proxies = dict(self.tor.primary.proxies)
         session.headers.update({
             'User-Agent': random.choice(self.user_agents),
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
@@ -37,298 +94,454 @@ class DarkWebCrawler:
         return session
 
     def _save_incremental_result(self, page_data):
-        """Save incremental result after each successful page crawl"""
+        """Append a page record to the incremental results file
+
+        With an HTML store the record keeps only the ``html_sha256``
+        reference; the in-memory page keeps its HTML and gets the reference.
+        """
         try:
-            # First, load any existing data 
-            if os.path.exists(self.incremental_file) and os.path.getsize(self.incremental_file) > 0:
-                with open(self.incremental_file, 'r', encoding='utf-8') as f:
-                    try:
-                        data = json.load(f)
-                    except json.JSONDecodeError:
-                        data = []
-            else:
-                data = []
-                
-            # Add new page data
-            data.append(page_data)
-            
-            # Save back to file
-            with open(self.incremental_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
-            
-            print(f"💾 Saved incremental result to {self.incremental_file}")
+            record = page_data
+            if self.html_store:
+                record = self.html_store.detach(page_data)
+                if "html_sha256" in record:
+                    page_data["html_sha256"] = record["html_sha256"]
+            self.sink.write(record)
+            logger.debug("Saved incremental result to %s", self.incremental_file)
         except Exception as e:
-            print(f"⚠️ Error saving incremental result: {str(e)}")
+            logger.error("Error saving incremental result: %s", e)
+            return
+        if self.search_index:
+            try:
+                with self.metrics.timer("index"):
+                    self.search_index.add(record, self.run_id)
+            except Exception as e:
+                logger.error("Error indexing %s: %s", page_data.get("url"), e)
     
-    def crawl(self, start_urls, max_pages=10, depth=1):
-        """Crawl dark web sites using Selenium with Tor proxy"""
+    def _create_visited_set(self, options):
+        """Build the frontier's visited set from the visited settings"""
+        options = dict(options or {})
+        backend = options.pop("backend", "exact")
+        if backend == "sqlite":
+            options.setdefault("path", os.path.join(self.output_dir, f"visited_{self.run_id}.sqlite"))
+        self.visited = create_visited_set(backend, **options)
+        logger.info("Visited set: %s", backend)
+        return self.visited
+
+    @staticmethod
+    def _host_delays(site_options):
+        """Per-host politeness delays from the ``delay`` key of site_options"""
+        return {host: options["delay"] for host, options in (site_options or {}).items()
+                if isinstance(options, dict) and "delay" in options}
+
+    def _restore_settings(self, start_urls, options):
+        """Return (start_urls, options) with a resumed run's saved settings
+
+        A resumed run keeps the seeds, page budget, depth and scope it was
+        started with; differing values passed in are reported and ignored.
+        """
+        if self.state.is_empty():
+            return start_urls, options
+        saved = self.state.get_meta()
+        current = {"start_urls": list(start_urls), "max_pages": options.max_pages, "depth": options.depth,
+                   "scope": options.scope}
+        for key, value in saved.items():
+            if key in current and current[key] != value:
+                logger.warning("Resuming run %s with its saved %s %r (ignoring %r)", self.run_id, key, value,
+                               current[key])
+        restored = {key: saved[key] for key in ("max_pages", "depth", "scope") if key in saved}
+        return saved.get("start_urls", start_urls), options.replace(**restored)
+
+    def _init_frontier(self, start_urls, options):
+        """Return (frontier, pages already crawled), restoring a saved run if there is one
+
+        Also sets up ``self.scope`` for the run's ``depth`` and scope settings.
+        """
+        seen = self._create_visited_set(options.visited)
+        seeds = list(dict.fromkeys(self.canonicalize(url) for url in start_urls))
+        self.scope = CrawlScope.from_dict(options.scope, seeds, options.depth)
+        scheduling = {
+            "delay": options.delay,
+            "host_delays": self._host_delays(options.site_options),
+            "scorer": PriorityScorer.from_dict(options.priority, seeds),
+        }
+        if not self.state.is_empty():
+            queued, seen_urls, finished = self.state.load()
+            logger.info("Resuming run %s: %d pages done, %d URLs queued", self.run_id, finished, len(queued))
+            # A page whose record was written just before the run stopped is
+            # fetched again for its links but not written twice
+            queued_urls = {url for url, _ in queued}
+            self.saved_before_resume = {record.get("url") for record in self.sink.iter_records(fields=["url"])
+                                        if record.get("url") in queued_urls}
+            self.scope.restore(*self.state.scope_counts())
+            return CrawlFrontier.restore(queued, seen_urls, seen=seen, **scheduling), finished
+        
+        frontier = CrawlFrontier(seeds, seen=seen, **scheduling)
+        self.state.add_urls([(url, 0, url) for url in seeds])
+        self.state.set_meta(start_urls=list(start_urls), max_pages=options.max_pages, depth=options.depth,
+                            scope=options.scope)
+        return frontier, 0
+
+    def _configure_dedup(self, options=None):
+        """Set up URL canonicalization and near-duplicate detection from the dedup settings"""
+        options = options or {}
+        self.canonicalize = UrlCanonicalizer(options.get("strip_params", DEFAULT_STRIP_PARAMS))
+        self.near_duplicates = (NearDuplicateIndex(options.get("max_distance", 3), options.get("cross_host_only", True))
+                                if options.get("near_duplicates", True) else None)
+        self.expand_duplicates = options.get("expand_duplicates", False)
+        self.dedup_stats = {"canonical_duplicates": 0, "duplicate_pages": 0, "links_suppressed": 0}
+
+    def _open_page_cache(self, options):
+        """Open the cross-run page cache described by the page_cache settings"""
+        options = options or {}
+        if not options.get("enabled", False):
+            return None
+        root = options.get("path") or os.path.join(self.output_dir, "page_cache")
+        # Share the HTML store's blobs so each body is written once for both
+        self.page_cache = PageCache(root, ttl=options.get("ttl", 86400),
+                                    max_bytes=int(options.get("max_mb", 512) * 1024 * 1024),
+                                    shared=self.html_store)
+        logger.info("Page cache: %s (TTL %ss)", root, self.page_cache.ttl)
+        return self.page_cache
+
+    def _start_metrics(self, options):
+        """Start flushing metrics to the run's metrics files per the metrics settings"""
+        options = options or {}
+        self.metrics = CrawlMetrics()
+        if not options.get("enabled", True):
+            return
+        prom_file = self.metrics_prom_file if options.get("prometheus", True) else None
+        self.metrics.start(self.metrics_file, prom_file, interval=options.get("interval", 10.0))
+        logger.info("Writing metrics to %s every %ss", self.metrics_file, options.get("interval", 10.0))
+
+    def _update_gauges(self, frontier, in_flight, parse_pending, pages_crawled):
+        metrics = self.metrics
+        metrics.set_gauge("frontier_size", len(frontier))
+        metrics.set_gauge("in_flight_fetches", in_flight)
+        metrics.set_gauge("parse_pending", parse_pending)
+        metrics.set_gauge("pages_crawled", pages_crawled)
+
+    def _fetch_failed(self, url, page_data):
+        """Record a page that could not be fetched"""
+        logger.warning("Error retrieving %s: %s", url, page_data["error"])
+        self.metrics.record_page(page_data)
+        self.scope.release(url)
+        self._checkpoint(url, ERROR, error=page_data["error"])
+
+    def _checkpoint(self, url, status, new_entries=(), error=None):
+        """Persist a finished page and the links it queued"""
+        try:
+            with self.metrics.timer("checkpoint"):
+                self.state.checkpoint(url, status, new_entries, error)
+        except Exception as e:
+            logger.error("Error checkpointing crawl state: %s", e)
+
+    def crawl(self, start_urls, options=None, **overrides):
+        """Crawl dark web sites over Tor, fetching with requests and Firefox
+
+        ``options`` is a CrawlOptions (keyword ``overrides`` replace single
+        options). A pool of fetch workers takes URLs from the frontier,
+        which orders them by priority and keeps each host to its politeness
+        delay and concurrency limit. In "tiered" mode a page is fetched over
+        HTTP first and only rendered in Firefox when it appears to need it.
+        Fetched HTML is parsed in a separate worker pool; links found on a
+        page are canonicalized and queued within the depth and scope limits,
+        unless the page nearly duplicates one crawled earlier.
+
+        Each record is written to the result sink as soon as its page is
+        parsed, and progress is checkpointed to the run's state file, so a
+        crawl created with the same ``run_id`` continues where it stopped.
+        Records are not kept in memory; read them back from the sink (see
+        ``result_stats`` and ``save_results``). Returns the number of
+        records written by this call.
+        """
         if not start_urls:
-            return []
+            return 0
         
-        results = []
-        visited = set()
-        to_visit = list(start_urls)
-        pages_crawled = 0
+        options = (options or CrawlOptions()).replace(**overrides)
+        start_urls, options = self._restore_settings(start_urls, options)
+        max_pages = options.max_pages
+        self._configure_dedup(options.dedup)
+        frontier, pages_crawled = self._init_frontier(start_urls, options)
+        self.frontier = frontier
+        self._start_metrics(options.metrics)
         
-        # Create initial incremental results file
-        with open(self.incremental_file, 'w', encoding='utf-8') as f:
-            json.dump([], f)
-        print(f"💾 Created incremental results file: {self.incremental_file}")
+        pool = FetcherPool(size=options.workers, per_host_limit=options.per_host_limit,
+                           fetcher_factory=self.fetcher_factory, session_factory=self._create_session,
+                           fetch_mode=options.fetch_mode, site_options=options.site_options,
+                           tier_stats=self.tier_stats, tor=self.tor, browser_options=options.browser_options,
+                           cache=self._open_page_cache(options.page_cache), lifecycle=options.browser_lifecycle)
+        parser = ParseStage(workers=options.parse_workers, executor=options.parse_executor or "process")
+        logger.info("Fetch workers: %d (max %d per host, %s mode)", pool.size, pool.per_host_limit, pool.fetch_mode)
+        logger.info("Parse workers: %d (%s pool, up to %d pages queued)", parser.workers, parser.kind,
+                    parser.max_pending)
         
-        while to_visit and pages_crawled < max_pages:
-            url = to_visit.pop(0)
-            if url in visited:
-                continue
+        # Open the append-only incremental results file
+        self.sink.open()
+        written_before = self.sink.records_written
+        logger.info("Writing incremental results to %s", self.incremental_file)
+        try:
+            while pool.in_flight or parser.pending or (frontier and pages_crawled < max_pages):
+                # Hand entries from ready hosts to idle workers, skipping hosts
+                # at their concurrency cap. Stop fetching ahead while the
+                # parsers are backed up.
+                while (frontier and pool.has_capacity() and parser.has_capacity() and
+                       pages_crawled + pool.in_flight < max_pages):
+                    entry = frontier.pop(host_ok=pool.host_available)
+                    if entry is None:
+                        break
+                    logger.info("Crawling: %s", entry[0])
+                    pool.submit(entry)
                 
-            visited.add(url)
-            
-            print(f"🌐 Crawling: {url}")
-            page_data = fetch_full_content(url)
-            pages_crawled += 1
-            
-            if "error" in page_data:
-                print(f"🚫 Error retrieving {url}: {page_data['error']}")
-            else:
-                print(f"✅ {pages_crawled}/{max_pages} - {url}")
+                self._update_gauges(frontier, pool.in_flight, parser.pending, pages_crawled)
                 
-                # Process the page to extract links and content
-                try:
-                    soup = BeautifulSoup(page_data["html"], "html.parser")
-                    
-                    # Extract links if we're not at max depth
-                    if depth > 1:
-                        links = []
-                        for a_tag in soup.find_all("a", href=True):
-                            href = a_tag["href"]
-                            if href.startswith("http") and ".onion" in href and href not in visited and href not in to_visit:
-                                links.append(href)
-                                if depth > 0:  # Only add to crawl queue if we're not at max depth
-                                    to_visit.append(href)
-                        page_data["links"] = links
-                    
-                    # Extract more content types for better analysis
-                    headings = [h.text for h in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"])]
-                    paragraphs = [p.text for p in soup.find_all("p")]
-                    tables = [t.text for t in soup.find_all("table")]
-                    forms = [f.text for f in soup.find_all("form")]
-                    images = [img.get("src", "") for img in soup.find_all("img")]
-                    
-                    # Find hidden elements that were made visible
-                    hidden_elements = []
-                    for elem in soup.find_all(class_=lambda c: c and ("hidden" in c or "collapsed" in c)):
-                        hidden_elements.append(elem.text)
-                    
-                    page_data["headings"] = headings
-                    page_data["paragraphs"] = paragraphs
-                    page_data["tables"] = tables
-                    page_data["forms"] = forms
-                    page_data["images"] = images
-                    page_data["hidden_content"] = hidden_elements
-                    page_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    # Save incremental result
-                    self._save_incremental_result(page_data)
-                    
-                    results.append(page_data)
-                except Exception as e:
-                    print(f"⚠️ Error parsing {url}: {str(e)}")
-                    page_data["parse_error"] = str(e)
-                    results.append(page_data)
-            
-            # Sleep briefly to avoid overloading Tor circuits
-            time.sleep(2)
-            
-            # Rotate Tor circuit if configured (requires stem)
-            try:
-                from stem import Signal
-                from stem.control import Controller
+                # Wake up when work finishes or the next host's delay is over
+                pending = pool.futures() + parser.futures()
+                ready_in = frontier.next_ready_in() if pool.has_capacity() else None
+                if not pending:
+                    time.sleep(ready_in or 0)
+                    continue
+                done, _ = wait(pending, timeout=ready_in or None, return_when=FIRST_COMPLETED)
                 
-                with Controller.from_port(port=9051) as controller:
-                    controller.authenticate()
-                    controller.signal(Signal.NEWNYM)
-                    print("🔄 Rotated Tor circuit for fresh connection")
-            except Exception as e:
-                print(f"⚠️ Circuit rotation failed: {str(e)}")
+                for entry, page_data in pool.collect(done):
+                    frontier.mark_fetched(entry[0])
+                    self.scope.record_fetch(entry[1])
+                    pages_crawled += 1
+                    logger.info("%d/%d pages fetched", pages_crawled, max_pages)
+                    if "error" in page_data:
+                        self._fetch_failed(entry[0], page_data)
+                    else:
+                        parser.submit(entry, page_data)
+                
+                for entry, page_data, fields, error in parser.collect(done):
+                    self._process_page(entry, page_data, fields, error, frontier)
+        finally:
+            pool.close()
+            self.browser_report = pool.lifecycle.report()
+            for reason, count in self.browser_report["restarts"].items():
+                self.metrics.increment("browser_restarts", count, reason=reason)
+            parser.close()
+            self.parse_report = parser.stats()
+            self.tor.close()
+            self.sink.close()
+            if self.search_index:
+                self.search_index.commit()
+            self.state.close()
+            self.visited.close()
+            if self.page_cache:
+                self.page_cache.close()
+            self._update_gauges(frontier, 0, 0, pages_crawled)
+            self.metrics.stop()
+        
+        self._log_crawl_stats(frontier)
+        return self.sink.records_written - written_before
+
+    def _log_crawl_stats(self, frontier):
+        """Log frontier, fetch-tier and stage statistics at the end of a crawl"""
+        stats = frontier.stats()
+        logger.info("Frontier: %d queued on %d hosts, %d seen, dedupe hit rate %.1f%%", stats["queue_length"],
+                    stats["queued_hosts"], stats["seen_urls"], stats["dedupe_hit_rate"] * 100)
+        for tier, tier_stats in self.tier_stats.report()["tiers"].items():
+            logger.info("%s tier: %d pages served (%.1f%%), avg %.2fs per attempt, %.1f MB transferred", tier,
+                        tier_stats["served"], tier_stats["hit_rate"] * 100, tier_stats["avg_latency"],
+                        tier_stats["transfer_bytes"] / (1024 * 1024))
+        scope = self.scope.report()
+        levels = ", ".join(f"depth {level}: {count}" for level, count in scope["pages_per_depth"].items())
+        skipped = ", ".join(f"{count} {reason}" for reason, count in scope["links_skipped"].items()) or "none"
+        logger.info("Pages per depth (limit %d): %s; links not followed: %s", scope["depth_limit"], levels or "none",
+                    skipped)
+        dedup = self.dedup_report()
+        logger.info("Dedup: %d fetches avoided (%d canonical URL duplicates, %d near-duplicate pages with %d links "
+                    "not followed)", dedup["fetches_avoided"], dedup["canonical_duplicates"],
+                    dedup["duplicate_pages"], dedup["links_suppressed"])
+        if self.parse_report:
+            parse = self.parse_report
+            logger.info("Parsing: %d pages parsed, %d failed in %d %s workers (at most %d of %d queued)",
+                        parse["parsed"], parse["failed"], parse["workers"], parse["executor"],
+                        parse["max_seen_pending"], parse["max_pending"])
+        if self.html_store:
+            store = self.html_store.stats()
+            logger.info("HTML store: %d bodies written, %d duplicates referenced (%.1f MB of HTML)", store["stored"],
+                        store["deduplicated"], store["html_bytes"] / (1024 * 1024))
+        if self.search_index:
+            index = self.search_index.stats()
+            logger.info("Search index: %d pages added this run; %d pages from %d runs on %d hosts in %s",
+                        self.search_index.added, index["pages"], index["runs"], index["hosts"],
+                        self.search_index.path)
+        if self.browser_report and self.browser_report["restarts"]:
+            restarts = ", ".join(f"{count} {reason.replace('_', ' ')}" for reason, count
+                                 in self.browser_report["restarts"].items())
+            logger.info("Browser restarts: %s (%d from the warm standby)", restarts, self.browser_report["warm_swaps"])
+        if self.page_cache:
+            cache = self.page_cache.stats()
+            logger.info("Page cache: %d hits, %d misses, %d revalidated (304), %d entries", cache["hits"],
+                        cache["misses"], cache["revalidated"], cache["entries"])
+        for stage, latency in self.metrics.summary()["stages"].items():
+            logger.info("Stage %s: p50 %.3fs, p95 %.3fs, max %.3fs (%d samples)", stage, latency["p50"],
+                        latency["p95"], latency["max"], latency["count"])
+        if len(self.tor.endpoints) > 1:
+            for endpoint in self.tor.stats():
+                latency = f"{endpoint['latency']:.2f}s" if endpoint['latency'] is not None else "n/a"
+                logger.info("Tor %s: %d requests, %d errors, latency %s, %d rotations", endpoint["endpoint"],
+                            endpoint["requests"], endpoint["errors"], latency, endpoint["rotations"])
+
+    def _process_page(self, entry, page_data, fields, error, frontier):
+        """Merge a parsed page, enqueue its links and save the record"""
+        url, url_depth = entry
+        logger.debug("Parsed %s", url)
+        
+        new_entries = []
+        if error is None:
+            new_entries = self._apply_fields(page_data, url_depth, fields, frontier)
+        else:
+            logger.warning("Error parsing %s: %s", url, error)
+            page_data["parse_error"] = str(error)
+            self.metrics.increment("errors", type="parse")
+        self.metrics.record_page(page_data)
         
-        return results
+        # Save incremental result, then record the page as done
+        self.scope.release(url)
+        if url in self.saved_before_resume:
+            self.saved_before_resume.discard(url)
+        else:
+            with self.metrics.timer("write_result"):
+                self._save_incremental_result(page_data)
+        self._checkpoint(url, DONE, new_entries, page_data.get("parse_error"))
+
+    def _apply_fields(self, page_data, url_depth, fields, frontier):
+        """Merge extracted fields into page_data and enqueue new .onion links
+
+        Links are canonicalized before they are queued and only followed
+        within the crawl scope (depth, same-host, seed budget and per-page
+        limits). Links of a page that nearly duplicates an earlier one are
+        not followed unless ``expand_duplicates`` is set. Returns the
+        (url, depth, seed) entries that were newly added to the frontier.
+        """
+        # Keep the rendered browser title when there is one
+        if page_data.get("title"):
+            fields.pop("title")
+        page_data.update(fields)
+        page_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        page_data["depth"] = url_depth
+        
+        duplicate_of = None
+        if self.near_duplicates and fields.get("simhash"):
+            duplicate_of = self.near_duplicates.check(int(fields["simhash"], 16), page_data["url"])
+            if duplicate_of:
+                page_data["near_duplicate_of"] = duplicate_of
+                self.dedup_stats["duplicate_pages"] += 1
         
-    def save_results(self, results, output_file=None):
-        """Save crawl results to a JSON file"""
+        scope = self.scope
+        expand = scope.expands(url_depth)
+        seed = scope.origin(page_data["url"])
+        added = []
+        for link in fields["links"]:
+            parsed = urlparse(link["url"])
+            if not (parsed.scheme in ("http", "https") and parsed.hostname and parsed.hostname.endswith(".onion")):
+                continue
+            url = self.canonicalize(link["url"])
+            if not expand:
+                reason = "depth_limit"
+            elif duplicate_of and not self.expand_duplicates:
+                reason = "near_duplicate"
+            elif scope.max_links_per_page and len(added) >= scope.max_links_per_page:
+                reason = "page_link_limit"
+            else:
+                reason = scope.rejects(url, seed, page_data["url"])
+            if reason:
+                if not frontier.is_seen(url):
+                    if reason == "near_duplicate":
+                        self.dedup_stats["links_suppressed"] += 1
+                    else:
+                        scope.skipped[reason] += 1
+                continue
+            if frontier.add(url, url_depth + 1, link.get("text", "")):
+                scope.admit(url, seed)
+                added.append((url, url_depth + 1, seed))
+            elif url != link["url"]:
+                self.dedup_stats["canonical_duplicates"] += 1
+        return added
+
+    def dedup_report(self):
+        """Fetches avoided by canonicalization and near-duplicate suppression"""
+        report = dict(self.dedup_stats)
+        if self.near_duplicates:
+            report["pages_fingerprinted"] = self.near_duplicates.checked
+        report["fetches_avoided"] = report["canonical_duplicates"] + report["links_suppressed"]
+        return report
+
+    def result_stats(self):
+        """Page, link and hidden-element counts of every saved record
+
+        Records are streamed from the result sink one at a time, so this
+        covers a resumed run's earlier pages too.
+        """
+        stats = {"total_pages_crawled": 0, "total_links_found": 0, "hidden_elements_found": 0,
+                 "content_size_bytes": 0, "timestamp": self.timestamp}
+        for record in self.sink.iter_records():
+            stats["total_pages_crawled"] += 1
+            stats["total_links_found"] += len(record.get("links", []))
+            stats["hidden_elements_found"] += len(record.get("hidden_content", []))
+            stats["content_size_bytes"] += len(json.dumps(record, ensure_ascii=False))
+        return stats
+
+    def save_results(self, results=None, output_file=None):
+        """Save crawl results to a JSON file
+
+        When no results list is given the combined file is streamed from the
+        incremental results file, so the whole run never has to be held in
+        memory. With the "shards" output format the shard directory already
+        is the result and is returned instead; the summary only reads its
+        URL and error fields.
+        """
         if not output_file:
             output_file = self.results_file
+        summary_file = output_file.replace(".json", "_summary.json")
         
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2)
+        if results is None and self.output_format == "shards":
+            self.sink.finalize()
+            output_file = self.incremental_file
+            records = self.sink.iter_records(fields=("url", "error"))
+        elif results is None:
+            self.sink.close()
+            self.sink.finalize(output_file)
+            records = self.sink.iter_records()
+        else:
+            if self.html_store:
+                results = [self.html_store.detach(page) for page in results]
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            records = results
             
-        print(f"✅ Results saved to {output_file}")
+        logger.info("Results saved to %s", output_file)
         
         # Also save a summary file with stats
+        urls_crawled = []
+        error_pages = 0
+        for page in records:
+            urls_crawled.append(page.get("url", "unknown"))
+            if "error" in page:
+                error_pages += 1
+        
         stats = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_pages": len(results),
-            "urls_crawled": [page.get("url", "unknown") for page in results],
-            "successful_pages": len([page for page in results if "error" not in page]),
-            "error_pages": len([page for page in results if "error" in page])
+            "run_id": self.run_id,
+            "total_pages": len(urls_crawled),
+            "urls_crawled": urls_crawled,
+            "successful_pages": len(urls_crawled) - error_pages,
+            "error_pages": error_pages,
+            "fetch_tiers": self.tier_stats.report(),
+            "tor_instances": self.tor.stats(),
+            "page_cache": self.page_cache.stats() if self.page_cache else None,
+            "html_store": self.html_store.stats() if self.html_store else None,
+            "browsers": self.browser_report,
+            "parsing": self.parse_report,
+            "dedup": self.dedup_report(),
+            "scope": self.scope.report() if hasattr(self, "scope") else None,
+            "metrics": self.metrics.summary()
         }
         
-        summary_file = output_file.replace(".json", "_summary.json")
         with open(summary_file, "w", encoding="utf-8") as f:
             json.dump(stats, f, indent=2)
             
-        print(f"📊 Summary saved to {summary_file}")
+        logger.info("Summary saved to %s", summary_file)
         return output_file
-
-    def _extract_data(self, url, soup, page_data):
-        """Extract comprehensive page data"""
-        # Base data
-        data = {
-            'url': url,
-            'title': soup.title.string.strip() if soup.title else "No title",
-            'timestamp': time.time(),
-            'full_text': page_data.get('text', ''),
-        }
-        
-        # Extract all content by section types
-        data['headings'] = self._extract_headings(soup)
-        data['paragraphs'] = self._extract_paragraphs(soup)
-        data['lists'] = self._extract_lists(soup)
-        data['tables'] = self._extract_tables(soup)
-        data['forms'] = self._extract_forms(soup)
-        data['images'] = self._extract_images(url, soup)
-        data['links'] = self._extract_links(url, soup)
-        data['hidden_content'] = self._extract_hidden_elements(soup)
-        
-        return data
-    
-    def _extract_headings(self, soup):
-        """Extract all headings"""
-        headings = []
-        for level in range(1, 7):
-            for heading in soup.find_all(f'h{level}'):
-                headings.append({
-                    'level': level,
-                    'text': heading.get_text(strip=True)
-                })
-        return headings
-    
-    def _extract_paragraphs(self, soup):
-        """Extract all paragraphs"""
-        return [p.get_text(strip=True) for p in soup.find_all('p')]
-    
-    def _extract_lists(self, soup):
-        """Extract all lists"""
-        lists = []
-        for list_elem in soup.find_all(['ul', 'ol']):
-            items = [li.get_text(strip=True) for li in list_elem.find_all('li')]
-            lists.append({
-                'type': list_elem.name,
-                'items': items
-            })
-        return lists
-    
-    def _extract_tables(self, soup):
-        """Extract all tables"""
-        tables = []
-        for table in soup.find_all('table'):
-            rows = []
-            for tr in table.find_all('tr'):
-                cells = [td.get_text(strip=True) for td in tr.find_all(['td', 'th'])]
-                if cells:
-                    rows.append(cells)
-            if rows:
-                tables.append(rows)
-        return tables
-    
-    def _extract_forms(self, soup):
-        """Extract all forms and their fields"""
-        forms = []
-        for form in soup.find_all('form'):
-            fields = []
-            for field in form.find_all(['input', 'textarea', 'select']):
-                field_data = {
-                    'type': field.name,
-                    'name': field.get('name', ''),
-                    'id': field.get('id', ''),
-                }
-                if field.name == 'input':
-                    field_data['input_type'] = field.get('type', 'text')
-                fields.append(field_data)
-            
-            forms.append({
-                'action': form.get('action', ''),
-                'method': form.get('method', 'get'),
-                'fields': fields
-            })
-        return forms
-    
-    def _extract_images(self, base_url, soup):
-        """Extract all images"""
-        images = []
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            if src:
-                images.append({
-                    'src': urljoin(base_url, src),
-                    'alt': img.get('alt', ''),
-                })
-        return images
-    
-    def _extract_links(self, base_url, soup):
-        """Extract all links with text"""
-        links = []
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            if href:
-                links.append({
-                    'url': urljoin(base_url, href),
-                    'text': link.get_text(strip=True)
-                })
-        return links
-    
-    def _extract_hidden_elements(self, soup):
-        """Extract content from hidden elements"""
-        hidden_elements = []
-        
-        # Find elements with display:none or visibility:hidden
-        for elem in soup.find_all(style=True):
-            style = elem.get('style', '').lower()
-            if 'display:none' in style or 'visibility:hidden' in style:
-                hidden_elements.append({
-                    'tag': elem.name,
-                    'content': elem.get_text(strip=True),
-                    'html': str(elem)
-                })
-        
-        # Find elements with hidden class
-        for elem in soup.find_all(class_=True):
-            classes = elem.get('class', [])
-            if 'hidden' in classes or 'hide' in classes:
-                hidden_elements.append({
-                    'tag': elem.name,
-                    'content': elem.get_text(strip=True),
-                    'html': str(elem)
-                })
-                
-        return hidden_elements
-
-    def _find_all_links(self, base_url, soup):
-        """Find all links on page, including .onion and regular URLs"""
-        new_links = set()
-        for link in soup.find_all('a', href=True):
-            try:
-                href = link['href'].strip()
-                if not href or href.startswith('#') or href.startswith('javascript:'):
-                    continue
-                    
-                full_url = urljoin(base_url, href)
-                parsed = urlparse(full_url)
-                
-                # Only add .onion domains or internal pages from the current domain
-                if parsed.netloc.endswith('.onion'):
-                    new_links.add(full_url)
-                elif not parsed.netloc and parsed.path:
-                    # Internal link on the same domain
-                    new_links.add(full_url)
-            except:
-                continue
-        return list(new_links) 
\ No newline at end of file
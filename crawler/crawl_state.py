@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import time
+
+# Per-URL statuses
+QUEUED = "queued"
+DONE = "done"
+ERROR = "error"
+
+
+class CrawlStateStore:
+    """Durable crawl state (frontier, visited URLs, depth, status) in SQLite
+
+    The database runs in WAL mode with synchronous=NORMAL, so the
+    checkpoint written after every page is a single small transaction
+    without an fsync per commit. A crashed or interrupted run can be resumed
+    from it: URLs that never finished are queued again in their original
+    order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                depth INTEGER NOT NULL,
+                seed TEXT,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated REAL
+            );
+            CREATE INDEX IF NOT EXISTS urls_status ON urls (status, seq);
+        """)
+        # State files written before URLs were attributed to seeds
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(urls)")]
+        if "seed" not in columns:
+            self.conn.execute("ALTER TABLE urls ADD COLUMN seed TEXT")
+        self.conn.commit()
+
+    def set_meta(self, **values):
+        """Store run settings (JSON-encoded)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()]
+            )
+
+    def get_meta(self):
+        """Run settings stored by ``set_meta``"""
+        return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM meta")}
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM urls LIMIT 1").fetchone() is None
+
+    def add_urls(self, entries):
+        """Record newly enqueued (url, depth, seed) entries"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, depth, seed, status, updated) VALUES (?, ?, ?, ?, ?)",
+                [(url, depth, seed, QUEUED, now) for url, depth, seed in entries]
+            )
+
+    def checkpoint(self, url, status, new_entries=(), error=None):
+        """Mark a page finished and record the (url, depth, seed) links it added, in one transaction"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE urls SET status = ?, error = ?, updated = ? WHERE url = ?",
+                (status, error, now, url)
+            )
+            if new_entries:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO urls (url, depth, seed, status, updated) VALUES (?, ?, ?, ?, ?)",
+                    [(entry_url, depth, seed, QUEUED, now) for entry_url, depth, seed in new_entries]
+                )
+
+    def load(self):
+        """Return (queued entries in order, every known URL, finished page count)
+
+        Known URLs are yielded lazily so very large crawls can be streamed
+        into the visited set.
+        """
+        queued = [(url, depth) for url, depth in self.conn.execute(
+            "SELECT url, depth FROM urls WHERE status = ? ORDER BY seq", (QUEUED,))]
+        seen = (url for (url,) in self.conn.execute("SELECT url FROM urls"))
+        finished = self.conn.execute(
+            "SELECT COUNT(*) FROM urls WHERE status != ?", (QUEUED,)).fetchone()[0]
+        return queued, seen, finished
+
+    def scope_counts(self):
+        """Return (seed of each queued URL, URLs per seed, finished pages per depth)"""
+        origins = dict(self.conn.execute(
+            "SELECT url, seed FROM urls WHERE status = ? AND seed IS NOT NULL", (QUEUED,)))
+        per_seed = dict(self.conn.execute(
+            "SELECT seed, COUNT(*) FROM urls WHERE seed IS NOT NULL GROUP BY seed"))
+        per_depth = dict(self.conn.execute(
+            "SELECT depth, COUNT(*) FROM urls WHERE status != ? GROUP BY depth", (QUEUED,)))
+        return origins, per_seed, per_depth
+
+    def close(self):
+        self.conn.close()
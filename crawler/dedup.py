@@ -0,0 +1,91 @@
+import hashlib
+import re
+import threading
+from urllib.parse import urlsplit
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+FINGERPRINT_BITS = 64
+
+# Per-bit counters are summed as lanes of one big integer: each 64-bit shingle
+# hash is spread so bit k lands at the bottom of lane k (one table lookup per
+# byte), and adding the spread values counts every bit position at once.
+_LANE_BITS = 20
+_MAX_SHINGLES = (1 << _LANE_BITS) - 1
+_SPREAD = [
+    [sum(1 << (_LANE_BITS * (8 * position + bit)) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+    for position in range(FINGERPRINT_BITS // 8)
+]
+
+
+def simhash(text, shingle=3):
+    """64-bit SimHash of a text over word shingles
+
+    Texts that share most of their shingles get fingerprints that differ in
+    only a few bits. Uses blake2b rather than ``hash()`` so fingerprints are
+    stable across processes and runs. Returns None for texts too short to
+    fingerprint.
+    """
+    words = _WORD_RE.findall(text.lower())
+    count = min(len(words) - shingle + 1, _MAX_SHINGLES)
+    if count < 1:
+        return None
+    lanes = 0
+    for i in range(count):
+        digest = hashlib.blake2b(" ".join(words[i:i + shingle]).encode("utf-8"), digest_size=8).digest()
+        for position, byte in enumerate(digest):
+            lanes += _SPREAD[position][byte]
+    fingerprint = 0
+    lane_mask = (1 << _LANE_BITS) - 1
+    for bit in range(FINGERPRINT_BITS):
+        # Majority vote: the bit is set in more than half of the shingles
+        if ((lanes >> (_LANE_BITS * bit)) & lane_mask) * 2 > count:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """Finds earlier pages whose SimHash is within ``max_distance`` bits
+
+    Fingerprints are split into ``max_distance + 1`` bands; two fingerprints
+    within the distance must agree exactly on at least one band, so a lookup
+    only compares against pages sharing a band instead of every page seen.
+
+    With ``cross_host_only`` a page is only matched against pages on other
+    hosts (mirrors), since pages of one site often share most of their
+    template text.
+    """
+
+    def __init__(self, max_distance=3, cross_host_only=True):
+        self.max_distance = max_distance
+        self.cross_host_only = cross_host_only
+        self.bands = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self.bands)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(self.bands)]
+
+    def check(self, fingerprint, url):
+        """Return the URL of a near-duplicate seen earlier, else index this page and return None"""
+        host = urlsplit(url).hostname if self.cross_host_only else None
+        with self._lock:
+            self.checked += 1
+            keys = self._band_keys(fingerprint)
+            for band, key in enumerate(keys):
+                for other, other_url in self._buckets[band].get(key, ()):
+                    if host and urlsplit(other_url).hostname == host:
+                        continue
+                    if bin(fingerprint ^ other).count("1") <= self.max_distance:
+                        self.duplicates += 1
+                        return other_url
+            for band, key in enumerate(keys):
+                self._buckets[band].setdefault(key, []).append((fingerprint, url))
+            return None
+
+    def stats(self):
+        return {"checked": self.checked, "near_duplicates": self.duplicates}
@@ -0,0 +1,183 @@
+from urllib.parse import urljoin
+import lxml.html
+from lxml import etree
+
+# Elements whose text is not part of the visible page body
+_SKIP_TEXT_TAGS = {"head", "script", "style", "noscript", "template"}
+_HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+_HIDDEN_CLASSES = {"hidden", "hide", "collapsed"}
+_FORM_FIELDS = {"input", "textarea", "select"}
+# Elements that start a new line of page text; everything else is inline
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd",
+    "details", "div", "dl", "dt", "fieldset", "figcaption", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "option", "p", "pre", "section", "summary", "table", "td",
+    "th", "title", "tr", "ul",
+}
+
+
+def _text(element):
+    """Element text with whitespace collapsed (like get_text(strip=True))"""
+    return " ".join(element.text_content().split())
+
+
+def _is_hidden(element):
+    style = element.get("style")
+    if style:
+        style = style.replace(" ", "").lower()
+        if "display:none" in style or "visibility:hidden" in style:
+            return True
+    classes = element.get("class")
+    return bool(classes) and not _HIDDEN_CLASSES.isdisjoint(classes.split())
+
+
+def _parse(html):
+    """Parse HTML with lxml, tolerating encoding declarations and empty input"""
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return None
+
+
+def extract_page(html, url, with_text=False):
+    """Extract every structured field from a page in one parse and one walk
+
+    Returns a dict with title, headings, paragraphs, lists, tables, forms,
+    images, links and hidden_content (plus text when ``with_text`` is set).
+    The text keeps inline elements on the same line and starts a new line
+    only at block-level elements, so "a<b>bc</b>" reads "abc".
+    Relative image and link URLs are resolved against ``url``. This is a
+    module-level function so it can run in thread or process pools.
+    """
+    data = {
+        "title": "",
+        "headings": [],
+        "paragraphs": [],
+        "lists": [],
+        "tables": [],
+        "forms": [],
+        "images": [],
+        "links": [],
+        "hidden_content": [],
+    }
+    lines = []
+    line = []
+
+    def end_line():
+        joined = " ".join("".join(line).split())
+        if joined:
+            lines.append(joined)
+        line.clear()
+
+    root = _parse(html)
+    if root is None:
+        if with_text:
+            data["text"] = ""
+        return data
+
+    # Open containers, innermost last
+    lists = []
+    tables = []
+    rows = []
+    forms = []
+    skip_depth = 0
+
+    for event, element in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event in ("comment", "pi"):
+            # Comments and processing instructions only contribute their tail
+            if with_text and not skip_depth and element.tail:
+                line.append(element.tail)
+            continue
+        tag = element.tag.lower()
+
+        if event == "end":
+            if tag in _SKIP_TEXT_TAGS:
+                skip_depth -= 1
+            elif tag in ("ul", "ol"):
+                lists.pop()
+            elif tag == "table":
+                table = tables.pop()
+                if table:
+                    data["tables"].append(table)
+            elif tag == "tr":
+                cells = rows.pop()
+                if cells and tables:
+                    tables[-1].append(cells)
+            elif tag == "form":
+                forms.pop()
+            if with_text and not skip_depth:
+                if tag in _BLOCK_TAGS:
+                    end_line()
+                if element.tail and element is not root:
+                    line.append(element.tail)
+            continue
+
+        if tag in _SKIP_TEXT_TAGS:
+            skip_depth += 1
+        elif with_text and not skip_depth:
+            if tag in _BLOCK_TAGS:
+                end_line()
+            if element.text:
+                line.append(element.text)
+
+        if tag == "title":
+            if not data["title"]:
+                data["title"] = _text(element)
+        elif tag in _HEADING_LEVELS:
+            data["headings"].append({"level": _HEADING_LEVELS[tag], "text": _text(element)})
+        elif tag == "p":
+            data["paragraphs"].append(_text(element))
+        elif tag in ("ul", "ol"):
+            entry = {"type": tag, "items": []}
+            data["lists"].append(entry)
+            lists.append(entry)
+        elif tag == "li":
+            if lists:
+                lists[-1]["items"].append(_text(element))
+        elif tag == "table":
+            tables.append([])
+        elif tag == "tr":
+            rows.append([])
+        elif tag in ("td", "th"):
+            if rows:
+                rows[-1].append(_text(element))
+        elif tag == "form":
+            entry = {
+                "action": element.get("action", ""),
+                "method": element.get("method", "get"),
+                "fields": [],
+            }
+            data["forms"].append(entry)
+            forms.append(entry)
+        elif tag in _FORM_FIELDS:
+            if forms:
+                field = {"type": tag, "name": element.get("name", ""), "id": element.get("id", "")}
+                if tag == "input":
+                    field["input_type"] = element.get("type", "text")
+                forms[-1]["fields"].append(field)
+        elif tag == "img":
+            src = element.get("src", "")
+            if src:
+                data["images"].append({"src": urljoin(url, src), "alt": element.get("alt", "")})
+        elif tag == "a":
+            href = element.get("href", "").strip()
+            if href:
+                data["links"].append({"url": urljoin(url, href), "text": _text(element)})
+
+        if _is_hidden(element):
+            data["hidden_content"].append({
+                "tag": tag,
+                "content": _text(element),
+                "html": etree.tostring(element, encoding="unicode", method="html", with_tail=False),
+            })
+
+    if with_text:
+        end_line()
+        data["text"] = "\n".join(lines)
+    return data
@@ -0,0 +1,272 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from .selenium_fetcher import SeleniumFetcher
+from .browser_lifecycle import BrowserLifecycle
+from .http_fetcher import HttpFetcher, TierStats, needs_browser
+
+logger = logging.getLogger(__name__)
+
+
+class _WorkerSlot:
+    """One fetch worker: a SeleniumFetcher with its own Firefox driver"""
+
+    def __init__(self, index, fetcher, http=None, endpoint=None):
+        self.index = index
+        self.fetcher = fetcher
+        self.http = http
+        self.endpoint = endpoint
+        self.pages = 0
+        self.browser_pages = 0
+
+
+class FetcherPool:
+    """Pool of concurrent SeleniumFetcher workers with a per-host cap
+
+    The crawl loop hands frontier entries to ``submit`` while ``has_capacity``
+    and ``host_available`` allow it, waits on ``futures`` and collects
+    finished pages with ``collect``. Each worker owns its own browser; it is
+    replaced after a driver failure (not after a site error), after
+    ``lifecycle["max_pages"]`` pages or above ``lifecycle["max_memory_mb"]``,
+    by a standby browser kept warm in the background (see BrowserLifecycle).
+    Workers never sleep between pages: the per-host politeness delay is
+    scheduled by the CrawlFrontier.
+
+    In "tiered" mode each worker first fetches the raw HTML over its own
+    requests session and only escalates to the browser when
+    ``needs_browser`` says so or the host is flagged with ``"browser": true``
+    in ``site_options``. "browser" and "http" modes use a single tier.
+
+    With a TorManager each browser is bound to one Tor instance for its
+    lifetime (Firefox's proxy is fixed at launch) and is moved to another
+    instance when recycled, while HTTP requests pick an instance per request.
+
+    ``browser_options`` are passed as keyword arguments to every fetcher the
+    pool creates (e.g. ``interaction_budget`` for SeleniumFetcher).
+
+    With a PageCache, fresh cached pages are served without fetching, the
+    HTTP tier revalidates stale ones, and every newly fetched page is cached.
+    """
+
+    def __init__(self, size=1, per_host_limit=1, timeout=120, fetcher_factory=SeleniumFetcher,
+                 session_factory=None, fetch_mode="tiered", site_options=None, tier_stats=None, tor=None,
+                 browser_options=None, cache=None, lifecycle=None):
+        self.size = max(1, int(size))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.timeout = timeout
+        self.fetcher_factory = fetcher_factory
+        self.fetch_mode = fetch_mode if session_factory else "browser"
+        self.site_options = site_options or {}
+        self.tier_stats = tier_stats or TierStats()
+        self.tor = tor
+        self.browser_options = browser_options or {}
+        self.cache = cache
+        self.recycled = 0
+        self.lifecycle = BrowserLifecycle.from_dict(lifecycle, self._create_browser, self._start_browser,
+                                                    self._dispose_browser)
+        self._slots = []
+        self._idle = queue.Queue()
+        for index in range(self.size):
+            http = HttpFetcher(session_factory(), timeout=min(timeout, 60), tor=tor, cache=cache) if session_factory else None
+            slot = _WorkerSlot(index, None, http)
+            slot.fetcher, slot.endpoint = self._create_browser()
+            self._slots.append(slot)
+            self._idle.put(slot)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="fetcher")
+        self._in_flight = {}
+        self._host_in_flight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        return urlparse(url).netloc.lower()
+
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def has_capacity(self):
+        """True if a worker is free to take another URL"""
+        return len(self._in_flight) < self.size
+
+    def host_available(self, url):
+        """True if the URL's host is below its concurrency cap"""
+        return self._host_in_flight.get(self.host_of(url), 0) < self.per_host_limit
+
+    def submit(self, entry):
+        """Schedule a frontier entry (url, depth) on an idle worker"""
+        url = entry[0]
+        host = self.host_of(url)
+        self._host_in_flight[host] = self._host_in_flight.get(host, 0) + 1
+        future = self._executor.submit(self._fetch, url)
+        self._in_flight[future] = (entry, host)
+        return future
+
+    def futures(self):
+        return list(self._in_flight)
+
+    def collect(self, done):
+        """Return (entry, page_data) for the finished fetches in ``done``"""
+        completed = []
+        for future in done:
+            if future not in self._in_flight:
+                continue
+            entry, host = self._in_flight.pop(future)
+            self._host_in_flight[host] -= 1
+            if not self._host_in_flight[host]:
+                del self._host_in_flight[host]
+            try:
+                page_data = future.result()
+            except Exception as e:
+                page_data = {"error": str(e), "url": entry[0]}
+            completed.append((entry, page_data))
+        return completed
+
+    def _fetch(self, url):
+        """Fetch a URL on the next idle worker (runs in a pool thread)"""
+        slot = self._idle.get()
+        try:
+            result = self._fetch_tiered(slot, url)
+            slot.pages += 1
+            return result
+        finally:
+            self._idle.put(slot)
+
+    def _fetch_tiered(self, slot, url):
+        """Serve from the cache or fetch with the tiers, caching what was fetched
+
+        The page records the tier that served it under ``"fetch_tier"`` and
+        the total fetch time under ``"timings"["fetch"]``.
+        """
+        started = time.monotonic()
+        if self.cache:
+            cached = self.cache.fresh_page(url)
+            if cached is not None:
+                self.tier_stats.record("cache", 0.0, served=True)
+                cached["fetch_tier"] = "cache"
+                cached["timings"] = {"fetch": time.monotonic() - started}
+                return cached
+        
+        tier, result = self._fetch_tiers(slot, url)
+        validators = result.pop("validators", None)
+        if self.cache and "error" not in result and "cache" not in result:
+            self.cache.store(url, result, tier, validators if tier == "http" else None)
+        result["fetch_tier"] = tier
+        result.setdefault("timings", {})["fetch"] = time.monotonic() - started
+        return result
+
+    def _fetch_tiers(self, slot, url):
+        """Try the HTTP tier first and escalate to the browser if needed
+
+        Returns (tier, page_data).
+        """
+        force_browser = bool(self.site_options.get(self.host_of(url), {}).get("browser"))
+        
+        if force_browser and self.fetch_mode == "tiered":
+            self.tier_stats.escalate("site_config")
+        elif self.fetch_mode != "browser" and slot.http:
+            started = time.monotonic()
+            result = slot.http.fetch(url)
+            elapsed = time.monotonic() - started
+            
+            if self.fetch_mode == "http":
+                self.tier_stats.record("http", elapsed, served="error" not in result,
+                                       transfer_bytes=result.get("transfer_bytes", 0))
+                return "http", result
+            
+            reason = needs_browser(result)
+            self.tier_stats.record("http", elapsed, served=reason is None and "error" not in result,
+                                   transfer_bytes=result.get("transfer_bytes", 0))
+            if reason is None:
+                return "http", result
+            self.tier_stats.escalate(reason)
+            http_timings = result.get("timings", {})
+        else:
+            http_timings = {}
+        
+        started = time.monotonic()
+        result = self._fetch_browser(slot, url)
+        self.tier_stats.record("browser", time.monotonic() - started, served="error" not in result,
+                               transfer_bytes=result.get("transfer_bytes", 0))
+        # Keep the escalated HTTP attempt's timings alongside the browser's
+        result["timings"] = dict(http_timings, **result.get("timings", {}))
+        return "browser", result
+
+    def _fetch_browser(self, slot, url):
+        """Fetch a URL with the worker's Firefox browser
+
+        Only driver failures restart the browser (and retry the page once);
+        a site that times out or is unreachable leaves it running.
+        """
+        self.lifecycle.first_use()
+        try:
+            result = self._browser_attempt(slot, url)
+
+            if result.get("driver_failure") and slot.fetcher.driver:
+                self._recycle(slot, "driver_failure")
+                result = self._browser_attempt(slot, url)
+        except Exception as e:
+            self._recycle(slot, "driver_failure")
+            return {"error": str(e), "url": url, "driver_failure": True}
+
+        reason = self.lifecycle.retire_reason(slot.fetcher.driver, slot.browser_pages)
+        if reason:
+            self._recycle(slot, reason)
+        return result
+
+    def _browser_attempt(self, slot, url):
+        """One browser fetch, reported to the worker's Tor instance"""
+        started = time.monotonic()
+        result = slot.fetcher.fetch_with_scrolling(url, self.timeout)
+        slot.browser_pages += 1
+        if slot.endpoint:
+            ok = "error" not in result
+            self.tor.record_result(slot.endpoint, url, time.monotonic() - started if ok else None, ok)
+        return result
+
+    def _create_browser(self):
+        """A new (fetcher, Tor endpoint) handle; Firefox starts on first use
+
+        Each browser is bound to the best Tor instance at creation.
+        """
+        if self.tor:
+            endpoint = self.tor.acquire()
+            return self.fetcher_factory(endpoint.socks_host, endpoint.socks_port, **self.browser_options), endpoint
+        return self.fetcher_factory(**self.browser_options), None
+
+    @staticmethod
+    def _start_browser(handle):
+        fetcher = handle[0]
+        if not fetcher.driver:
+            fetcher.driver = fetcher.init_browser()
+
+    def _dispose_browser(self, handle):
+        fetcher, endpoint = handle
+        try:
+            fetcher.close()
+        finally:
+            if endpoint:
+                self.tor.release(endpoint)
+
+    def _recycle(self, slot, reason):
+        """Replace a worker's browser, preferring the warm standby"""
+        slot.fetcher, slot.endpoint = self.lifecycle.replace((slot.fetcher, slot.endpoint), reason)
+        slot.browser_pages = 0
+        with self._lock:
+            self.recycled += 1
+        logger.info("Recycled fetch worker %d (%s)", slot.index, reason.replace("_", " "))
+
+    def close(self):
+        """Shut down the workers and their browsers"""
+        self._executor.shutdown(wait=True)
+        self.lifecycle.close()
+        for slot in self._slots:
+            try:
+                self._dispose_browser((slot.fetcher, slot.endpoint))
+            except Exception:
+                pass
+            if slot.http:
+                slot.http.session.close()
@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import time
+from urllib.parse import urlsplit
+from .visited import ExactVisitedSet
+
+
+class PriorityScorer:
+    """Scores frontier entries; higher scores are fetched first within a host
+
+    The score rewards keyword hits in a link's anchor text or URL and links
+    that stay on a seed host, and penalizes depth.
+    """
+
+    def __init__(self, seed_hosts=(), keywords=(), depth_weight=1.0, seed_bonus=2.0, keyword_bonus=3.0):
+        self.seed_hosts = set(seed_hosts)
+        self.keywords = [keyword.lower() for keyword in keywords]
+        self.depth_weight = depth_weight
+        self.seed_bonus = seed_bonus
+        self.keyword_bonus = keyword_bonus
+
+    @classmethod
+    def from_dict(cls, settings, seed_urls=()):
+        settings = settings or {}
+        return cls(
+            seed_hosts=(CrawlFrontier.host_of(url) for url in seed_urls),
+            keywords=settings.get("keywords", ()),
+            depth_weight=settings.get("depth_weight", 1.0),
+            seed_bonus=settings.get("seed_bonus", 2.0),
+            keyword_bonus=settings.get("keyword_bonus", 3.0),
+        )
+
+    def __call__(self, url, depth, anchor_text=""):
+        score = -self.depth_weight * depth
+        if self.seed_hosts and CrawlFrontier.host_of(url) in self.seed_hosts:
+            score += self.seed_bonus
+        if self.keywords:
+            haystack = f"{anchor_text} {url}".lower()
+            score += self.keyword_bonus * sum(1 for keyword in self.keywords if keyword in haystack)
+        return score
+
+
+class CrawlFrontier:
+    """Per-host crawl frontier with politeness delays and constant-time dedupe
+
+    Each host has its own priority queue and a next-allowed-fetch time.
+    ``pop`` serves the best entry from whichever host is ready, so one slow
+    or deep site never holds up the others, and a host is not fetched again
+    until its delay (``host_delays`` entry or ``delay`` seconds) has passed.
+    Without a ``scorer`` entries are ordered by depth, then FIFO.
+
+    ``seen`` is the visited-set backend (see crawler.visited); the default
+    is an exact in-memory set of every URL ever enqueued.
+    """
+
+    def __init__(self, seeds=None, seen=None, delay=0.0, host_delays=None, scorer=None):
+        self._seen = seen if seen is not None else ExactVisitedSet()
+        self.delay = delay
+        self.host_delays = host_delays or {}
+        self.scorer = scorer
+        self._counter = itertools.count()
+        self._queues = {}       # host -> heap of (-score, seq, url, depth)
+        self._next_allowed = {}  # host -> monotonic time of its next allowed fetch
+        self._ready = []        # heap of (-head score, seq, host) for hosts that may be fetched now
+        self._waiting = []      # heap of (next allowed time, host) for hosts in their delay
+        self._scheduled = {}    # host -> "ready" / "waiting"
+        self._length = 0
+        self.enqueued = 0
+        self.popped = 0
+        self.dedupe_hits = 0
+        self.max_queue_length = 0
+        for url in seeds or []:
+            self.add(url, depth=0)
+
+    @classmethod
+    def restore(cls, entries, seen_urls, seen=None, **options):
+        """Rebuild a frontier from saved queued entries and every known URL"""
+        frontier = cls(seen=seen, **options)
+        for url, depth in entries:
+            frontier._push(url, depth)
+        frontier._seen.update(seen_urls)
+        return frontier
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    @property
+    def seen(self):
+        """The visited-set backend"""
+        return self._seen
+
+    def add(self, url, depth=0, anchor_text=""):
+        """Enqueue a URL unless it was already queued or visited
+
+        Returns True if the URL was newly added.
+        """
+        if not self._seen.add(url):
+            self.dedupe_hits += 1
+            return False
+        self._push(url, depth, anchor_text)
+        self.enqueued += 1
+        return True
+
+    def _push(self, url, depth, anchor_text=""):
+        score = self.scorer(url, depth, anchor_text) if self.scorer else -depth
+        host = self.host_of(url)
+        queue = self._queues.setdefault(host, [])
+        improved = not queue or -score < queue[0][0]
+        heapq.heappush(queue, (-score, next(self._counter), url, depth))
+        self._length += 1
+        if self._length > self.max_queue_length:
+            self.max_queue_length = self._length
+        if host not in self._scheduled:
+            self._schedule(host)
+        elif improved and self._scheduled[host] == "ready":
+            # Re-rank the host; its older heap record is skipped when popped
+            heapq.heappush(self._ready, (queue[0][0], next(self._counter), host))
+
+    def _schedule(self, host, now=None):
+        """Put a host with queued entries on the ready or waiting heap"""
+        ready_at = self._next_allowed.get(host, 0.0)
+        if ready_at <= (now if now is not None else time.monotonic()):
+            self._scheduled[host] = "ready"
+            heapq.heappush(self._ready, (self._queues[host][0][0], next(self._counter), host))
+        else:
+            self._scheduled[host] = "waiting"
+            heapq.heappush(self._waiting, (ready_at, host))
+
+    def _promote(self, now):
+        """Move hosts whose delay has passed from waiting to ready"""
+        while self._waiting and self._waiting[0][0] <= now:
+            ready_at, host = heapq.heappop(self._waiting)
+            if ready_at < self._next_allowed.get(host, 0.0):
+                continue  # superseded by the later record mark_fetched pushed
+            if self._scheduled.get(host) == "waiting":
+                self._scheduled[host] = "ready"
+                heapq.heappush(self._ready, (self._queues[host][0][0], next(self._counter), host))
+
+    def pop(self, host_ok=None):
+        """Return the best (url, depth) entry from a ready host, or None
+
+        ``host_ok(url)`` can veto hosts (e.g. ones at their concurrency cap);
+        vetoed hosts stay ready. Returns None when the frontier is empty or
+        every host is waiting out its delay or vetoed.
+        """
+        now = time.monotonic()
+        self._promote(now)
+        skipped = []
+        entry = None
+        while self._ready:
+            priority, seq, host = heapq.heappop(self._ready)
+            queue = self._queues.get(host)
+            if self._scheduled.get(host) != "ready" or not queue or queue[0][0] != priority:
+                continue  # stale record
+            if host_ok is not None and not host_ok(queue[0][2]):
+                skipped.append((priority, seq, host))
+                continue
+            _, _, url, depth = heapq.heappop(queue)
+            self._length -= 1
+            self._next_allowed[host] = now + self.host_delays.get(host, self.delay)
+            del self._scheduled[host]
+            if queue:
+                self._schedule(host, now)
+            else:
+                del self._queues[host]
+            entry = (url, depth)
+            break
+        for record in skipped:
+            heapq.heappush(self._ready, record)
+        if entry is not None:
+            self.popped += 1
+        return entry
+
+    def mark_fetched(self, url):
+        """Restart the host's delay when a fetch finishes
+
+        The delay is counted from both the start and the end of a fetch, so
+        a slow page never leads straight into the next request to its host.
+        """
+        host = self.host_of(url)
+        ready_at = time.monotonic() + self.host_delays.get(host, self.delay)
+        if ready_at <= self._next_allowed.get(host, 0.0):
+            return
+        self._next_allowed[host] = ready_at
+        if self._scheduled.get(host) == "ready":
+            self._scheduled[host] = "waiting"
+            heapq.heappush(self._waiting, (ready_at, host))
+        elif self._scheduled.get(host) == "waiting":
+            heapq.heappush(self._waiting, (ready_at, host))
+
+    def next_ready_in(self):
+        """Seconds until a waiting host becomes ready (0 if one is ready, None if empty)"""
+        if not self._length:
+            return None
+        now = time.monotonic()
+        self._promote(now)
+        if any(state == "ready" for state in self._scheduled.values()):
+            return 0.0
+        return max(0.0, self._waiting[0][0] - now) if self._waiting else None
+
+    def is_seen(self, url):
+        """Check whether a URL was ever enqueued or visited"""
+        return url in self._seen
+
+    def stats(self):
+        """Queue length and dedupe metrics"""
+        checks = self.enqueued + self.dedupe_hits
+        return {
+            "queue_length": self._length,
+            "max_queue_length": self.max_queue_length,
+            "queued_hosts": len(self._queues),
+            "seen_urls": len(self._seen),
+            "enqueued": self.enqueued,
+            "popped": self.popped,
+            "dedupe_hits": self.dedupe_hits,
+            "dedupe_hit_rate": round(self.dedupe_hits / checks, 4) if checks else 0.0,
+        }
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
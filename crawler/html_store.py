@@ -0,0 +1,192 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from .blob_store import BlobStore
+from .result_shards import INDEX_FILE, read_results
+
+# A record's reference to its HTML, in any JSON layout of the result files
+_REFERENCE_RE = re.compile(r'"html_sha256":\s*"([0-9a-f]{64})"')
+
+
+class HtmlStore:
+    """Deduplicated page HTML shared by every run in an output directory
+
+    ``detach`` moves a record's ``html`` into a BlobStore and leaves its
+    SHA-256 under ``html_sha256``, so each distinct page body is compressed
+    and written once, however many URLs, records or runs contain it.
+    ``load`` returns the HTML for a record.
+
+    ``refs.sqlite`` records who holds each blob: result records
+    (``RESULTS``) and, when it shares the store, the page cache. An owner
+    that lets go of a blob calls ``release``, which deletes it once nobody
+    holds it. Result records are only released by ``gc``, which rescans the
+    result files that still exist (JSON, JSON Lines and result shards), so
+    deleting a run's results files and running gc releases its HTML.
+    """
+
+    RESULTS = "results"
+
+    def __init__(self, root, level=3):
+        self.root = root
+        self.blobs = BlobStore(root, level=level)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "refs.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS refs (digest TEXT NOT NULL, owner TEXT NOT NULL, "
+                          "PRIMARY KEY (digest, owner)) WITHOUT ROWID")
+        self.conn.commit()
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_in = 0
+
+    @classmethod
+    def from_dict(cls, settings, output_dir):
+        """The store per the html_store settings (None when disabled)"""
+        settings = settings or {}
+        if not settings.get("enabled", False):
+            return None
+        return cls(settings.get("path") or os.path.join(output_dir, "html_blobs"), level=settings.get("level", 3))
+
+    def put(self, data, owner):
+        """Store a body for ``owner`` and return (digest, whether the owner already held it)"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = BlobStore.digest(data)
+        with self._lock:
+            held = self._retain(digest, owner)
+            if self.blobs.exists(digest):
+                # Refresh the mtime so a concurrent gc's grace period covers this run too
+                try:
+                    os.utime(self.blobs.path(digest))
+                except FileNotFoundError:
+                    self.blobs.put(data)
+            else:
+                self.blobs.put(data)
+        return digest, held
+
+    def _retain(self, digest, owner):
+        cursor = self.conn.execute("INSERT OR IGNORE INTO refs (digest, owner) VALUES (?, ?)", (digest, owner))
+        self.conn.commit()
+        return cursor.rowcount == 0
+
+    def retain_all(self, digests, owner):
+        """Record ``owner`` as a holder of blobs it already refers to"""
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO refs (digest, owner) VALUES (?, ?)",
+                                  [(digest, owner) for digest in digests])
+
+    def release(self, digest, owner):
+        """Drop ``owner``'s hold on a blob and delete the blob if nobody holds it"""
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM refs WHERE digest = ? AND owner = ?", (digest, owner))
+            if self.conn.execute("SELECT 1 FROM refs WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                self.blobs.delete(digest)
+
+    def detach(self, record):
+        """Return a copy of the record with its html replaced by ``html_sha256``
+
+        Records without HTML (failed fetches) are returned unchanged.
+        """
+        html = record.get("html")
+        if html is None:
+            return record
+        data = html.encode("utf-8")
+        digest, held = self.put(data, self.RESULTS)
+        if held:
+            self.deduplicated += 1
+        else:
+            self.stored += 1
+        self.bytes_in += len(data)
+        detached = {key: value for key, value in record.items() if key != "html"}
+        detached["html_sha256"] = digest
+        return detached
+
+    def load(self, record):
+        """The HTML of a record (inline or stored), or None if it has none"""
+        if "html" in record:
+            return record["html"]
+        digest = record.get("html_sha256")
+        if not digest:
+            return None
+        try:
+            return self.blobs.get_text(digest)
+        except FileNotFoundError:
+            return None
+
+    def stats(self):
+        """Bodies first stored for result records this run, and records that reused a stored body"""
+        return {"stored": self.stored, "deduplicated": self.deduplicated, "html_bytes": self.bytes_in}
+
+    @staticmethod
+    def references(output_dirs):
+        """Every html_sha256 referenced by the result files in ``output_dirs``"""
+        found = set()
+        for output_dir in output_dirs:
+            if not os.path.isdir(output_dir):
+                continue
+            for name in os.listdir(output_dir):
+                path = os.path.join(output_dir, name)
+                if os.path.isfile(os.path.join(path, INDEX_FILE)):
+                    found.update(record["html_sha256"] for record in read_results(path, ("html_sha256",))
+                                 if record.get("html_sha256"))
+                elif name.endswith((".json", ".jsonl")) and os.path.isfile(path):
+                    with open(path, encoding="utf-8", errors="replace") as f:
+                        for line in f:
+                            found.update(_REFERENCE_RE.findall(line))
+        return found
+
+    def gc(self, output_dirs, grace=3600.0, keep=()):
+        """Release result-record holds no result file refers to any more
+
+        Result files in ``output_dirs`` and the digests in ``keep`` (for
+        example a search index's) count as result references. Blobs nobody
+        holds are deleted unless written in the last ``grace`` seconds, since
+        a running crawl may not have flushed the record that refers to
+        them. Returns counts of kept and deleted blobs and the bytes freed.
+        """
+        live = self.references(output_dirs) | set(keep)
+        cutoff = time.time() - grace
+        with self._lock, self.conn:
+            recorded = {digest for (digest,) in self.conn.execute(
+                "SELECT digest FROM refs WHERE owner = ?", (self.RESULTS,))}
+            self.conn.executemany("DELETE FROM refs WHERE digest = ? AND owner = ?",
+                                  [(digest, self.RESULTS) for digest in recorded - live
+                                   if not self._recent(digest, cutoff)])
+            self.conn.executemany("INSERT OR IGNORE INTO refs (digest, owner) VALUES (?, ?)",
+                                  [(digest, self.RESULTS) for digest in live - recorded])
+            held = {digest for (digest,) in self.conn.execute("SELECT DISTINCT digest FROM refs")}
+        kept = deleted = freed = 0
+        for digest in list(self.blobs):
+            if digest in held or self._recent(digest, cutoff):
+                kept += 1
+                continue
+            try:
+                size = self.blobs.size(digest)
+            except FileNotFoundError:
+                continue
+            if self.blobs.delete(digest):
+                deleted += 1
+                freed += size
+        return {"kept": kept, "deleted": deleted, "freed_bytes": freed}
+
+    def _recent(self, digest, cutoff):
+        try:
+            return os.path.getmtime(self.blobs.path(digest)) > cutoff
+        except FileNotFoundError:
+            return False
+
+    def close(self):
+        self.conn.close()
+
+
+def load_html(record, root):
+    """The HTML of a result record, from the HTML store at ``root`` if it was detached"""
+    store = HtmlStore(root)
+    try:
+        return store.load(record)
+    finally:
+        store.close()
@@ -0,0 +1,193 @@
+import re
+import threading
+import time
+from html import unescape
+from requests.compat import chardet
+
+# Pages smaller than this are likely placeholders that need the browser
+MIN_BODY_BYTES = 2048
+
+# "Show More" style controls (bare "More" is too common to be a useful signal)
+_SHOW_MORE_RE = re.compile(
+    r"<(?:button|a)\b[^>]*>[^<]{0,60}?\b(?:show more|load more|view more|see more|show all|read more|expand)\b",
+    re.IGNORECASE
+)
+_COLLAPSED_RE = re.compile(
+    r"""aria-expanded\s*=\s*["']false|data-expanded\s*=\s*["']false|class\s*=\s*["'][^"']*\b(?:collapsed|expander|expandable|accordion|folded)\b""",
+    re.IGNORECASE
+)
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_HEADER_CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"""<meta\b[^>]*?charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+
+
+class HttpFetcher:
+    """Fetch raw HTML through a requests session on the Tor SOCKS proxy
+
+    With JavaScript disabled in Firefox most pages render the same as their
+    raw HTML, so this is tried before falling back to the browser. When a
+    TorManager is given, each request goes through the endpoint it picks and
+    the outcome is reported back for health tracking.
+
+    With a PageCache, stale cached pages are revalidated with a conditional
+    GET and a 304 is answered from the cache. Fresh pages carry their
+    validators under ``"validators"`` so the caller can cache them.
+
+    ``"timings"`` splits each fetch into ``http_first_byte`` (Tor circuit,
+    connect and time to the response headers) and ``http_body``.
+    """
+
+    def __init__(self, session, timeout=60, tor=None, cache=None):
+        self.session = session
+        self.timeout = timeout
+        self.tor = tor
+        self.cache = cache
+
+    def fetch(self, url):
+        """Fetch a page and return page_data (or an error dict)"""
+        headers = self.cache.revalidation_headers(url) if self.cache else {}
+        endpoint = self.tor.acquire() if self.tor else None
+        started = time.monotonic()
+        try:
+            if endpoint:
+                response = self.session.get(url, timeout=self.timeout, headers=headers, proxies=endpoint.proxies)
+            else:
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+        except Exception as e:
+            if endpoint:
+                self.tor.record_result(endpoint, url, None, ok=False)
+            return {"error": f"HTTP error: {str(e)}", "url": url,
+                    "timings": {"http_first_byte": time.monotonic() - started}}
+        finally:
+            if endpoint:
+                self.tor.release(endpoint)
+
+        elapsed = time.monotonic() - started
+        first_byte = min(response.elapsed.total_seconds(), elapsed)
+        timings = {"http_first_byte": first_byte, "http_body": elapsed - first_byte}
+        if endpoint:
+            self.tor.record_result(endpoint, url, elapsed, ok=True)
+
+        if response.status_code == 304 and headers:
+            page_data = self.cache.revalidated_page(url)
+            if page_data is not None:
+                page_data["timings"] = timings
+                return page_data
+            return {"error": "Not modified, but the cached copy is missing", "url": url, "timings": timings}
+
+        if response.status_code >= 400:
+            return {"error": f"HTTP status {response.status_code}", "url": url, "timings": timings}
+
+        content_type = response.headers.get("Content-Type", "")
+        if not is_html_type(content_type):
+            return {"error": f"Unsupported content type: {content_type}", "url": url, "timings": timings}
+
+        html = decode_html(response.content, content_type)
+        page_data = {"url": url, "title": extract_title(html), "html": html, "transfer_bytes": len(response.content),
+                     "timings": timings}
+        if self.cache:
+            page_data["validators"] = response_validators(response.headers)
+        return page_data
+
+
+def response_validators(headers):
+    """ETag and Last-Modified response headers, for cache revalidation"""
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def is_html_type(content_type):
+    """Whether a Content-Type header is worth parsing (missing counts as HTML)"""
+    return not content_type or "html" in content_type or "xml" in content_type
+
+
+def decode_html(content, content_type=""):
+    """Decode a response body as the page declares it
+
+    requests falls back to ISO-8859-1 for text/html without a charset in
+    Content-Type, which garbles UTF-8 pages. The header's charset is used
+    when there is one, then a <meta charset> near the top of the document,
+    then UTF-8 if the body is valid UTF-8, then the detected encoding. Both
+    engines decode through here so they produce the same text.
+    """
+    candidates = []
+    match = _HEADER_CHARSET_RE.search(content_type or "")
+    if match:
+        candidates.append(match.group(1))
+    match = _META_CHARSET_RE.search(content[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+    candidates.append("utf-8")
+    for encoding in candidates:
+        try:
+            return content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    detected = chardet.detect(content)["encoding"] if chardet is not None else None
+    return content.decode(detected or "utf-8", errors="replace")
+
+
+def extract_title(html):
+    """Cheap <title> lookup without parsing the whole document"""
+    match = _TITLE_RE.search(html)
+    return unescape(match.group(1)).strip() if match else ""
+
+
+def needs_browser(page_data):
+    """Decide whether an HTTP-fetched page should be re-fetched in Firefox
+
+    Returns the reason as a string, or None if the raw HTML is good enough.
+    Failed fetches are not escalated: an HTTP error status or a non-HTML
+    body would be the same in the browser, and a host that did not answer
+    over Tor would only cost the browser's page-load timeout too.
+    """
+    if "error" in page_data:
+        return None
+    html = page_data.get("html", "")
+    if len(html) < MIN_BODY_BYTES:
+        return "small_body"
+    if _SHOW_MORE_RE.search(html):
+        return "show_more"
+    if _COLLAPSED_RE.search(html):
+        return "collapsed_content"
+    return None
+
+
+class TierStats:
+    """Thread-safe per-tier hit and latency counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.tiers = {}
+        self.escalations = {}
+
+    def record(self, tier, seconds, served, transfer_bytes=0):
+        """Record one fetch attempt on a tier"""
+        with self._lock:
+            stats = self.tiers.setdefault(tier, {"attempts": 0, "served": 0, "seconds": 0.0, "bytes": 0})
+            stats["attempts"] += 1
+            stats["seconds"] += seconds
+            stats["bytes"] += transfer_bytes
+            if served:
+                stats["served"] += 1
+                self.pages += 1
+
+    def escalate(self, reason):
+        """Record why a page was escalated to the browser"""
+        with self._lock:
+            self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    def report(self):
+        """Per-tier hit rates, average latency and bytes transferred"""
+        with self._lock:
+            report = {"pages": self.pages, "tiers": {}, "escalations": dict(self.escalations)}
+            for tier, stats in self.tiers.items():
+                report["tiers"][tier] = {
+                    "attempts": stats["attempts"],
+                    "served": stats["served"],
+                    "hit_rate": round(stats["served"] / self.pages, 4) if self.pages else 0.0,
+                    "avg_latency": round(stats["seconds"] / stats["attempts"], 3) if stats["attempts"] else 0.0,
+                    "transfer_bytes": stats["bytes"],
+                }
+            return report
+
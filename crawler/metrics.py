@@ -0,0 +1,227 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from .utils import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; Tor page loads
+# routinely take tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Error types, checked in order against the error message of a failed page
+_ERROR_TYPES = (
+    ("timeout", re.compile(r"timeout|timed out", re.IGNORECASE)),
+    ("http_status", re.compile(r"HTTP status \d+")),
+    ("content_type", re.compile(r"Unsupported content type")),
+    ("browser_init", re.compile(r"Failed to initialize Firefox")),
+    ("network", re.compile(r"Network error|connection|SOCKS|proxy|refused|unreachable", re.IGNORECASE)),
+    ("webdriver", re.compile(r"WebDriver", re.IGNORECASE)),
+    ("cache", re.compile(r"cached copy")),
+)
+
+
+def classify_error(message):
+    """Map a page_data error message to a short error type"""
+    for kind, pattern in _ERROR_TYPES:
+        if pattern.search(message or ""):
+            return kind
+    return "other"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets and a sample reservoir for percentiles
+
+    Bucket counts are exact; percentiles are computed from a uniform random
+    sample of at most ``reservoir`` observations.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir=4096):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.reservoir = reservoir
+        self._samples = []
+        self._random = random.Random(0)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self._samples) < self.reservoir:
+            self._samples.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.reservoir:
+                self._samples[slot] = value
+
+    def summary(self):
+        """Count, mean, max and percentiles in seconds"""
+        ordered = sorted(self._samples)
+        result = {"count": self.count, "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+                  "max": round(self.max, 4)}
+        for q in PERCENTILES:
+            # Nearest-rank percentile of the sample
+            value = ordered[round(q / 100 * (len(ordered) - 1))] if ordered else 0.0
+            result[f"p{q}"] = round(value, 4)
+        return result
+
+
+class CrawlMetrics:
+    """Thread-safe counters, gauges and per-stage latency histograms
+
+    Stages are free-form names such as ``page_load``, ``scroll``, ``parse``
+    or ``write_result``; fetchers report theirs in a page's ``"timings"``
+    dict and ``record_page`` folds them in. ``start`` flushes a JSON
+    snapshot and a Prometheus textfile every ``interval`` seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+        self._thread = None
+        self._stop = threading.Event()
+        self.json_path = None
+        self.prom_path = None
+
+    def observe(self, stage, seconds):
+        """Record one latency observation for a stage"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, stage):
+        """Context manager that observes the time spent in its block"""
+        return _StageTimer(self, stage)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def record_page(self, page_data):
+        """Count a fetched page and observe the stage timings it carries
+
+        The timings are rounded to milliseconds in place for the saved record.
+        """
+        if "error" in page_data:
+            self.increment("errors", type=classify_error(page_data["error"]))
+        else:
+            self.increment("pages", tier=page_data.get("fetch_tier", "unknown"))
+        timings = page_data.get("timings") or {}
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+            timings[stage] = round(seconds, 3)
+
+    def summary(self):
+        """Percentile latencies per stage plus counters and gauges"""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                if labels:
+                    counters.setdefault(name, {})[",".join(f"{k}={v}" for k, v in labels)] = value
+                else:
+                    counters[name] = value
+            return {
+                "uptime": round(time.time() - self.started, 3),
+                "stages": {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())},
+                "counters": counters,
+                "gauges": dict(self.gauges),
+            }
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP crawler_stage_seconds Time spent per crawl pipeline stage",
+            "# TYPE crawler_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'crawler_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'crawler_stage_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'crawler_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE crawler_{name}_total counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(f"crawler_{name}_total{{{label_text}}} {value}" if label_text
+                                     else f"crawler_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE crawler_{name} gauge")
+                lines.append(f"crawler_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Write the JSON snapshot and Prometheus textfile (atomically)"""
+        if self.json_path:
+            write_atomic(self.json_path, json.dumps(self.summary(), indent=2))
+        if self.prom_path:
+            write_atomic(self.prom_path, self.prometheus())
+
+    def start(self, json_path=None, prom_path=None, interval=10.0):
+        """Flush to the given files every ``interval`` seconds until ``stop``"""
+        self.json_path = json_path
+        self.prom_path = prom_path
+        if self._thread or not (json_path or prom_path):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="metrics", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("Could not write metrics: %s", e)
+
+    def stop(self):
+        """Stop the flusher and write the final snapshot"""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning("Could not write metrics: %s", e)
+
+
+class _StageTimer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.monotonic() - self.started
+        self.metrics.observe(self.stage, self.seconds)
+        return False
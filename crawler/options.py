@@ -0,0 +1,61 @@
+class CrawlOptions:
+    """Settings for one crawl, shared by both crawl engines
+
+    Limits: ``max_pages`` fetched in total and ``depth`` link levels from
+    the seeds. Fetching: ``workers`` fetch threads (threaded engine), at
+    most ``per_host_limit`` concurrent fetches per host, ``fetch_mode``
+    ("tiered" tries plain HTTP before Firefox), ``delay`` seconds between
+    fetches from one host, ``timeout`` per request (async engine) and
+    per-host ``site_options``. Parsing: ``parse_workers`` in a
+    ``parse_executor`` ("process" or "thread") pool; None leaves the
+    engine's default. Firefox: ``browser_options`` for each worker's
+    SeleniumFetcher and ``browser_lifecycle`` for when it is replaced.
+
+    The remaining settings are the sites.json sections of the same names,
+    passed on to the component they configure: ``priority``
+    (PriorityScorer), ``scope`` (CrawlScope), ``page_cache`` (PageCache),
+    ``dedup`` (NearDuplicateIndex), ``visited`` (visited-set backend) and
+    ``metrics`` (CrawlMetrics).
+    """
+
+    FIELDS = ("max_pages", "depth", "workers", "per_host_limit", "fetch_mode", "delay", "timeout", "site_options",
+              "parse_workers", "parse_executor", "browser_options", "browser_lifecycle", "priority", "scope",
+              "page_cache", "dedup", "visited", "metrics")
+
+    def __init__(self, max_pages=10, depth=1, workers=1, per_host_limit=1, fetch_mode="tiered", delay=2.0,
+                 timeout=60, site_options=None, parse_workers=None, parse_executor=None, browser_options=None,
+                 browser_lifecycle=None, priority=None, scope=None, page_cache=None, dedup=None, visited=None,
+                 metrics=None):
+        self.max_pages = max_pages
+        self.depth = depth
+        self.workers = workers
+        self.per_host_limit = per_host_limit
+        self.fetch_mode = fetch_mode
+        self.delay = delay
+        self.timeout = timeout
+        self.site_options = site_options or {}
+        self.parse_workers = parse_workers
+        self.parse_executor = parse_executor
+        self.browser_options = browser_options or {}
+        self.browser_lifecycle = browser_lifecycle
+        self.priority = priority
+        self.scope = scope
+        self.page_cache = page_cache
+        self.dedup = dedup
+        self.visited = visited
+        self.metrics = metrics
+
+    @classmethod
+    def from_dict(cls, settings):
+        """Options from a sites.json config; missing keys keep their defaults"""
+        settings = settings or {}
+        return cls(**{name: settings[name] for name in cls.FIELDS if name in settings})
+
+    def replace(self, **overrides):
+        """A copy with the given options changed (TypeError for unknown names)"""
+        unknown = set(overrides) - set(self.FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown crawl options: {', '.join(sorted(unknown))}")
+        options = {name: getattr(self, name) for name in self.FIELDS}
+        options.update(overrides)
+        return type(self)(**options)
@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+import time
+from .blob_store import BlobStore
+from .urls import canonicalize_url as cache_key
+
+
+class PageCache:
+    """On-disk page cache shared across crawl runs
+
+    Page bodies live in a BlobStore under ``<root>/blobs``; an SQLite index
+    maps each normalized URL to its blob along with fetch time, ETag,
+    Last-Modified, status and the tier that served it. Entries younger than
+    ``ttl`` seconds are served without touching the network, older ones can
+    be revalidated with a conditional GET. When the blobs exceed
+    ``max_bytes`` the least recently used entries are evicted.
+
+    With ``shared`` (an HtmlStore) bodies go to the HTML store's blobs
+    instead, so a page is written once for both. The cache holds its bodies
+    there as the ``page_cache`` owner, and evicting the last entry for a
+    body releases it; the blob is deleted unless a result record holds it.
+    """
+
+    OWNER = "page_cache"
+
+    def __init__(self, root, ttl=86400, max_bytes=512 * 1024 * 1024, shared=None):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.shared = shared
+        self.blobs = shared.blobs if shared is not None else BlobStore(os.path.join(root, "blobs"))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                title TEXT,
+                status INTEGER,
+                tier TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_lru ON pages (last_access);
+        """)
+        self.conn.commit()
+        if shared is not None:
+            # Entries cached before the store tracked owners
+            shared.retain_all(self.digests(), self.OWNER)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stored = 0
+        self.evicted = 0
+        self._final_stats = None
+
+    def _entry(self, url):
+        row = self.conn.execute(
+            "SELECT digest, title, fetched_at, etag, last_modified FROM pages WHERE url = ?",
+            (cache_key(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"digest": row[0], "title": row[1], "fetched_at": row[2], "etag": row[3], "last_modified": row[4]}
+
+    def _page(self, url, entry, status):
+        """Rebuild page_data from a cache entry (None if its blob is gone)"""
+        try:
+            html = self.blobs.get_text(entry["digest"])
+        except (OSError, ValueError):
+            return None
+        self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), cache_key(url)))
+        self.conn.commit()
+        return {"url": url, "title": entry["title"] or "", "html": html, "transfer_bytes": 0, "cache": status}
+
+    def fresh_page(self, url):
+        """Return the cached page_data if it is within the TTL, else None"""
+        with self._lock:
+            entry = self._entry(url)
+            page = None
+            if entry and time.time() - entry["fetched_at"] < self.ttl:
+                page = self._page(url, entry, "hit")
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return page
+
+    def revalidation_headers(self, url):
+        """Conditional GET headers for a stale entry (empty if it has no validators)"""
+        with self._lock:
+            entry = self._entry(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated_page(self, url):
+        """Serve the cached copy after a 304 and restart its TTL"""
+        with self._lock:
+            entry = self._entry(url)
+            page = self._page(url, entry, "revalidated") if entry else None
+            if page is None:
+                return None
+            self.conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), cache_key(url)))
+            self.conn.commit()
+            self.revalidated += 1
+            return page
+
+    def store(self, url, page_data, tier, validators=None, status=200):
+        """Cache a fetched page and evict old entries if the cache is full"""
+        validators = validators or {}
+        if self.shared is not None:
+            digest, _ = self.shared.put(page_data.get("html", ""), self.OWNER)
+        else:
+            digest = self.blobs.put(page_data.get("html", ""))
+        size = self.blobs.size(digest)
+        now = time.time()
+        with self._lock:
+            previous = self._entry(url)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, digest, title, status, tier, etag, last_modified, "
+                "fetched_at, last_access, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url), digest, page_data.get("title", ""), status, tier,
+                 validators.get("etag"), validators.get("last_modified"), now, now, size)
+            )
+            self.conn.commit()
+            if previous and previous["digest"] != digest:
+                self._release_blob(previous["digest"])
+            self.stored += 1
+            self._evict()
+
+    def _release_blob(self, digest):
+        # Blobs are shared by URLs with identical content
+        if self.conn.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return
+        if self.shared is not None:
+            self.shared.release(digest, self.OWNER)
+        else:
+            self.blobs.delete(digest)
+
+    def _evict(self):
+        """Drop least recently used entries until the blobs fit in max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so a full cache does not evict on every store
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT url, digest, size FROM pages ORDER BY last_access").fetchall()
+        for url, digest, size in rows:
+            if total <= target:
+                break
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._release_blob(digest)
+            total -= size
+            self.evicted += 1
+        self.conn.commit()
+
+    def digests(self):
+        """The digest of every cached page body"""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT DISTINCT digest FROM pages")}
+
+    def stats(self):
+        """Entry counts and hit/miss counters"""
+        if self._final_stats is not None:
+            return dict(self._final_stats)
+        with self._lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._final_stats is None:
+            self._final_stats = self.stats()
+            self.conn.close()
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .extraction import extract_page
+from .dedup import simhash
+
+
+def parse_page(html, url, with_text=False):
+    """extract_page plus a SimHash fingerprint of the page text
+
+    The fingerprint is stored as a hex string under ``"simhash"``; it is
+    computed here so it runs in the parser pool.
+    """
+    fields = extract_page(html, url, with_text)
+    fingerprint = simhash(fields["text"]) if fields.get("text") else None
+    if fingerprint is not None:
+        fields["simhash"] = format(fingerprint, "016x")
+    return fields
+
+
+def timed_parse_page(html, url, with_text=False):
+    """parse_page that also returns the wall-clock and CPU seconds spent parsing, measured in the worker"""
+    started, cpu_started = time.monotonic(), time.process_time()
+    fields = parse_page(html, url, with_text)
+    return fields, time.monotonic() - started, time.process_time() - cpu_started
+
+
+class ParseStage:
+    """Parsing stage that runs parse_page off the fetch loop
+
+    Raw HTML is handed to a process pool (sized to the core count by default)
+    so GIL-bound parsing of large pages never blocks the next fetch. The
+    crawl loop checks ``has_capacity`` before dispatching more fetches, which
+    keeps fetchers from running unboundedly ahead of the parsers. The time
+    spent parsing each page is added to its ``"timings"`` as ``parse``.
+
+    Worker processes are started lazily while fetch threads are running, so
+    they come from a forkserver (spawn where there is none) rather than a
+    fork of this threaded process, which can deadlock on a lock some other
+    thread held at fork time.
+    """
+
+    def __init__(self, workers=None, max_pending=None, executor="process"):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self.kind = executor
+        self._executor = self._create_executor()
+        self._pending = {}
+        self.parsed = 0
+        self.failed = 0
+        self.cpu_seconds = 0.0
+        self.max_seen_pending = 0
+
+    def _create_executor(self):
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parser")
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def futures(self):
+        return list(self._pending)
+
+    def has_capacity(self):
+        """True while the parsers are not backed up"""
+        return len(self._pending) < self.max_pending
+
+    def submit(self, entry, page_data):
+        """Queue a fetched page for parsing"""
+        html = page_data.get("html", "")
+        try:
+            future = self._executor.submit(timed_parse_page, html, entry[0], "text" not in page_data)
+        except BrokenProcessPool:
+            # A crashed worker poisons the pool; start a fresh one
+            print("♻️ Parser pool crashed, restarting it")
+            self._executor = self._create_executor()
+            future = self._executor.submit(timed_parse_page, html, entry[0], "text" not in page_data)
+        self._pending[future] = (entry, page_data)
+        self.max_seen_pending = max(self.max_seen_pending, len(self._pending))
+        return future
+
+    def collect(self, done):
+        """Return (entry, page_data, fields, error) for finished parses in ``done``"""
+        completed = []
+        for future in done:
+            if future not in self._pending:
+                continue
+            entry, page_data = self._pending.pop(future)
+            try:
+                (fields, seconds, cpu), error = future.result(), None
+                page_data.setdefault("timings", {})["parse"] = seconds
+                self.cpu_seconds += cpu
+                self.parsed += 1
+            except Exception as e:
+                fields, error = None, e
+                self.failed += 1
+            completed.append((entry, page_data, fields, error))
+        return completed
+
+    def stats(self):
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "max_seen_pending": self.max_seen_pending,
+            "parsed": self.parsed,
+            "failed": self.failed,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+        }
+
+    def close(self):
+        # Drop queued parses (shutdown's cancel_futures needs Python 3.9)
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
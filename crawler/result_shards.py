@@ -0,0 +1,257 @@
+import gzip
+import io
+import json
+import os
+import time
+
+from .utils import write_atomic
+
+try:
+    import zstandard
+except ImportError:  # optional; shards fall back to gzip
+    zstandard = None
+
+INDEX_FILE = "index.json"
+
+# Column groups stored in separate files per shard: the bulky page bodies
+# are only read when asked for
+GROUPS = ("fields", "text", "html")
+_GROUP_OF = {"text": "text", "html": "html"}
+
+_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def default_compression():
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def _compress(data, compression, level):
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=level)
+
+
+class _Prefix(io.RawIOBase):
+    """The first ``size`` bytes of a file (a shard's committed frames)"""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.left = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.left:
+            return 0
+        count = self.f.readinto(memoryview(buffer)[:self.left])
+        self.left -= count
+        return count
+
+
+class ShardedResultSink:
+    """Streaming writer of compressed, column-grouped JSON Lines shards
+
+    A drop-in alternative to JsonlResultSink. Records go to a directory of
+    shards holding ``records_per_shard`` records each. Every shard has one
+    file per column group: ``fields`` (all extracted fields and metadata),
+    ``text`` and ``html``. A line in each group file belongs to the same
+    record, so readers can load the small fields without decompressing page
+    bodies (see ShardedResults).
+
+    Records are buffered and appended as one zstd frame (gzip member when
+    the optional ``zstandard`` package is missing) per group every
+    ``fsync_every`` records or ``fsync_interval`` seconds. Then
+    ``index.json`` is atomically rewritten with the committed record
+    count and byte length of every file. A crash loses at most the records
+    since the last sync, and readers never see a torn frame. Reopening a
+    dataset starts a new shard after the existing ones, discarding any
+    frames a crash left unindexed.
+    """
+
+    def __init__(self, path, records_per_shard=1000, compression=None, level=3, fsync_every=50,
+                 fsync_interval=10.0):
+        compression = compression or default_compression()
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"compression must be one of {tuple(_EXTENSIONS)}, not {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd shards need the zstandard package: pip install zstandard")
+        self.path = path
+        self.records_per_shard = max(1, int(records_per_shard))
+        self.compression = compression
+        self.level = level
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+        self.index = None
+        self._shard = None
+        self._buffers = None
+        self._last_sync = time.monotonic()
+
+    def open(self):
+        """Open the dataset for appending (existing shards are kept)"""
+        if self.index is not None:
+            return self
+        os.makedirs(self.path, exist_ok=True)
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+            # Stay readable: keep appending in the dataset's own codec
+            self.compression = self.index["compression"]
+        else:
+            self.index = {"format": "crawl-shards", "version": 1, "compression": self.compression,
+                          "groups": list(GROUPS), "records": 0, "columns": [], "shards": []}
+        return self
+
+    def _new_shard(self):
+        name = f"shard-{len(self.index['shards']):05d}"
+        ext = _EXTENSIONS[self.compression]
+        self._shard = {"name": name, "records": 0, "first_url": None, "last_url": None,
+                       "files": {group: f"{name}.{group}.jsonl{ext}" for group in GROUPS},
+                       "bytes": {group: 0 for group in GROUPS}}
+        # Files of a shard a crash left out of the index hold only uncommitted
+        # frames; start them empty rather than appending after those
+        for filename in self._shard["files"].values():
+            open(os.path.join(self.path, filename), "wb").close()
+        self.index["shards"].append(self._shard)
+        self._buffers = {group: [] for group in GROUPS}
+
+    def write(self, record):
+        """Append a single page record"""
+        if self.index is None:
+            self.open()
+        if self._shard is None:
+            self._new_shard()
+
+        parts = {group: {} for group in GROUPS}
+        for key, value in record.items():
+            parts[_GROUP_OF.get(key, "fields")][key] = value
+        for group in GROUPS:
+            self._buffers[group].append(json.dumps(parts[group], ensure_ascii=False))
+        self._record_columns(record)
+        self._shard["pending"] = self._shard.get("pending", 0) + 1
+        if self._shard["first_url"] is None:
+            self._shard["first_url"] = record.get("url")
+        self._shard["last_url"] = record.get("url")
+        self.records_written += 1
+
+        full = self._shard["records"] + self._shard["pending"] >= self.records_per_shard
+        if (full or self._shard["pending"] >= self.fsync_every or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+        if full:
+            self._shard = None
+
+    def _record_columns(self, record):
+        columns = self.index["columns"]
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+
+    def sync(self):
+        """Compress buffered records, append them to the shard and commit the index"""
+        if self._shard is None or not self._shard.get("pending"):
+            return
+        for group in GROUPS:
+            data = ("\n".join(self._buffers[group]) + "\n").encode("utf-8")
+            path = os.path.join(self.path, self._shard["files"][group])
+            with open(path, "ab") as f:
+                f.write(_compress(data, self.compression, self.level))
+                f.flush()
+                os.fsync(f.fileno())
+                self._shard["bytes"][group] = f.tell()
+            self._buffers[group] = []
+        self._shard["records"] += self._shard.pop("pending")
+        self.index["records"] = sum(shard["records"] for shard in self.index["shards"])
+        write_atomic(os.path.join(self.path, INDEX_FILE), json.dumps(self.index, indent=2))
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Commit buffered records and close the current shard"""
+        if self.index is not None:
+            self.sync()
+            self._shard = None
+
+    def iter_records(self, fields=None):
+        """Yield the committed records (only ``fields`` when given)"""
+        self.sync()
+        if not os.path.exists(os.path.join(self.path, INDEX_FILE)):
+            return iter(())
+        return ShardedResults(self.path).records(fields)
+
+    def finalize(self, output_file=None):
+        """Commit everything; the dataset directory is the final output
+
+        Returns the number of records in the dataset.
+        """
+        self.close()
+        return self.index["records"] if self.index else 0
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ShardedResults:
+    """Reader for a ShardedResultSink dataset
+
+    ``records(fields)`` only decompresses the column groups that hold the
+    requested fields, so loading URLs, titles and links skips every HTML
+    and text body.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as f:
+            self.index = json.load(f)
+
+    @property
+    def columns(self):
+        return list(self.index["columns"])
+
+    def __len__(self):
+        return self.index["records"]
+
+    def _lines(self, shard, group):
+        """Decoded lines of one group file, up to its committed length"""
+        path = os.path.join(self.path, shard["files"][group])
+        with open(path, "rb") as raw:
+            prefix = io.BufferedReader(_Prefix(raw, shard["bytes"][group]))
+            if self.index["compression"] == "zstd":
+                if zstandard is None:
+                    raise ImportError("Reading zstd shards needs the zstandard package: pip install zstandard")
+                stream = zstandard.ZstdDecompressor().stream_reader(prefix, read_across_frames=True)
+            else:
+                stream = gzip.GzipFile(fileobj=prefix)
+            with io.TextIOWrapper(stream, encoding="utf-8") as text:
+                for _, line in zip(range(shard["records"]), text):
+                    yield line
+
+    def records(self, fields=None):
+        """Yield records with only ``fields`` (every field when None)"""
+        wanted = set(fields) if fields is not None else None
+        groups = [group for group in GROUPS
+                  if wanted is None or any(_GROUP_OF.get(field, "fields") == group for field in wanted)]
+        for shard in self.index["shards"]:
+            if not shard["records"]:
+                continue
+            streams = [self._lines(shard, group) for group in groups]
+            for lines in zip(*streams):
+                record = {}
+                for line in lines:
+                    record.update(json.loads(line))
+                if wanted is not None:
+                    record = {key: value for key, value in record.items() if key in wanted}
+                yield record
+
+    def column(self, name):
+        """All values of one field, in record order (None where missing)"""
+        return [record.get(name) for record in self.records((name,))]
+
+
+def read_results(path, fields=None):
+    """Yield the records of a sharded results dataset, limited to ``fields``"""
+    return ShardedResults(path).records(fields)
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+
+class JsonlResultSink:
+    """Append-only JSON Lines sink for crawl results
+
+    Each page record is written as a single line as soon as it is crawled, so
+    the cost of saving a page does not grow with the size of the run. The
+    combined JSON array expected by analysts is produced once at the end by
+    ``finalize``.
+    """
+
+    def __init__(self, path, fsync_every=20, fsync_interval=10.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = None
+
+    def open(self):
+        """Open the sink for appending (existing records are kept)"""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            # A crashed run can leave a torn last line; start on a fresh one
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")
+        return self
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def write(self, record):
+        """Append a single page record"""
+        if self._file is None:
+            self.open()
+
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self._file.flush()
+        self.records_written += 1
+        self._unsynced += 1
+
+        # fsync periodically rather than per page to keep writes cheap
+        if (self._unsynced >= self.fsync_every or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """Force buffered records to disk"""
+        if self._file is None or not self._unsynced:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Flush and close the sink"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def iter_records(self, fields=None):
+        """Yield records from the sink file, skipping a torn trailing line
+
+        With ``fields`` only those keys of each record are kept.
+        """
+        if self._file is not None:
+            self._file.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a partial last line
+                    continue
+                if fields is not None:
+                    record = {key: record[key] for key in fields if key in record}
+                yield record
+
+    def finalize(self, output_file):
+        """Stream all records into a combined JSON array file
+
+        Returns the number of records written.
+        """
+        count = 0
+        with open(output_file, "w", encoding="utf-8") as out:
+            out.write("[\n")
+            for record in self.iter_records():
+                if count:
+                    out.write(",\n")
+                out.write(json.dumps(record, ensure_ascii=False))
+                count += 1
+            out.write("\n]\n")
+        return count
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,92 @@
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class CrawlScope:
+    """Depth and domain limits for which links a crawl follows
+
+    ``depth`` is the number of link levels crawled: seeds are depth 0 and
+    links are only followed from pages shallower than ``depth - 1``, so
+    ``depth=1`` fetches just the seeds. Every queued URL is attributed to
+    the seed it was reached from. With ``same_host_only`` links are only
+    followed on their seed's host; ``max_pages_per_seed`` caps the URLs
+    queued for one seed (seed included) and ``max_links_per_page`` the new
+    links queued from one page.
+    """
+
+    def __init__(self, seeds=(), depth=1, same_host_only=False, max_pages_per_seed=None, max_links_per_page=None):
+        self.depth = max(1, int(depth))
+        self.same_host_only = same_host_only
+        self.max_pages_per_seed = max_pages_per_seed
+        self.max_links_per_page = max_links_per_page
+        self.seed_hosts = {seed: self.host_of(seed) for seed in seeds}
+        self._origins = {}  # queued or in-flight URL -> its seed
+        self.queued_per_seed = Counter()
+        self.pages_per_depth = Counter()
+        self.skipped = Counter()
+        for seed in seeds:
+            self.admit(seed, seed)
+
+    @classmethod
+    def from_dict(cls, settings, seeds=(), depth=1):
+        settings = settings or {}
+        return cls(
+            seeds,
+            depth=depth,
+            same_host_only=settings.get("same_host_only", False),
+            max_pages_per_seed=settings.get("max_pages_per_seed"),
+            max_links_per_page=settings.get("max_links_per_page"),
+        )
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def restore(self, origins, queued_per_seed, pages_per_depth):
+        """Reload attribution and counters saved by an earlier run"""
+        self._origins = dict(origins)
+        self.queued_per_seed = Counter(queued_per_seed)
+        self.pages_per_depth = Counter(pages_per_depth)
+
+    def expands(self, url_depth):
+        """True if links found on a page at ``url_depth`` are followed"""
+        return url_depth + 1 < self.depth
+
+    def origin(self, url):
+        """The seed a queued or in-flight URL was reached from (None if unknown)"""
+        return self._origins.get(url)
+
+    def release(self, url):
+        """Forget a finished page's attribution"""
+        self._origins.pop(url, None)
+
+    def rejects(self, link_url, seed, page_url):
+        """Return why a link may not be queued (None if it may)
+
+        Links of pages with no known seed are scoped to the page's host.
+        """
+        if self.same_host_only:
+            home = self.seed_hosts.get(seed) or self.host_of(page_url)
+            if self.host_of(link_url) != home:
+                return "off_host"
+        if self.max_pages_per_seed and seed is not None and self.queued_per_seed[seed] >= self.max_pages_per_seed:
+            return "seed_budget"
+        return None
+
+    def admit(self, url, seed):
+        """Record a newly queued URL against its seed"""
+        if seed is not None:
+            self._origins[url] = seed
+            self.queued_per_seed[seed] += 1
+
+    def record_fetch(self, url_depth):
+        self.pages_per_depth[url_depth] += 1
+
+    def report(self):
+        """Pages fetched per depth level and links not followed, by reason"""
+        return {
+            "depth_limit": self.depth,
+            "pages_per_depth": {str(level): count for level, count in sorted(self.pages_per_depth.items())},
+            "links_skipped": dict(self.skipped),
+            "queued_per_seed": dict(self.queued_per_seed),
+        }
@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from .result_shards import INDEX_FILE, read_results
+
+_RUN_ID_RE = re.compile(r"(\d{8}_\d{6})")
+_RELATIVE_RE = re.compile(r"^(\d+)([hdw])$")
+
+# Full-text columns of page_text, in _page_texts order
+TEXT_COLUMNS = ("title", "headings", "text", "body", "links", "forms", "hidden")
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def parse_since(value):
+    """Epoch seconds for "30d" / "12h" / "2w" ago or a "YYYY-MM-DD[ HH:MM:SS]" date"""
+    match = _RELATIVE_RE.match(value.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {"h": timedelta(hours=amount), "d": timedelta(days=amount), "w": timedelta(weeks=amount)}[unit]
+        return (datetime.now() - delta).timestamp()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Expected e.g. 30d, 12h, 2w or YYYY-MM-DD, not {value!r}")
+
+
+def _quote_terms(query):
+    """Turn plain keywords into an FTS5 query matching all of them"""
+    return " ".join('"%s"' % term.replace('"', '""') for term in query.split())
+
+
+def _page_texts(record):
+    """The FTS columns of a page record: title, headings, text, body, links, forms, hidden"""
+    body = list(record.get("paragraphs") or [])
+    for entry in record.get("lists") or []:
+        body.extend(entry.get("items", []))
+    for table in record.get("tables") or []:
+        for row in table:
+            body.append(" ".join(row))
+    forms = []
+    for form in record.get("forms") or []:
+        forms.append(form.get("action", ""))
+        forms.extend(field.get("name", "") for field in form.get("fields", []))
+    return (
+        record.get("title") or "",
+        "\n".join(heading.get("text", "") for heading in record.get("headings") or []),
+        record.get("text") or "",
+        "\n".join(body),
+        "\n".join(link.get("text", "") for link in record.get("links") or []),
+        " ".join(part for part in forms if part),
+        "\n".join(item.get("content", "") for item in record.get("hidden_content") or []),
+    )
+
+
+class SearchIndex:
+    """SQLite index of crawled pages across runs, with FTS5 search and a link table
+
+    Every (run, URL) record becomes one row of ``pages``; its title,
+    headings, extracted page text, paragraphs, list items, table cells,
+    link texts, form actions and field names and hidden content go to the
+    ``page_text`` FTS5 table, and its outgoing links to ``links``. Records are added as
+    pages finish and committed every ``batch_size`` records, in WAL mode so
+    queries can run while a crawl is writing. Adding a (run, URL) again
+    replaces its earlier entry.
+    """
+
+    def __init__(self, path, batch_size=50):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                host TEXT NOT NULL,
+                title TEXT,
+                depth INTEGER,
+                crawled_at TEXT,
+                crawled_ts REAL,
+                html_sha256 TEXT,
+                error TEXT,
+                UNIQUE (run_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS pages_host ON pages (host, crawled_ts);
+            CREATE INDEX IF NOT EXISTS pages_url ON pages (url);
+            CREATE INDEX IF NOT EXISTS pages_time ON pages (crawled_ts);
+            CREATE TABLE IF NOT EXISTS links (
+                page_id INTEGER NOT NULL,
+                target TEXT NOT NULL,
+                target_host TEXT NOT NULL,
+                text TEXT
+            );
+            CREATE INDEX IF NOT EXISTS links_page ON links (page_id);
+            CREATE INDEX IF NOT EXISTS links_target ON links (target);
+            CREATE INDEX IF NOT EXISTS links_target_host ON links (target_host);
+        """)
+        self._create_text_table()
+        self.conn.commit()
+        self.pending = 0
+        self.added = 0
+
+    def _create_text_table(self):
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(page_text)")]
+        if columns and "text" not in columns:
+            # Indexes built before the page text column: FTS5 tables cannot
+            # gain columns, so rebuild it with the text left empty
+            self.conn.execute("ALTER TABLE page_text RENAME TO page_text_old")
+        self.conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5({', '.join(TEXT_COLUMNS)}, "
+                          "tokenize = 'unicode61 remove_diacritics 2')")
+        if columns and "text" not in columns:
+            old = ", ".join("''" if column == "text" else column for column in TEXT_COLUMNS)
+            self.conn.execute(f"INSERT INTO page_text (rowid, {', '.join(TEXT_COLUMNS)}) "
+                              f"SELECT rowid, {old} FROM page_text_old")
+            self.conn.execute("DROP TABLE page_text_old")
+
+    @classmethod
+    def from_dict(cls, settings, output_dir):
+        """The index per the search_index settings (None when disabled)"""
+        settings = settings or {}
+        if not settings.get("enabled", False):
+            return None
+        return cls(settings.get("path") or os.path.join(output_dir, "search_index.sqlite"),
+                   batch_size=settings.get("batch_size", 50))
+
+    def add(self, record, run_id):
+        """Index one page record of a run (committed in batches)"""
+        url = record.get("url")
+        if not url:
+            return
+        crawled_at = record.get("timestamp")
+        try:
+            crawled_ts = datetime.strptime(crawled_at, "%Y-%m-%d %H:%M:%S").timestamp() if crawled_at else None
+        except ValueError:
+            crawled_ts = None
+
+        row = self.conn.execute("SELECT id FROM pages WHERE run_id = ? AND url = ?", (run_id, url)).fetchone()
+        if row:
+            self._remove(row[0])
+        cursor = self.conn.execute(
+            "INSERT INTO pages (run_id, url, host, title, depth, crawled_at, crawled_ts, html_sha256, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, url, host_of(url), record.get("title"), record.get("depth"), crawled_at,
+             crawled_ts if crawled_ts is not None else time.time(), record.get("html_sha256"), record.get("error"))
+        )
+        page_id = cursor.lastrowid
+        if "error" not in record:
+            self.conn.execute(f"INSERT INTO page_text (rowid, {', '.join(TEXT_COLUMNS)}) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (page_id,) + _page_texts(record))
+            self.conn.executemany(
+                "INSERT INTO links (page_id, target, target_host, text) VALUES (?, ?, ?, ?)",
+                [(page_id, link["url"], host_of(link["url"]), link.get("text", ""))
+                 for link in record.get("links") or [] if link.get("url")]
+            )
+        self.added += 1
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def _remove(self, page_id):
+        self.conn.execute("DELETE FROM page_text WHERE rowid = ?", (page_id,))
+        self.conn.execute("DELETE FROM links WHERE page_id = ?", (page_id,))
+        self.conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+
+    def commit(self):
+        if self.pending:
+            self.conn.commit()
+            self.pending = 0
+
+    def ingest(self, path, run_id=None):
+        """Index a finished run's results file (JSON array, JSON Lines or shards)
+
+        The run id is taken from the file name when not given. Returns the
+        number of records indexed.
+        """
+        if run_id is None:
+            match = _RUN_ID_RE.search(os.path.basename(path.rstrip(os.sep)))
+            run_id = match.group(1) if match else os.path.basename(path)
+        count = 0
+        for record in self._iter_file(path):
+            self.add(record, run_id)
+            count += 1
+        self.commit()
+        return count
+
+    @staticmethod
+    def _iter_file(path):
+        if os.path.isfile(os.path.join(path, INDEX_FILE)):
+            yield from read_results(path, ("url", "title", "depth", "timestamp", "error", "html_sha256", "headings",
+                                           "text", "paragraphs", "lists", "tables", "forms", "links", "hidden_content"))
+        elif path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # torn last line of a crashed run
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield from json.load(f)
+
+    def search(self, query, host=None, since=None, limit=20, raw=False):
+        """Pages matching keywords (all of them), best match first
+
+        ``raw`` passes ``query`` to FTS5 unchanged (phrases, OR, NEAR,
+        column filters). ``since`` is epoch seconds.
+        """
+        sql = ("SELECT p.url, p.title, p.host, p.crawled_at, p.run_id, "
+               "snippet(page_text, -1, '[', ']', '…', 12) "
+               "FROM page_text JOIN pages p ON p.id = page_text.rowid WHERE page_text MATCH ?")
+        params = [query if raw else _quote_terms(query)]
+        if host:
+            sql += " AND p.host = ?"
+            params.append(host.lower())
+        if since is not None:
+            sql += " AND p.crawled_ts >= ?"
+            params.append(since)
+        sql += " ORDER BY bm25(page_text) LIMIT ?"
+        params.append(limit)
+        columns = ("url", "title", "host", "crawled_at", "run_id", "snippet")
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def host_pages(self, host, since=None, limit=50):
+        """Most recently crawled pages of one host"""
+        sql = "SELECT url, title, crawled_at, run_id, error FROM pages WHERE host = ?"
+        params = [host.lower()]
+        if since is not None:
+            sql += " AND crawled_ts >= ?"
+            params.append(since)
+        sql += " ORDER BY crawled_ts DESC LIMIT ?"
+        params.append(limit)
+        columns = ("url", "title", "crawled_at", "run_id", "error")
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def hosts(self, limit=50):
+        """Hosts by number of distinct pages indexed"""
+        rows = self.conn.execute(
+            "SELECT host, COUNT(DISTINCT url), MAX(crawled_at) FROM pages GROUP BY host "
+            "ORDER BY COUNT(DISTINCT url) DESC LIMIT ?", (limit,))
+        return [{"host": host, "pages": pages, "last_crawled": last} for host, pages, last in rows]
+
+    def links_to(self, target, limit=50):
+        """Pages linking to a URL, or to any page of a host when ``target`` has no scheme"""
+        column, value = ("target", target) if "://" in target else ("target_host", target.lower())
+        rows = self.conn.execute(
+            f"SELECT DISTINCT p.url, p.host, l.target, l.text FROM links l JOIN pages p ON p.id = l.page_id "
+            f"WHERE l.{column} = ? LIMIT ?", (value, limit))
+        return [{"source": url, "source_host": host, "target": target, "text": text}
+                for url, host, target, text in rows]
+
+    def links_from(self, url, limit=200):
+        """Outgoing links of a URL, as recorded in its latest crawl"""
+        rows = self.conn.execute(
+            "SELECT l.target, l.text FROM links l WHERE l.page_id = "
+            "(SELECT id FROM pages WHERE url = ? ORDER BY crawled_ts DESC LIMIT 1) LIMIT ?", (url, limit))
+        return [{"target": target, "text": text} for target, text in rows]
+
+    def digests(self):
+        """Every html_sha256 the indexed pages refer to"""
+        return {digest for (digest,) in self.conn.execute(
+            "SELECT DISTINCT html_sha256 FROM pages WHERE html_sha256 IS NOT NULL")}
+
+    def stats(self):
+        pages, runs, hosts = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT run_id), COUNT(DISTINCT host) FROM pages").fetchone()
+        links = self.conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        return {"pages": pages, "runs": runs, "hosts": hosts, "links": links}
+
+    def close(self):
+        self.commit()
+        self.conn.close()
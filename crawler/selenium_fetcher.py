@@ -5,19 +5,212 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
+import re
 import time
 import os
-import random
 import platform
 import socket
 import zipfile
 import urllib.request
+import urllib.parse
 import shutil
 import subprocess
 import sys
+import threading
+
+# Common button text patterns that indicate expandable content
+SHOW_MORE_PATTERNS = [
+    "Show More", "Load More", "View More", "See More", 
+    "Show All", "Expand", "More", "Read More"
+]
+
+# Common selectors for expandable elements
+EXPAND_SELECTORS = [
+    ".expander", ".expandable", ".toggle", ".accordion", 
+    "[aria-expanded='false']", "[data-expanded='false']",
+    ".collapsed", ".folded"
+]
+
+# Page height and element count, used to detect that an interaction changed the DOM
+_DOM_SIGNATURE_SCRIPT = (
+    "return [document.body ? document.body.scrollHeight : 0, "
+    "document.getElementsByTagName('*').length];"
+)
+
+# Finds every "Show More" style control and expandable element, clicks the
+# visible ones in the page and returns a summary, all in one WebDriver call.
+# Arguments: text patterns, CSS selectors, max matches per pattern, per selector.
+_BATCH_INTERACT_SCRIPT = """
+var patterns = arguments[0], selectors = arguments[1];
+var perPattern = arguments[2], perSelector = arguments[3];
+var summary = {candidates: 0, clicked: 0, errors: 0};
+var seen = new Set();
+function visible(el) {
+    if (el.disabled || !el.getClientRects().length) return false;
+    var style = window.getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none';
+}
+function press(el) {
+    if (seen.has(el)) return;
+    seen.add(el);
+    summary.candidates++;
+    if (!visible(el)) return;
+    try { el.click(); summary.clicked++; } catch (e) { summary.errors++; }
+}
+var controls = document.querySelectorAll('button, a');
+patterns.forEach(function (pattern) {
+    var needle = pattern.toLowerCase(), found = 0;
+    for (var i = 0; i < controls.length && found < perPattern; i++) {
+        if ((controls[i].textContent || '').toLowerCase().indexOf(needle) !== -1) {
+            press(controls[i]);
+            found++;
+        }
+    }
+});
+selectors.forEach(function (selector) {
+    var elements;
+    try { elements = document.querySelectorAll(selector); } catch (e) { return; }
+    for (var i = 0; i < elements.length && i < perSelector; i++) press(elements[i]);
+});
+return summary;
+"""
+
+INTERACTION_MODES = ("batched", "per_element")
+
+BROWSER_PROFILES = ("standard", "lean")
+
+# Firefox preferences of the "lean" profile: no images, web fonts or media
+# downloads. Image URLs are still extracted from the HTML's src attributes.
+LEAN_PREFERENCES = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "media.autoplay.default": 5,
+    "media.preload.default": 0,
+    "media.preload.auto": 0,
+}
+
+# Proxy auto-config for block_third_party: only .onion hosts go through Tor,
+# every other host (CDNs, trackers) gets an unreachable proxy and fails fast
+_ONION_ONLY_PAC = """function FindProxyForURL(url, host) {
+    if (shExpMatch(host, "*.onion")) return "SOCKS5 %s:%d";
+    return "PROXY 127.0.0.1:9";
+}"""
+
+# Bytes transferred for the document and its subresources, per the
+# Navigation and Resource Timing APIs
+_RESOURCE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var total = nav ? nav.transferSize : 0;
+for (var i = 0; i < resources.length; i++) total += resources[i].transferSize || 0;
+return {transfer_bytes: total, resources: resources.length};
+"""
+
+# WebDriver errors meaning the browser or its session is gone, as opposed to
+# the site failing to load (those come back as timeouts or about:neterror)
+_DRIVER_FAILURE_RE = re.compile(
+    r"invalid session id|no such window|browsing context has been discarded|session deleted|"
+    r"session not created|without establishing a connection|failed to decode response from marionette|"
+    r"process unexpectedly closed|tab crashed|connection refused|max retries exceeded|broken pipe",
+    re.IGNORECASE
+)
+
+# Successful Tor probes per (host, port) -> monotonic time, and the Firefox
+# binary lookup, shared by every fetcher in the process
+_tor_probe_cache = {}
+_firefox_path_cache = {}
+_probe_lock = threading.Lock()
+
+# Signs of pages trying to get the visitor to install or enable something
+_SUSPICIOUS_RE = re.compile(
+    r"download now|install plugin|allow notifications|enable javascript|enable flash|"
+    r"download extension|install now|enable java",
+    re.IGNORECASE
+)
+
+
+class InteractionBudget:
+    """Time budget for the scroll/click/expand steps of one page fetch
+
+    Each step checks ``expired`` before doing more work and waits at most
+    ``remaining`` seconds, so the total interaction time per page is capped.
+    ``report`` summarizes where the time went.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.steps = {}
+        self.clicks = 0
+        self.candidates = 0
+        self.exhausted = False
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return max(0.0, self.seconds - self.elapsed())
+
+    def expired(self):
+        if not self.remaining():
+            self.exhausted = True
+        return self.exhausted
+
+    def record(self, step, seconds):
+        self.steps[step] = round(self.steps.get(step, 0.0) + seconds, 3)
+
+    def report(self):
+        return {
+            "budget": self.seconds,
+            "spent": round(self.elapsed(), 3),
+            "exhausted": self.exhausted,
+            "clicks": self.clicks,
+            "candidates": self.candidates,
+            "steps": dict(self.steps),
+        }
+
 
 class SeleniumFetcher:
-    def __init__(self):
+    """Firefox-over-Tor fetcher that reveals lazy and collapsed content
+
+    Instead of fixed sleeps, every scroll or click waits until the page
+    height or element count changes, polling every ``poll_interval`` seconds
+    for at most ``settle_timeout`` seconds. All interaction for a page shares
+    one ``interaction_budget`` (seconds), reported in ``page_data["interaction"]``.
+
+    In "batched" ``interaction_mode`` the show-more and expand steps run as a
+    single injected script instead of find/is_displayed/click round trips
+    per element ("per_element").
+
+    The "lean" ``profile`` blocks images, web fonts and media and returns
+    from page loads at DOMContentLoaded ("eager" strategy);
+    ``block_third_party`` only lets requests to .onion hosts through. Every
+    page records the bytes Firefox transferred for it (``transfer_bytes``)
+    and its subresource count (``resources``).
+
+    Error results caused by the browser itself rather than the site carry
+    ``"driver_failure": True``; only those call for a new browser. A
+    successful Tor port probe is trusted for ``tor_probe_ttl`` seconds so
+    restarts skip the socket check.
+    """
+
+    def __init__(self, socks_host="127.0.0.1", socks_port=9050, interaction_budget=15.0,
+                 settle_timeout=1.0, poll_interval=0.1, interaction_mode="batched", tor_probe_ttl=300.0,
+                 profile="standard", block_third_party=False):
+        if interaction_mode not in INTERACTION_MODES:
+            raise ValueError(f"interaction_mode must be one of {INTERACTION_MODES}, not {interaction_mode!r}")
+        if profile not in BROWSER_PROFILES:
+            raise ValueError(f"profile must be one of {BROWSER_PROFILES}, not {profile!r}")
+        self.socks_host = socks_host
+        self.socks_port = socks_port
+        self.interaction_mode = interaction_mode
+        self.interaction_budget = interaction_budget
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self.tor_probe_ttl = tor_probe_ttl
+        self.profile = profile
+        self.block_third_party = block_third_party
         self.driver = None
         self.driver_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "drivers")
         if not os.path.exists(self.driver_dir):
@@ -28,14 +221,14 @@ class SeleniumFetcher:
         # Check if Tor is running first
         tor_status, tor_error = self._is_tor_running()
         if not tor_status:
-            print("\n❌ Tor is not running on port 9050 or is blocked by Windows Firewall.")
+            print(f"\n❌ Tor is not running on port {self.socks_port} or is blocked by Windows Firewall.")
             
             if tor_error == "timeout":
                 print("🔥 Windows Firewall is likely blocking Tor connections. Try these solutions:")
                 print("   1. Run this script as administrator to automatically create targeted firewall rules")
                 print("   2. Manually add these specific exceptions to Windows Firewall:")
-                print("      - Allow Firefox outbound connections to port 9050 (TCP)")
-                print("      - Allow Python outbound connections to port 9050 (TCP)")
+                print(f"      - Allow Firefox outbound connections to port {self.socks_port} (TCP)")
+                print(f"      - Allow Python outbound connections to port {self.socks_port} (TCP)")
                 print("   3. Make sure Tor is actually running (Tor Browser or Tor service)")
             elif tor_error == "refused":
                 print("🔍 Tor service is not running. Please start Tor:")
@@ -62,13 +255,30 @@ class SeleniumFetcher:
         return driver
     
     def _is_tor_running(self):
-        """Check if Tor is running on port 9050
+        """Check if Tor is running on the configured SOCKS port
         Returns: (is_running, error_type)
+
+        A successful check is cached for ``tor_probe_ttl`` seconds.
         """
+        key = (self.socks_host, self.socks_port)
+        with _probe_lock:
+            checked = _tor_probe_cache.get(key)
+        if checked is not None and time.monotonic() - checked < self.tor_probe_ttl:
+            return True, None
+        status, error = self._probe_tor_port()
+        with _probe_lock:
+            if status:
+                _tor_probe_cache[key] = time.monotonic()
+            else:
+                _tor_probe_cache.pop(key, None)
+        return status, error
+
+    def _probe_tor_port(self):
+        """Connect to the SOCKS port once; returns (is_running, error_type)"""
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(5)  # Set timeout to 5 seconds
-            result = sock.connect_ex(('127.0.0.1', 9050))
+            result = sock.connect_ex((self.socks_host, self.socks_port))
             sock.close()
             
             if result == 0:
@@ -244,8 +454,8 @@ class SeleniumFetcher:
             
             # Setup Tor proxy settings
             options.set_preference('network.proxy.type', 1)
-            options.set_preference('network.proxy.socks', '127.0.0.1')
-            options.set_preference('network.proxy.socks_port', 9050)
+            options.set_preference('network.proxy.socks', self.socks_host)
+            options.set_preference('network.proxy.socks_port', self.socks_port)
             options.set_preference('network.proxy.socks_remote_dns', True)
             
             # Enhanced Security Settings for Dark Web
@@ -289,6 +499,20 @@ class SeleniumFetcher:
             options.set_preference('plugin.state.flash', 0)
             options.set_preference('plugin.state.java', 0)
             
+            # Lean profile: skip images, fonts and media, don't wait for subresources
+            if self.profile == "lean":
+                for name, value in LEAN_PREFERENCES.items():
+                    options.set_preference(name, value)
+                options.page_load_strategy = "eager"
+            
+            # Route only .onion hosts through Tor; never fall back to a direct connection
+            if self.block_third_party:
+                pac = _ONION_ONLY_PAC % (self.socks_host, self.socks_port)
+                options.set_preference('network.proxy.type', 2)
+                options.set_preference('network.proxy.autoconfig_url',
+                                       "data:application/x-ns-proxy-autoconfig," + urllib.parse.quote(pac))
+                options.set_preference('network.proxy.failover_direct', False)
+            
             # Get driver path - AVOID using GeckoDriverManager which hits GitHub API
             driver_path = os.path.join(self.driver_dir, "geckodriver.exe" if platform.system() == "Windows" else "geckodriver")
             
@@ -317,8 +541,8 @@ class SeleniumFetcher:
                     print("🔥 Windows Firewall may be blocking Firefox from connecting to Tor")
                     print("   1. Add these specific firewall exceptions (without disabling the whole firewall):")
                     print("     a. Run PowerShell as administrator")
-                    print('     b. Run: New-NetFirewallRule -DisplayName "Allow Firefox Tor" -Direction Outbound -Program "' + firefox_path + '" -RemotePort 9050 -Protocol TCP -Action Allow')
-                    print('     c. Run: New-NetFirewallRule -DisplayName "Allow Python Tor" -Direction Outbound -Program "' + sys.executable + '" -RemotePort 9050 -Protocol TCP -Action Allow')
+                    print('     b. Run: New-NetFirewallRule -DisplayName "Allow Firefox Tor" -Direction Outbound -Program "' + firefox_path + '" -RemotePort ' + str(self.socks_port) + ' -Protocol TCP -Action Allow')
+                    print('     c. Run: New-NetFirewallRule -DisplayName "Allow Python Tor" -Direction Outbound -Program "' + sys.executable + '" -RemotePort ' + str(self.socks_port) + ' -Protocol TCP -Action Allow')
                     print("   2. Or create these exceptions manually:")
                     print("     - Windows Security → Firewall & Network Protection → Allow an app through firewall")
                     print("     - Add Firefox and Python, ensuring private networks are checked")
@@ -340,7 +564,13 @@ class SeleniumFetcher:
             return None
     
     def _find_firefox_path(self):
-        """Find Firefox installation path based on OS"""
+        """Find Firefox installation path based on OS (remembered once found)"""
+        path = _firefox_path_cache.get("path") or self._search_firefox_path()
+        if path:
+            _firefox_path_cache["path"] = path
+        return path
+
+    def _search_firefox_path(self):
         system = platform.system()
         
         # Common Firefox paths by OS
@@ -374,102 +604,181 @@ class SeleniumFetcher:
         return None
     
     def fetch_with_scrolling(self, url, timeout=120):
-        """Fetch full page content with scrolling to reveal lazy-loaded content"""
+        """Fetch full page content with scrolling to reveal lazy-loaded content
+
+        The seconds spent starting the browser, loading the page, in each
+        interaction step and taking the DOM snapshot are returned under
+        ``"timings"``.
+        """
+        timings = {}
         if not self.driver:
+            started = time.monotonic()
             self.driver = self.init_browser()
+            timings["browser_start"] = time.monotonic() - started
             
         if not self.driver:
-            return {"error": "Failed to initialize Firefox browser. Make sure Tor is running and Firefox is installed.", "url": url}
+            return {"error": "Failed to initialize Firefox browser. Make sure Tor is running and Firefox is installed.",
+                    "url": url, "timings": timings}
             
         try:
             print(f"🧅 Navigating to: {url}")
+            started = time.monotonic()
             self.driver.get(url)
             
             # Wait for page to initially load
             WebDriverWait(self.driver, timeout).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
+            timings["page_load"] = time.monotonic() - started
             
-            # Safety check for malicious content (simple check)
-            if self._check_for_suspicious_content():
+            # Safety check for malicious content before interacting with the
+            # page, so nothing on a suspicious page gets clicked unwarned
+            started = time.monotonic()
+            if self._check_for_suspicious_content(self.driver.page_source):
                 print(f"⚠️ Warning: Potentially malicious content detected at {url}")
-            
-            # Scroll down to load any lazy loaded content
-            self.scroll_to_bottom(self.driver)
-            
-            # Click on "Show More" or "Load More" buttons if present
-            self.click_show_more_buttons(self.driver)
-            
-            # Expand any collapsed content
-            self.expand_collapsed_content(self.driver)
-            
-            # Extract page data
+            timings["safety_check"] = time.monotonic() - started
+            
+            # Scroll for lazy loaded content, click "Show More" style buttons
+            # and expand collapsed sections, all within one time budget
+            budget = InteractionBudget(self.interaction_budget)
+            if self.interaction_mode == "batched":
+                steps = (
+                    ("scroll", self.scroll_to_bottom),
+                    ("batch_expand", self.expand_all_batched),
+                )
+            else:
+                steps = (
+                    ("scroll", self.scroll_to_bottom),
+                    ("show_more", self.click_show_more_buttons),
+                    ("expand", self.expand_collapsed_content),
+                )
+            for name, step in steps:
+                if budget.expired():
+                    break
+                started = time.monotonic()
+                step(self.driver, budget)
+                elapsed = time.monotonic() - started
+                budget.record(name, elapsed)
+                timings[name] = elapsed
+            
+            # Take one DOM snapshot after interaction; the parse stage
+            # extracts the text from it
+            started = time.monotonic()
+            html = self.driver.page_source
+            timings["snapshot"] = time.monotonic() - started
+            
+            resources = self._resource_stats(self.driver)
             page_data = {
                 "url": url,
                 "title": self.driver.title,
-                "html": self.driver.page_source,
-                "text": self.driver.find_element(By.TAG_NAME, "body").text
+                "html": html,
+                "transfer_bytes": resources.get("transfer_bytes") or len(html.encode("utf-8")),
+                "resources": resources.get("resources", 0),
+                "browser_profile": self.profile,
+                "interaction": dict(budget.report(), mode=self.interaction_mode),
+                "timings": timings
             }
             
             return page_data
             
         except TimeoutException:
-            return {"error": "Timeout while loading page", "url": url}
+            return {"error": "Timeout while loading page", "url": url, "timings": timings}
         except WebDriverException as e:
             if "Reached error page" in str(e) and "about:neterror" in str(e):
-                return {"error": "Network error - Tor may be blocked by firewall", "url": url}
+                return {"error": "Network error - Tor may be blocked by firewall", "url": url, "timings": timings}
             else:
-                return {"error": f"WebDriver error: {str(e)}", "url": url}
+                return {"error": f"WebDriver error: {str(e)}", "url": url, "timings": timings,
+                        "driver_failure": _DRIVER_FAILURE_RE.search(str(e)) is not None}
         except Exception as e:
-            return {"error": str(e), "url": url}
+            # Anything but a WebDriverException means the client lost geckodriver
+            return {"error": str(e), "url": url, "timings": timings, "driver_failure": True}
             
-    def _check_for_suspicious_content(self):
-        """Simple check for potentially malicious content"""
+    def _check_for_suspicious_content(self, html):
+        """Simple check of a page snapshot for potentially malicious content"""
+        return _SUSPICIOUS_RE.search(html) is not None
+    
+    def _resource_stats(self, driver):
+        """Bytes transferred and subresource count for the loaded page ({} if unavailable)"""
         try:
-            # Check for common dangerous page characteristics
-            page_source = self.driver.page_source.lower()
-            suspicious_patterns = [
-                "download now", "install plugin", "allow notifications",
-                "enable javascript", "enable flash", "download extension",
-                "install now", "enable java"
-            ]
-            
-            return any(pattern in page_source for pattern in suspicious_patterns)
-        except:
+            return driver.execute_script(_RESOURCE_STATS_SCRIPT) or {}
+        except Exception:
+            return {}
+
+    def _dom_signature(self, driver):
+        try:
+            return driver.execute_script(_DOM_SIGNATURE_SCRIPT)
+        except WebDriverException:
+            return None
+
+    def _wait_for_change(self, driver, before, budget):
+        """Poll until the DOM signature differs from ``before``
+
+        Waits at most ``settle_timeout`` seconds (less if the budget is nearly
+        spent). Returns True if the page changed.
+        """
+        timeout = min(self.settle_timeout, budget.remaining())
+        if timeout <= 0:
             return False
-    
-    def scroll_to_bottom(self, driver):
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=self.poll_interval).until(
+                lambda d: self._dom_signature(d) != before
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    def _click(self, driver, element, budget):
+        """Click an element and wait for the page to react"""
+        budget.candidates += 1
+        if element.is_displayed() and element.is_enabled():
+            before = self._dom_signature(driver)
+            element.click()
+            budget.clicks += 1
+            self._wait_for_change(driver, before, budget)
+
+    def scroll_to_bottom(self, driver, budget=None):
         """Scroll to bottom of page incrementally to load lazy content"""
-        # Get initial height
-        last_height = driver.execute_script("return document.body.scrollHeight")
+        budget = budget or InteractionBudget(self.interaction_budget)
+        last_signature = self._dom_signature(driver)
         
         # Scroll down incrementally
         for _ in range(5):  # Adjust the number of scroll attempts as needed
-            # Scroll down
+            if budget.expired():
+                break
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             
-            # Wait for content to load
-            time.sleep(random.uniform(1.0, 2.0))
-            
-            # Calculate new scroll height
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            
             # Break if no more content loaded
-            if new_height == last_height:
+            if not self._wait_for_change(driver, last_signature, budget):
                 break
                 
-            last_height = new_height
+            last_signature = self._dom_signature(driver)
     
-    def click_show_more_buttons(self, driver):
+    def expand_all_batched(self, driver, budget=None):
+        """Click show-more controls and expandable elements in one script call
+
+        Matches the same patterns and selectors (and per-pattern limits) as
+        click_show_more_buttons and expand_collapsed_content, but each element
+        is clicked at most once and the page is only waited on once.
+        """
+        budget = budget or InteractionBudget(self.interaction_budget)
+        before = self._dom_signature(driver)
+        try:
+            summary = driver.execute_script(_BATCH_INTERACT_SCRIPT, SHOW_MORE_PATTERNS, EXPAND_SELECTORS, 5, 10)
+        except WebDriverException:
+            return
+        summary = summary or {}
+        budget.candidates += summary.get("candidates", 0)
+        budget.clicks += summary.get("clicked", 0)
+        if summary.get("clicked"):
+            self._wait_for_change(driver, before, budget)
+
+    def click_show_more_buttons(self, driver, budget=None):
         """Click on "Show More" or similar buttons"""
-        # Common button text patterns that indicate expandable content
-        button_patterns = [
-            "Show More", "Load More", "View More", "See More", 
-            "Show All", "Expand", "More", "Read More"
-        ]
-        
+        budget = budget or InteractionBudget(self.interaction_budget)
         # Try to find and click buttons with these texts
-        for pattern in button_patterns:
+        for pattern in SHOW_MORE_PATTERNS:
+            if budget.expired():
+                break
             try:
                 # Look for buttons by text
                 buttons = driver.find_elements(By.XPATH, 
@@ -481,34 +790,30 @@ class SeleniumFetcher:
                 
                 # Click each button
                 for button in buttons[:5]:  # Limit to first 5 to avoid infinite loops
+                    if budget.expired():
+                        break
                     try:
-                        if button.is_displayed() and button.is_enabled():
-                            button.click()
-                            time.sleep(random.uniform(1.0, 2.0))
+                        self._click(driver, button, budget)
                     except:
                         continue
             except:
                 continue
     
-    def expand_collapsed_content(self, driver):
+    def expand_collapsed_content(self, driver, budget=None):
         """Expand collapsed/hidden content sections"""
+        budget = budget or InteractionBudget(self.interaction_budget)
         # Try to find and click elements that might expand hidden content
         try:
-            # Common selectors for expandable elements
-            selectors = [
-                ".expander", ".expandable", ".toggle", ".accordion", 
-                "[aria-expanded='false']", "[data-expanded='false']",
-                ".collapsed", ".folded"
-            ]
-            
-            for selector in selectors:
+            for selector in EXPAND_SELECTORS:
+                if budget.expired():
+                    break
                 try:
                     elements = driver.find_elements(By.CSS_SELECTOR, selector)
                     for element in elements[:10]:  # Limit to first 10
+                        if budget.expired():
+                            break
                         try:
-                            if element.is_displayed() and element.is_enabled():
-                                element.click()
-                                time.sleep(0.5)
+                            self._click(driver, element, budget)
                         except:
                             continue
                 except:
@@ -542,8 +847,8 @@ def fetch_full_content(url, timeout=120):
             
         result = _fetcher.fetch_with_scrolling(url, timeout)
         
-        # If there was an error, try to reinitialize the fetcher once
-        if "error" in result and _fetcher.driver:
+        # If the browser itself failed (not the site), reinitialize it once
+        if result.get("driver_failure") and _fetcher.driver:
             _fetcher.close()
             _fetcher = SeleniumFetcher()
             result = _fetcher.fetch_with_scrolling(url, timeout)
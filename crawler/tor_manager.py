@@ -1,60 +1,382 @@
-import time
-import random
+import json
+import os
 import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
 from stem import Signal
 from stem.control import Controller
 
-class TorManager:
-    """Manages Tor circuit rotation for enhanced anonymity"""
-    
-    def __init__(self, password=None, control_port=9051, check_port=9050):
-        self.password = password
+DEFAULT_SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "configs", "tor_settings.json")
+
+class RotationPolicy:
+    """Conditions that trigger a new Tor identity (NEWNYM)
+
+    Any enabled condition triggers a rotation:
+    - every_pages: after this many pages since the last rotation
+    - every_seconds: once this many seconds have passed since the last rotation
+    - consecutive_errors: after this many failed fetches in a row
+    - on_host_change: when the crawl moves on to a different host
+    A value of 0 (or False) disables that condition.
+    """
+
+    def __init__(self, every_pages=0, every_seconds=0, consecutive_errors=0, on_host_change=False, enabled=True):
+        self.every_pages = every_pages
+        self.every_seconds = every_seconds
+        self.consecutive_errors = consecutive_errors
+        self.on_host_change = on_host_change
+        self.enabled = enabled
+
+    @classmethod
+    def from_dict(cls, settings):
+        """Build a policy from the "rotation" section of tor_settings.json
+
+        Without a section the policy keeps the original one rotation per page.
+        """
+        if settings is None:
+            return cls(every_pages=1)
+        return cls(
+            every_pages=settings.get("every_pages", 0),
+            every_seconds=settings.get("every_seconds", 0),
+            consecutive_errors=settings.get("consecutive_errors", 0),
+            on_host_change=settings.get("on_host_change", False),
+            enabled=settings.get("enabled", True)
+        )
+
+    def reason(self, pages, seconds, errors, host_changed):
+        """Return why a rotation is due, or None"""
+        if not self.enabled:
+            return None
+        if self.consecutive_errors and errors >= self.consecutive_errors:
+            return f"{errors} consecutive errors"
+        if self.every_pages and pages >= self.every_pages:
+            return f"{pages} pages"
+        if self.every_seconds and seconds >= self.every_seconds:
+            return f"{int(seconds)}s elapsed"
+        if self.on_host_change and host_changed:
+            return "host changed"
+        return None
+
+class TorEndpoint:
+    """One Tor client: a SOCKS port for traffic and a control port for NEWNYM
+
+    Tracks its own health (latency, recent error rate, current load) and its
+    own rotation state over one persistent control-port connection.
+    Rotations respect Tor's NEWNYM rate limit: a rotation that is due while
+    NEWNYM is unavailable stays pending and is sent later instead of sleeping.
+    """
+
+    # How long to wait before retrying an unreachable control port
+    RECONNECT_INTERVAL = 60
+
+    def __init__(self, socks_host="127.0.0.1", socks_port=9050, control_port=9051, password=None, window=20):
+        self.socks_host = socks_host
+        self.socks_port = socks_port
         self.control_port = control_port
-        self.check_port = check_port
-    
-    def rotate_circuit(self):
-        """Rotate to a new Tor circuit (new IP)"""
-        try:
-            # Check if Tor service is running
-            if not self.is_tor_running():
-                print("⚠️ Tor doesn't appear to be running. Please start Tor service first.")
-                return False
-                
-            # Try to connect to control port
-            with Controller.from_port(port=self.control_port) as controller:
-                if self.password:
-                    controller.authenticate(password=self.password)
-                else:
-                    # Try no-auth connection
-                    try:
-                        controller.authenticate()
-                    except Exception:
-                        print("⚠️ Failed to authenticate with Tor Controller. If using password auth, provide it in TorManager initialization.")
-                        return False
-                
-                # Send NEWNYM signal to rotate circuit
-                print("🔄 Rotating Tor circuit to get a new identity...")
-                controller.signal(Signal.NEWNYM)
-                
-                # Add slight delay to allow circuit to establish
-                time.sleep(random.uniform(2.0, 5.0))
-                print("✅ Tor circuit rotated successfully!")
-                return True
-                
-        except ConnectionRefusedError:
-            print("⚠️ Connection to Tor control port refused. Is Tor running with ControlPort enabled?")
-            print("👉 Make sure your torrc file has: ControlPort 9051")
-            return False
-        except Exception as e:
-            print(f"⚠️ Circuit rotation failed: {str(e)}")
-            return False
-    
+        self.password = password
+        self.lock = threading.Lock()
+
+        # Health
+        self.in_use = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency = None
+        self.recent = deque(maxlen=window)
+        self.disabled_until = 0.0
+
+        # Rotation
+        self._controller = None
+        self._retry_at = 0
+        self._pages_since_rotation = 0
+        self._last_rotation = time.monotonic()
+        self._consecutive_errors = 0
+        self._last_host = None
+        self._pending_reason = None
+        self.rotations = 0
+        self.deferred_rotations = 0
+
+    @classmethod
+    def from_dict(cls, settings, password=None):
+        return cls(
+            socks_host=settings.get("socks_host", "127.0.0.1"),
+            socks_port=settings.get("socks_port", 9050),
+            control_port=settings.get("control_port"),
+            password=settings.get("password", password)
+        )
+
+    @classmethod
+    def from_proxy_url(cls, proxy_url, control_port=None, password=None):
+        """Build an endpoint from a socks5h://host:port proxy URL"""
+        parsed = urlparse(proxy_url)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 9050, control_port, password)
+
+    @property
+    def name(self):
+        return f"{self.socks_host}:{self.socks_port}"
+
+    @property
+    def proxy_url(self):
+        return f"socks5h://{self.socks_host}:{self.socks_port}"
+
+    @property
+    def proxies(self):
+        """Proxy mapping for requests"""
+        return {"http": self.proxy_url, "https": self.proxy_url}
+
+    def error_rate(self):
+        return (len(self.recent) - sum(self.recent)) / len(self.recent) if self.recent else 0.0
+
+    def record(self, latency, ok):
+        """Update health after one request through this endpoint"""
+        with self.lock:
+            self.requests += 1
+            self.recent.append(1 if ok else 0)
+            if not ok:
+                self.errors += 1
+            elif latency is not None:
+                # Exponentially weighted moving average of successful requests
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
     def is_tor_running(self):
-        """Check if Tor SOCKS proxy is running on the expected port"""
+        """Check if the SOCKS port accepts connections"""
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('127.0.0.1', self.check_port))
+            sock.settimeout(5)
+            result = sock.connect_ex((self.socks_host, self.socks_port))
             sock.close()
             return result == 0
         except:
-            return False 
\ No newline at end of file
+            return False
+
+    def _get_controller(self):
+        """Return the persistent authenticated controller, connecting if needed"""
+        if self._controller is not None and self._controller.is_alive():
+            return self._controller
+        if self.control_port is None or time.monotonic() < self._retry_at:
+            return None
+
+        self._close_controller()
+        try:
+            controller = Controller.from_port(address=self.socks_host, port=self.control_port)
+            if self.password:
+                controller.authenticate(password=self.password)
+            else:
+                controller.authenticate()
+            self._controller = controller
+            return controller
+        except ConnectionRefusedError:
+            print(f"⚠️ Connection to Tor control port {self.control_port} refused. Is Tor running with ControlPort enabled?")
+            print(f"👉 Make sure your torrc file has: ControlPort {self.control_port}")
+        except Exception as e:
+            print(f"⚠️ Failed to connect to Tor Controller on port {self.control_port}: {str(e)}. If using password auth, set it in tor_settings.json.")
+        self._retry_at = time.monotonic() + self.RECONNECT_INTERVAL
+        return None
+
+    def _close_controller(self):
+        if self._controller is not None:
+            try:
+                self._controller.close()
+            except Exception:
+                pass
+            self._controller = None
+
+    def record_page(self, url, ok, policy):
+        """Count a page for the rotation policy and rotate if it is due"""
+        with self.lock:
+            host = urlparse(url).netloc.lower()
+            host_changed = self._last_host is not None and host != self._last_host
+            self._last_host = host
+            self._pages_since_rotation += 1
+            self._consecutive_errors = 0 if ok else self._consecutive_errors + 1
+
+            reason = self._pending_reason or policy.reason(
+                self._pages_since_rotation,
+                time.monotonic() - self._last_rotation,
+                self._consecutive_errors,
+                host_changed
+            )
+            if not reason:
+                return False
+            return self._rotate(reason)
+
+    def rotate(self, reason="requested"):
+        """Rotate to a new circuit now, if Tor allows it"""
+        with self.lock:
+            return self._rotate(reason)
+
+    def _rotate(self, reason):
+        controller = self._get_controller()
+        if controller is None:
+            return False
+
+        try:
+            # Respect Tor's NEWNYM rate limit instead of sleeping blindly
+            if not controller.is_newnym_available():
+                if not self._pending_reason:
+                    wait = controller.get_newnym_wait()
+                    print(f"⏳ Circuit rotation on {self.name} ({reason}) deferred for {wait:.1f}s by Tor's NEWNYM rate limit")
+                    self.deferred_rotations += 1
+                self._pending_reason = reason
+                return False
+
+            controller.signal(Signal.NEWNYM)
+            print(f"🔄 Rotated Tor circuit on {self.name} ({reason})")
+        except Exception as e:
+            print(f"⚠️ Circuit rotation failed on {self.name}: {str(e)}")
+            self._close_controller()
+            return False
+
+        self.rotations += 1
+        self._pending_reason = None
+        self._pages_since_rotation = 0
+        self._consecutive_errors = 0
+        self._last_rotation = time.monotonic()
+        return True
+
+    def close(self):
+        with self.lock:
+            self._close_controller()
+
+    def stats(self):
+        return {
+            "endpoint": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "recent_error_rate": round(self.error_rate(), 3),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "in_use": self.in_use,
+            "rotations": self.rotations,
+            "deferred_rotations": self.deferred_rotations,
+            "out_of_rotation": self.disabled_until > time.monotonic(),
+        }
+
+class TorManager:
+    """Manages a pool of Tor clients and their circuit rotation
+
+    Fetch workers ``acquire`` an endpoint (round-robin or least-load),
+    report every request with ``record_result`` and ``release`` it when done.
+    Endpoints whose recent error rate or latency is much worse than the rest
+    of the pool are taken out of rotation for a cooldown period.
+    """
+
+    def __init__(self, password=None, control_port=9051, check_port=9050, policy=None, endpoints=None,
+                 balancing="least_load", max_error_rate=0.5, slow_factor=3.0, min_samples=10, cooldown=120):
+        self.endpoints = endpoints or [TorEndpoint(socks_port=check_port, control_port=control_port, password=password)]
+        self.policy = policy or RotationPolicy(every_pages=1)
+        self.balancing = balancing
+        self.max_error_rate = max_error_rate
+        self.slow_factor = slow_factor
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._next = 0
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_SETTINGS_FILE):
+        """Create a TorManager from configs/tor_settings.json
+
+        Uses the "instances" list when present, otherwise a single instance
+        from "proxy" and "control_port".
+        """
+        settings = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                settings = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not read Tor settings from {path}: {str(e)}")
+
+        password = settings.get("password")
+        if settings.get("instances"):
+            endpoints = [TorEndpoint.from_dict(instance, password) for instance in settings["instances"]]
+        else:
+            endpoints = [TorEndpoint.from_proxy_url(settings.get("proxy", "socks5h://127.0.0.1:9050"),
+                                                    settings.get("control_port", 9051), password)]
+        health = settings.get("health", {})
+        return cls(
+            endpoints=endpoints,
+            policy=RotationPolicy.from_dict(settings.get("rotation")),
+            balancing=settings.get("balancing", "least_load"),
+            max_error_rate=health.get("max_error_rate", 0.5),
+            slow_factor=health.get("slow_factor", 3.0),
+            min_samples=health.get("min_samples", 10),
+            cooldown=health.get("cooldown", 120)
+        )
+
+    @classmethod
+    def from_proxy_urls(cls, proxy_urls, **kwargs):
+        """Create a TorManager for SOCKS proxies without control ports"""
+        return cls(endpoints=[TorEndpoint.from_proxy_url(url) for url in proxy_urls], **kwargs)
+
+    @property
+    def primary(self):
+        return self.endpoints[0]
+
+    def acquire(self):
+        """Pick an endpoint for a worker or request and mark it in use"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e.disabled_until <= now] or self.endpoints
+            if self.balancing == "round_robin":
+                endpoint = candidates[self._next % len(candidates)]
+                self._next += 1
+            else:
+                endpoint = min(candidates, key=lambda e: (e.in_use, e.latency if e.latency is not None else 0.0))
+            endpoint.in_use += 1
+            return endpoint
+
+    def release(self, endpoint):
+        """Return an endpoint acquired with acquire()"""
+        with self._lock:
+            endpoint.in_use = max(0, endpoint.in_use - 1)
+
+    def record_result(self, endpoint, url, latency, ok):
+        """Record a request's outcome for health tracking and circuit rotation"""
+        endpoint.record(latency, ok)
+        self._check_health(endpoint)
+        endpoint.record_page(url, ok, self.policy)
+
+    def _check_health(self, endpoint):
+        """Take an endpoint out of rotation if it is much worse than the others"""
+        if len(self.endpoints) < 2 or len(endpoint.recent) < self.min_samples:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if endpoint.disabled_until > now:
+                return
+            others = [e for e in self.endpoints if e is not endpoint and e.disabled_until <= now]
+            if not others:
+                return
+
+            reason = None
+            error_rate = endpoint.error_rate()
+            mean_error_rate = sum(e.error_rate() for e in others) / len(others)
+            if error_rate > self.max_error_rate and error_rate > 2 * mean_error_rate:
+                reason = f"error rate {error_rate:.0%}"
+            else:
+                latencies = sorted(e.latency for e in others if e.latency is not None)
+                if endpoint.latency is not None and latencies:
+                    median = latencies[len(latencies) // 2]
+                    if endpoint.latency > self.slow_factor * median:
+                        reason = f"latency {endpoint.latency:.1f}s vs {median:.1f}s median"
+            if reason:
+                endpoint.disabled_until = now + self.cooldown
+                endpoint.recent.clear()
+                print(f"🚧 Tor instance {endpoint.name} out of rotation for {self.cooldown}s ({reason})")
+
+    def rotate_circuit(self):
+        """Rotate every Tor instance to a new circuit"""
+        return all([endpoint.rotate() for endpoint in self.endpoints])
+
+    def stats(self):
+        """Per-endpoint health and rotation stats"""
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def close(self):
+        """Close the control-port connections"""
+        for endpoint in self.endpoints:
+            endpoint.close()
+
+    def is_tor_running(self):
+        """Check if at least one Tor SOCKS proxy is accepting connections"""
+        return any(endpoint.is_tor_running() for endpoint in self.endpoints)
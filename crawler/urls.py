@@ -0,0 +1,78 @@
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+# Query parameters that only track the visitor or carry a session; the page is the same without them
+DEFAULT_STRIP_PARAMS = (
+    "utm_*", "fbclid", "gclid", "ref", "sid", "sessid", "session", "sessionid", "session_id",
+    "phpsessid", "jsessionid", "aspsessionid",
+)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _param_matcher(strip_params):
+    exact = set()
+    prefixes = []
+    for name in strip_params:
+        name = name.lower()
+        if name.endswith("*"):
+            prefixes.append(name[:-1])
+        else:
+            exact.add(name)
+    prefixes = tuple(prefixes)
+    return lambda key: key in exact or (bool(prefixes) and key.startswith(prefixes))
+
+
+def canonicalize_url(url, strip_params=DEFAULT_STRIP_PARAMS):
+    """Normalize a URL so trivially different spellings dedupe to one
+
+    Lowercases the scheme and host, drops default ports, fragments,
+    ``;jsessionid=``-style path parameters and the query parameters named in
+    ``strip_params`` (a trailing ``*`` matches a prefix), sorts the remaining
+    query parameters by name and removes trailing slashes (the root path is
+    always ``/``). Query parameters keep their original encoding, and
+    repeated names keep their order.
+    """
+    return _canonicalize(url, _param_matcher(strip_params))
+
+
+def _canonicalize(url, strip):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    netloc = host
+    try:
+        port = parts.port
+    except ValueError:  # malformed port, keep it as written
+        port = None
+        netloc = parts.netloc.lower()
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+
+    path = parts.path.split(";", 1)[0]
+    path = path.rstrip("/") or "/"
+
+    query = parts.query
+    if query:
+        # Reorder the pieces as written: decoding and re-encoding them would
+        # turn %20 into + and change the request the server sees.
+        pieces = [(unquote_plus(piece.split("=", 1)[0]), piece) for piece in query.split("&") if piece]
+        pieces = [(key, piece) for key, piece in pieces if not strip(key.lower())]
+        query = "&".join(piece for _, piece in sorted(pieces, key=lambda item: item[0]))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class UrlCanonicalizer:
+    """canonicalize_url with a fixed list of stripped parameters
+
+    Used as the frontier's ``normalize`` function.
+    """
+
+    def __init__(self, strip_params=DEFAULT_STRIP_PARAMS):
+        self.strip_params = tuple(strip_params)
+        self._strip = _param_matcher(self.strip_params)
+
+    def __call__(self, url):
+        return _canonicalize(url, self._strip)
@@ -1,4 +1,5 @@
 import logging
+import os
 
 def setup_logging():
     """Basic logging configuration"""
@@ -9,4 +10,12 @@ def setup_logging():
             logging.FileHandler('outputs/logs/crawler.log'),
             logging.StreamHandler()
         ] 
-    )
\ No newline at end of file
+    )
+
+
+def write_atomic(path, text):
+    """Write ``text`` to ``path`` so readers never see a partial file"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,172 @@
+import hashlib
+import math
+import sqlite3
+
+
+class ExactVisitedSet:
+    """In-memory exact set of URL strings (the default)"""
+
+    def __init__(self):
+        self._urls = set()
+
+    def add(self, url):
+        """Add a URL; returns True if it was not already present"""
+        if url in self._urls:
+            return False
+        self._urls.add(url)
+        return True
+
+    def update(self, urls):
+        self._urls.update(urls)
+
+    def __contains__(self, url):
+        return url in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def close(self):
+        pass
+
+
+class _BloomSlice:
+    """One fixed-size Bloom filter sized for ``capacity`` items at ``error_rate``"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, h1, h2):
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def contains(self, positions):
+        bits = self.bits
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, positions):
+        bits = self.bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class BloomVisitedSet:
+    """Scalable Bloom filter: constant memory per URL, rare false positives
+
+    Starts with one filter for ``capacity`` URLs. When it fills up, a new
+    filter ``growth`` times larger with ``tightening`` times its error rate
+    is added, which keeps the overall false-positive rate below
+    ``error_rate``. A false positive means a never-seen URL is treated as
+    seen and skipped; URLs are never forgotten.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001, growth=2, tightening=0.5):
+        self.growth = growth
+        self.tightening = tightening
+        # The slice error rates form a geometric series summing to error_rate
+        self._slices = [_BloomSlice(int(capacity), error_rate * (1 - tightening))]
+        self._count = 0
+
+    @staticmethod
+    def _hash(url):
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, url):
+        """Add a URL; returns True if it was (probably) not already present"""
+        h1, h2 = self._hash(url)
+        for bloom in self._slices:
+            if bloom.contains(bloom.positions(h1, h2)):
+                return False
+        bloom = self._slices[-1]
+        if bloom.count >= bloom.capacity:
+            bloom = _BloomSlice(bloom.capacity * self.growth, bloom.error_rate * self.tightening)
+            self._slices.append(bloom)
+        bloom.add(bloom.positions(h1, h2))
+        self._count += 1
+        return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        h1, h2 = self._hash(url)
+        return any(bloom.contains(bloom.positions(h1, h2)) for bloom in self._slices)
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self._slices)
+
+    def close(self):
+        pass
+
+
+class SqliteVisitedSet:
+    """Exact visited set kept on disk in SQLite
+
+    Memory stays flat regardless of crawl size; inserts are committed in
+    batches of ``batch`` so adding a URL does not cost a disk sync.
+    """
+
+    def __init__(self, path, batch=1000):
+        self.path = path
+        self.batch = batch
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+        self._pending = 0
+
+    def add(self, url):
+        """Add a URL; returns True if it was not already present"""
+        cursor = self.conn.execute("INSERT OR IGNORE INTO visited (url) VALUES (?)", (url,))
+        if cursor.rowcount != 1:
+            return False
+        self._count += 1
+        self._pending += 1
+        if self._pending >= self.batch:
+            self.conn.commit()
+            self._pending = 0
+        return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        return self.conn.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+VISITED_BACKENDS = ("exact", "bloom", "sqlite")
+
+
+def create_visited_set(backend="exact", path=None, capacity=1000000, error_rate=0.001):
+    """Build the visited-set backend named by the ``visited`` settings"""
+    if backend == "exact":
+        return ExactVisitedSet()
+    if backend == "bloom":
+        return BloomVisitedSet(capacity=capacity, error_rate=error_rate)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite visited set needs a path")
+        return SqliteVisitedSet(path)
+    raise ValueError(f"Unknown visited backend {backend!r}, expected one of {VISITED_BACKENDS}")
@@ -1,9 +1,13 @@
+import argparse
 import json
 import os
 import platform
 import sys
 import ctypes
 from crawler.core import DarkWebCrawler
+from crawler.html_store import HtmlStore
+from crawler.options import CrawlOptions
+from crawler.search_index import SearchIndex
 from crawler.utils import setup_logging
 from datetime import datetime
 
@@ -110,9 +114,52 @@ def create_firewall_exceptions():
         print(f"❌ Error creating firewall exceptions: {e}")
         return False
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Dark Web Crawler")
+    parser.add_argument("--engine", choices=["selenium", "async"], default="selenium",
+                        help="selenium: worker pool with Firefox fallback (default); "
+                             "async: aiohttp engine with many requests in flight (HTTP only)")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue an interrupted crawl from its saved state (the run's timestamp, e.g. 20240101_120000)")
+    parser.add_argument("--gc-html", action="store_true",
+                        help="Delete stored HTML that no remaining results file refers to, then exit")
+    return parser.parse_args()
+
+def create_crawler(engine, sites_config, run_id=None):
+    """Create the crawler for the selected engine"""
+    output = {"output_format": sites_config.get('output_format', 'json'),
+              "shard_options": sites_config.get('shard_options'),
+              "html_store": sites_config.get('html_store'),
+              "search_index": sites_config.get('search_index')}
+    if engine == "async":
+        from crawler.async_core import AsyncDarkWebCrawler
+        return AsyncDarkWebCrawler(concurrency=sites_config.get('async_concurrency', 16),
+                                   parse_workers=sites_config.get('parse_workers'),
+                                   parse_executor=sites_config.get('parse_executor', 'process'),
+                                   run_id=run_id, **output)
+    return DarkWebCrawler(run_id=run_id, **output)
+
+def collect_html_garbage(sites_config):
+    """Remove HTML store blobs that no results file, search index page or page cache entry refers to"""
+    output_dir = os.path.join('outputs', 'scraped_data')
+    settings = dict(sites_config.get('html_store') or {}, enabled=True)
+    store = HtmlStore.from_dict(settings, output_dir)
+    keep = set()
+    index = SearchIndex.from_dict(sites_config.get('search_index'), output_dir)
+    if index:
+        keep = index.digests()
+        index.close()
+    # Page cache entries hold their bodies in the store themselves
+    result = store.gc([output_dir], keep=keep)
+    store.close()
+    print(f"🧹 HTML store {store.root}: {result['deleted']} unreferenced bodies deleted "
+          f"({result['freed_bytes'] / (1024 * 1024):.1f} MB freed), {result['kept']} kept")
+
 def main():
-    setup_logging()
+    args = parse_args()
     ensure_output_dirs()
+    setup_logging()
     
     # Show banner
     print("\n" + "=" * 80)
@@ -155,11 +202,20 @@ def main():
         print("❌ Error: configs/sites.json is not valid JSON")
         return
     
+    if args.gc_html:
+        collect_html_garbage(sites_config)
+        return
+    
+    options = CrawlOptions.from_dict(sites_config)
     print("🚀 Starting Dark Web Crawler")
     print(f"📌 Target URLs: {len(sites_config['sites'])}")
-    print(f"🔍 Max Pages: {sites_config.get('max_pages', 20)}")
-    print(f"🌳 Crawl Depth: {sites_config.get('depth', 1)}")
-    print("🧠 Enhanced Mode: Using Firefox with Tor for deep content extraction")
+    print(f"🔍 Max Pages: {options.max_pages}")
+    print(f"🌳 Crawl Depth: {options.depth}")
+    if args.engine == "async":
+        print(f"⚡ Engine: async ({sites_config.get('async_concurrency', 16)} requests in flight, max {options.per_host_limit} per host)")
+    else:
+        print(f"🧵 Browser Workers: {options.workers} (max {options.per_host_limit} per host)")
+        print(f"🧠 Fetch Mode: {options.fetch_mode} (raw HTTP first, Firefox with Tor when a page needs it)")
     print("🔒 Security: JavaScript disabled, WebRTC blocked, enhanced privacy settings")
     
     # Double-check if any URLs were provided
@@ -167,20 +223,25 @@ def main():
         print("❌ Error: No target URLs specified in configs/sites.json")
         return
     
-    crawler = DarkWebCrawler()
     try:
+        crawler = create_crawler(args.engine, sites_config, args.resume)
+    except (ImportError, FileNotFoundError) as e:
+        print(f"❌ {str(e)}")
+        return
+    
+    try:
+        print(f"\n🆔 Run ID: {crawler.run_id} (continue an interrupted crawl with --resume {crawler.run_id})")
         print(f"\n💾 REAL-TIME DATA: Check the incremental file for results as they're found:")
         print(f"   {crawler.incremental_file}")
-        print("   This file updates after each successful page crawl\n")
+        print("   This file is appended to (one JSON record per line) after each page crawl\n")
         
-        results = crawler.crawl(
-            start_urls=sites_config['sites'],
-            max_pages=sites_config.get('max_pages', 20),
-            depth=sites_config.get('depth', 1)
-        )
+        crawler.crawl(sites_config['sites'], options)
+        
+        # Statistics are streamed from the saved records, not held in memory
+        stats = crawler.result_stats()
         
         # Check if we got any results
-        if not results:
+        if not stats['total_pages_crawled']:
             print("\n❌ No results obtained. This could be due to:")
             print("   - Tor not running or blocked by firewall")
             print("   - Firefox not installed or blocked")
@@ -189,17 +250,8 @@ def main():
             print("   Please check the error messages above for specific issues.")
             return
             
-        # Save results
-        output_file = crawler.save_results(results)
-        
-        # Generate statistics
-        stats = {
-            'total_pages_crawled': len(results),
-            'total_links_found': sum(len(page.get('links', [])) for page in results),
-            'content_size_bytes': sum(len(str(page)) for page in results),
-            'hidden_elements_found': sum(len(page.get('hidden_content', [])) for page in results),
-            'timestamp': crawler.timestamp
-        }
+        # Save results (streamed from the incremental file)
+        output_file = crawler.save_results()
         
         # Print statistics
         print("\n📊 Crawl Statistics:")
@@ -213,6 +265,11 @@ def main():
     except KeyboardInterrupt:
         print("\n⚠️ Crawl interrupted by user")
         print(f"   Partial results are still available in the incremental file: {crawler.incremental_file}")
+        print(f"   Resume this crawl with: python run_crawler.py --resume {crawler.run_id}")
+        try:
+            crawler.save_results()
+        except Exception as e:
+            print(f"⚠️ Could not write combined results: {str(e)}")
     except Exception as e:
         print(f"\n❌ Error during crawl: {str(e)}")
         print("   Please check the error messages above for specific issues.")
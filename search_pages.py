@@ -0,0 +1,128 @@
+"""Query the cross-run search index of crawled pages
+
+    python search_pages.py search escrow monero --since 30d
+    python search_pages.py search '"bitcoin mixer" OR tumbler' --raw --host exampleabc.onion
+    python search_pages.py host exampleabc.onion
+    python search_pages.py hosts
+    python search_pages.py links-to exampleabc.onion
+    python search_pages.py links-from http://exampleabc.onion/forum
+    python search_pages.py ingest outputs/scraped_data/results_20240101_120000.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from crawler.search_index import SearchIndex, parse_since
+
+DEFAULT_DB = os.path.join("outputs", "scraped_data", "search_index.sqlite")
+
+
+def default_db():
+    """The index path from configs/sites.json, else the default location"""
+    try:
+        with open(os.path.join("configs", "sites.json")) as f:
+            return (json.load(f).get("search_index") or {}).get("path") or DEFAULT_DB
+    except (OSError, json.JSONDecodeError):
+        return DEFAULT_DB
+
+
+def parse_args():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=None, help=f"Index database (default {DEFAULT_DB})")
+    common.add_argument("--limit", type=int, default=20)
+    common.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    parser = argparse.ArgumentParser(description="Search crawled pages across runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", parents=[common], help="Full-text search (all keywords must match)")
+    search.add_argument("keywords", nargs="+")
+    search.add_argument("--host", help="Only pages of this .onion host")
+    search.add_argument("--since", help="Only pages crawled since e.g. 30d, 12h, 2w or 2024-01-01")
+    search.add_argument("--raw", action="store_true", help="Pass the query to FTS5 unchanged (OR, NEAR, phrases)")
+
+    host = commands.add_parser("host", parents=[common], help="Pages crawled on a host, newest first")
+    host.add_argument("host")
+    host.add_argument("--since")
+
+    commands.add_parser("hosts", parents=[common], help="Hosts by number of pages indexed")
+
+    links_to = commands.add_parser("links-to", parents=[common], help="Pages linking to a URL or to any page of a host")
+    links_to.add_argument("target")
+
+    links_from = commands.add_parser("links-from", parents=[common], help="Outgoing links of a URL")
+    links_from.add_argument("url")
+
+    ingest = commands.add_parser("ingest", parents=[common], help="Index results files of earlier runs")
+    ingest.add_argument("paths", nargs="+", help="results_*.json, incremental_*.jsonl or results_*.shards")
+    return parser.parse_args()
+
+
+def run_query(index, args):
+    if args.command == "search":
+        since = parse_since(args.since) if args.since else None
+        return index.search(" ".join(args.keywords), host=args.host, since=since, limit=args.limit, raw=args.raw)
+    if args.command == "host":
+        since = parse_since(args.since) if args.since else None
+        return index.host_pages(args.host, since=since, limit=args.limit)
+    if args.command == "hosts":
+        return index.hosts(limit=args.limit)
+    if args.command == "links-to":
+        return index.links_to(args.target, limit=args.limit)
+    return index.links_from(args.url, limit=args.limit)
+
+
+def print_rows(command, rows):
+    for row in rows:
+        if command == "search":
+            print(f"🔎 {row['url']}  ({row['crawled_at']}, run {row['run_id']})")
+            if row["title"]:
+                print(f"   {row['title']}")
+            print(f"   {row['snippet']}")
+        elif command == "host":
+            status = f"error: {row['error']}" if row["error"] else row["title"] or ""
+            print(f"📄 {row['url']}  ({row['crawled_at']})  {status}")
+        elif command == "hosts":
+            print(f"🧅 {row['host']}: {row['pages']} pages, last crawled {row['last_crawled']}")
+        elif command == "links-to":
+            print(f"🔗 {row['source']} -> {row['target']}  {row['text'] or ''}")
+        else:
+            print(f"🔗 {row['target']}  {row['text'] or ''}")
+
+
+def main():
+    args = parse_args()
+    db = args.db or default_db()
+    if args.command != "ingest" and not os.path.exists(db):
+        print(f"❌ No search index at {db}; enable search_index in configs/sites.json or run the ingest command")
+        return 1
+    index = SearchIndex(db)
+    try:
+        if args.command == "ingest":
+            for path in args.paths:
+                started = time.perf_counter()
+                count = index.ingest(path)
+                print(f"📥 Indexed {count} pages from {path} in {time.perf_counter() - started:.1f}s")
+            return 0
+
+        started = time.perf_counter()
+        try:
+            rows = run_query(index, args)
+        except (ValueError, sqlite3.OperationalError) as e:
+            print(f"❌ {str(e)}")
+            return 1
+        elapsed = (time.perf_counter() - started) * 1000
+        if args.json:
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        else:
+            print_rows(args.command, rows)
+            print(f"\n{len(rows)} results in {elapsed:.1f} ms")
+        return 0
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from crawler.core import DarkWebCrawler
+from crawler.crawl_state import DONE, ERROR, CrawlStateStore
+from crawler.options import CrawlOptions
+from crawler.tor_manager import RotationPolicy, TorManager
+
+
+def _tor():
+    return TorManager.from_proxy_urls(["socks5h://127.0.0.1:9"], policy=RotationPolicy(enabled=False))
+
+
+def test_resume_requeues_unfinished_urls_in_order(tmp_path):
+    path = str(tmp_path / "state.sqlite")
+    state = CrawlStateStore(path)
+    seed = "http://a.onion/"
+    state.add_urls([(seed, 0, seed), ("http://b.onion/", 0, "http://b.onion/")])
+    state.checkpoint(seed, DONE, [("http://a.onion/1", 1, seed), ("http://a.onion/2", 1, seed)])
+    state.checkpoint("http://b.onion/", ERROR, error="timeout")
+    state.close()
+
+    resumed = CrawlStateStore(path)
+    queued, seen, finished = resumed.load()
+    assert queued == [("http://a.onion/1", 1), ("http://a.onion/2", 1)]
+    assert set(seen) == {seed, "http://b.onion/", "http://a.onion/1", "http://a.onion/2"}
+    assert finished == 2
+    origins, per_seed, per_depth = resumed.scope_counts()
+    assert origins == {"http://a.onion/1": seed, "http://a.onion/2": seed}
+    assert per_seed == {seed: 3, "http://b.onion/": 1}
+    assert per_depth == {0: 2}
+    resumed.close()
+
+
+def test_resumed_crawl_keeps_its_settings_and_written_records(tmp_path):
+    output_dir = str(tmp_path)
+    crawler = DarkWebCrawler(output_dir=output_dir, tor=_tor())
+    options = CrawlOptions(max_pages=5, depth=2, scope={"same_host_only": True})
+    crawler._init_frontier(["http://a.onion/"], options)
+    # The run stopped after writing the seed's record but before its checkpoint
+    crawler.sink.write({"url": "http://a.onion/", "title": "home"})
+    crawler.sink.close()
+    crawler.state.close()
+
+    resumed = DarkWebCrawler(output_dir=output_dir, tor=_tor(), run_id=crawler.run_id)
+    start_urls, options = resumed._restore_settings(["http://b.onion/"], CrawlOptions(max_pages=50))
+    assert start_urls == ["http://a.onion/"]
+    assert (options.max_pages, options.depth, options.scope) == (5, 2, {"same_host_only": True})
+    frontier, finished = resumed._init_frontier(start_urls, options)
+    assert finished == 0 and len(frontier) == 1
+    assert resumed.saved_before_resume == {"http://a.onion/"}
+    resumed.state.close()
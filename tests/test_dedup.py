@@ -0,0 +1,32 @@
+from crawler.dedup import NearDuplicateIndex, simhash
+
+WORDS = [f"word{i}" for i in range(200)]
+
+
+def test_simhash_of_near_identical_texts_differs_in_few_bits():
+    text = " ".join(WORDS)
+    edited = " ".join(WORDS[:100] + ["changed"] + WORDS[101:])
+    other = " ".join(reversed(WORDS))
+    assert bin(simhash(text) ^ simhash(edited)).count("1") <= 3
+    assert bin(simhash(text) ^ simhash(other)).count("1") > 3
+
+
+def test_simhash_is_stable_and_skips_short_texts():
+    assert simhash("the same words every time") == simhash("The same words, every time!")
+    assert simhash("too short") is None
+
+
+def test_mirror_on_another_host_is_a_near_duplicate():
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = simhash(" ".join(WORDS))
+    assert index.check(fingerprint, "http://a.onion/") is None
+    assert index.check(fingerprint ^ 0b101, "http://b.onion/") == "http://a.onion/"
+    assert index.stats() == {"checked": 2, "near_duplicates": 1}
+
+
+def test_same_host_pages_are_not_matched_by_default():
+    index = NearDuplicateIndex(max_distance=3)
+    fingerprint = simhash(" ".join(WORDS))
+    assert index.check(fingerprint, "http://a.onion/1") is None
+    assert index.check(fingerprint, "http://a.onion/2") is None
+    assert NearDuplicateIndex(cross_host_only=False).check(fingerprint, "http://a.onion/1") is None
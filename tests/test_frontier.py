@@ -0,0 +1,26 @@
+import time
+
+from crawler.frontier import CrawlFrontier
+
+
+def test_delay_counts_from_end_of_fetch():
+    frontier = CrawlFrontier(["http://a.onion/1", "http://a.onion/2"], delay=0.5)
+    assert frontier.pop() == ("http://a.onion/1", 0)
+    time.sleep(0.4)
+    frontier.mark_fetched("http://a.onion/1")
+    finished = time.monotonic()
+
+    time.sleep(0.2)  # past the delay from the start of the fetch, not from its end
+    assert frontier.pop() is None
+    assert frontier.next_ready_in() > 0.2
+
+    while frontier.pop() is None:
+        time.sleep(0.01)
+    assert time.monotonic() - finished >= 0.5
+
+
+def test_other_hosts_are_not_held_up():
+    frontier = CrawlFrontier(["http://a.onion/1", "http://a.onion/2", "http://b.onion/1"], delay=5)
+    popped = {frontier.pop()[0], frontier.pop()[0]}
+    assert popped == {"http://a.onion/1", "http://b.onion/1"}
+    assert frontier.pop() is None
@@ -0,0 +1,45 @@
+import os
+
+from crawler.result_shards import ShardedResults, ShardedResultSink, read_results
+
+
+def _record(i):
+    return {"url": f"http://a.onion/{i}", "title": f"page {i}", "text": f"text {i}", "html": f"<p>{i}</p>"}
+
+
+def test_column_limited_read_skips_page_bodies(tmp_path):
+    path = str(tmp_path / "results.shards")
+    with ShardedResultSink(path, records_per_shard=3, compression="gzip") as sink:
+        for i in range(7):
+            sink.write(_record(i))
+
+    results = ShardedResults(path)
+    assert len(results) == 7
+    assert results.columns == ["url", "title", "text", "html"]
+    # The bodies are never opened when only small fields are asked for
+    for name in os.listdir(path):
+        if ".html." in name:
+            os.remove(os.path.join(path, name))
+    assert results.column("url") == [f"http://a.onion/{i}" for i in range(7)]
+    assert list(read_results(path, fields=["title", "text"]))[6] == {"title": "page 6", "text": "text 6"}
+
+
+def test_crash_keeps_committed_records_and_reopen_appends(tmp_path):
+    path = str(tmp_path / "results.shards")
+    sink = ShardedResultSink(path, compression="gzip", fsync_every=2, fsync_interval=3600)
+    for i in range(5):
+        sink.write(_record(i))
+    # Simulate a crash: the fifth record was never synced and a torn frame
+    # was left after the committed bytes
+    for name in os.listdir(path):
+        if name.startswith("shard-"):
+            with open(os.path.join(path, name), "ab") as f:
+                f.write(b"\x1f\x8b torn")
+    del sink
+
+    urls = [record["url"] for record in read_results(path, fields=["url"])]
+    assert urls == [f"http://a.onion/{i}" for i in range(4)]
+
+    with ShardedResultSink(path, compression="gzip") as sink:
+        sink.write(_record(4))
+    assert [record["html"] for record in read_results(path)] == [f"<p>{i}</p>" for i in range(5)]
@@ -0,0 +1,33 @@
+from crawler.scope import CrawlScope
+
+
+def test_depth_limits_which_pages_are_expanded():
+    scope = CrawlScope(depth=2)
+    assert scope.expands(0)
+    assert not scope.expands(1)
+    assert not CrawlScope(depth=1).expands(0)
+
+
+def test_same_host_only_rejects_links_off_the_seed_host():
+    scope = CrawlScope.from_dict({"same_host_only": True}, ["http://a.onion/"], depth=3)
+    seed = "http://a.onion/"
+    assert scope.rejects("http://a.onion/page", seed, seed) is None
+    assert scope.rejects("http://b.onion/", seed, seed) == "off_host"
+    # Pages with no known seed are scoped to their own host
+    assert scope.rejects("http://c.onion/x", None, "http://c.onion/") is None
+
+
+def test_seed_budget_counts_the_seed():
+    scope = CrawlScope(["http://a.onion/"], depth=3, max_pages_per_seed=2)
+    seed = "http://a.onion/"
+    assert scope.rejects("http://a.onion/1", seed, seed) is None
+    scope.admit("http://a.onion/1", seed)
+    assert scope.rejects("http://a.onion/2", seed, seed) == "seed_budget"
+    assert scope.origin("http://a.onion/1") == seed
+
+
+def test_restore_reloads_counters():
+    scope = CrawlScope(["http://a.onion/"], depth=3, max_pages_per_seed=2)
+    scope.restore({"http://a.onion/1": "http://a.onion/"}, {"http://a.onion/": 2}, {0: 1})
+    assert scope.rejects("http://a.onion/2", "http://a.onion/", "http://a.onion/1") == "seed_budget"
+    assert scope.report()["pages_per_depth"] == {"0": 1}
@@ -0,0 +1,29 @@
+from crawler.urls import UrlCanonicalizer, canonicalize_url
+
+
+def test_spellings_of_one_page_canonicalize_alike():
+    urls = [
+        "HTTP://Market.ONION:80/listings/?b=2&a=1#top",
+        "http://market.onion/listings?a=1&b=2",
+        "http://market.onion/listings/;jsessionid=ABC?utm_source=x&a=1&b=2&sid=9",
+    ]
+    assert {canonicalize_url(url) for url in urls} == {"http://market.onion/listings?a=1&b=2"}
+
+
+def test_root_path_and_non_default_port_are_kept():
+    assert canonicalize_url("http://a.onion") == "http://a.onion/"
+    assert canonicalize_url("http://a.onion:8080//") == "http://a.onion:8080/"
+
+
+def test_query_values_keep_their_encoding():
+    assert canonicalize_url("http://a.onion/s?q=a%20b&p=%2F") == "http://a.onion/s?p=%2F&q=a%20b"
+    assert canonicalize_url("http://a.onion/s?q=a+b") == "http://a.onion/s?q=a+b"
+
+
+def test_repeated_parameters_keep_their_order():
+    assert canonicalize_url("http://a.onion/?z=1&a=2&a=1") == "http://a.onion/?a=2&a=1&z=1"
+
+
+def test_custom_strip_params():
+    canonicalize = UrlCanonicalizer(["track*"])
+    assert canonicalize("http://a.onion/?tracking=1&id=5&sid=2") == "http://a.onion/?id=5&sid=2"
@@ -0,0 +1,40 @@
+import pytest
+
+from crawler.visited import BloomVisitedSet, SqliteVisitedSet, create_visited_set
+
+
+def test_bloom_grows_past_capacity_without_forgetting():
+    visited = BloomVisitedSet(capacity=100, error_rate=0.01)
+    urls = [f"http://a.onion/{i}" for i in range(1000)]
+    added = sum(visited.add(url) for url in urls)
+    assert all(url in visited for url in urls)
+    assert not visited.add(urls[0])
+    assert len(visited) == added >= 990
+
+
+def test_bloom_false_positive_rate_stays_below_target():
+    visited = BloomVisitedSet(capacity=1000, error_rate=0.01)
+    visited.update(f"http://a.onion/{i}" for i in range(5000))
+    false_positives = sum(f"http://b.onion/{i}" in visited for i in range(10000))
+    assert false_positives / 10000 < 0.01
+
+
+def test_sqlite_visited_set_persists(tmp_path):
+    path = str(tmp_path / "visited.sqlite")
+    visited = SqliteVisitedSet(path, batch=2)
+    assert visited.add("http://a.onion/")
+    assert not visited.add("http://a.onion/")
+    visited.update(["http://b.onion/", "http://c.onion/"])
+    visited.close()
+
+    reopened = SqliteVisitedSet(path)
+    assert len(reopened) == 3
+    assert "http://c.onion/" in reopened and "http://d.onion/" not in reopened
+    reopened.close()
+
+
+def test_unknown_backend_and_missing_path_are_rejected():
+    with pytest.raises(ValueError):
+        create_visited_set("redis")
+    with pytest.raises(ValueError):
+        create_visited_set("sqlite")